@@ -216,6 +216,13 @@ class NewsPipeline:
         }
         
         try:
+            # Resolve GPT deduplication batches submitted by earlier runs
+            if self.gpt_deduplicator.use_batch_api:
+                try:
+                    results['step4_resolved_batches'] = self.gpt_deduplicator.poll_pending_batches()
+                except Exception as e:
+                    self.logger.warning(f"Polling clustering batches failed: {e}, continuing pipeline...")
+            
             # Step 1: Collect URLs
             # Track what's new before collection
             conn = sqlite3.connect(self.db_path)
@@ -326,6 +333,7 @@ class NewsPipeline:
         finally:
             # Cleanup resources
             self.scraper.cleanup()
+            self.gpt_deduplicator.close()
         
         return results
     
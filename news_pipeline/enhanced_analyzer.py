@@ -138,11 +138,13 @@ class EnhancedMetaAnalyzer:
         
         start_time = time.time()
         
+        self.logger.info(f"Processing topics: {', '.join(topics)}")
+        
+        # Generate incremental digests (partial digests in one batch if enabled)
+        topic_digests = self.incremental_generator.generate_incremental_topic_digests(topics, date)
+        
         for topic in topics:
-            self.logger.info(f"Processing topic: {topic}")
-            
-            # Generate incremental digest
-            digest, was_updated = self.incremental_generator.generate_incremental_topic_digest(topic, date)
+            digest, was_updated = topic_digests[topic]
             results[topic] = digest
             results[topic]['was_updated'] = bool(was_updated)
             
@@ -397,6 +399,8 @@ class EnhancedMetaAnalyzer:
         # Get trending topics
         trending = self.identify_trending_topics(days=7)
         
+        generation_log = self._get_latest_generation_log(date_str)
+        
         # Combine all data
         current_time = datetime.now().isoformat()
         generation_type = "incremental" if any(d.get('was_updated') for d in digests.values()) else "cached"
@@ -413,9 +417,9 @@ class EnhancedMetaAnalyzer:
             'stats': {
                 'topics': len(digests),
                 'total_articles': sum(d.get('article_count', 0) for d in digests.values()),
-                'new_articles': (self._get_latest_generation_log(date_str) or {}).get('new_articles'),
-                'api_calls_made': (self._get_latest_generation_log(date_str) or {}).get('api_calls_made'),
-                'execution_time_seconds': (self._get_latest_generation_log(date_str) or {}).get('execution_time_seconds'),
+                'new_articles': generation_log.get('new_articles'),
+                'api_calls_made': generation_log.get('api_calls_made'),
+                'execution_time_seconds': generation_log.get('execution_time_seconds'),
             },
             'cross_run_dedup_stats': self.last_dedup_results,
             'source_yield': self._compute_source_yield(date_str),
@@ -48,9 +48,14 @@ class AIFilter:
         
         self.logger = logging.getLogger(__name__)
         
-        # Initialize PromptLibrary with LanguageConfig
+        # Initialize PromptLibrary with LanguageConfig; the filter only composes fragments,
+        # so those are loaded up front and no stage prompt file is parsed
         self.language_config = LanguageConfig()
         self.prompt_lib = PromptLibrary(self.language_config)
+        self.prompt_lib.preload(stages=())
+        
+        # Composed classification prompt per topic (topic keywords are fixed for a run)
+        self._classification_prompts: Dict[str, str] = {}
         
         # Load topics configuration using robust path resolution
         if topics_config_path is None:
@@ -165,8 +170,11 @@ class AIFilter:
             include_keywords = topic_config.get('include', [])
             topic_threshold = topic_config.get('confidence_threshold', self.confidence_threshold)
             
-            # Build system prompt using fragments
-            system_prompt = self._build_classification_prompt(topic, include_keywords)
+            # Build system prompt using fragments, once per topic
+            system_prompt = self._classification_prompts.get(topic)
+            if system_prompt is None:
+                system_prompt = self._build_classification_prompt(topic, include_keywords)
+                self._classification_prompts[topic] = system_prompt
             
             # User input
             user_input = {
@@ -6,18 +6,26 @@ using sequential thinking to provide rating agency perspective on market develop
 """
 
 import os
+import re
 import sqlite3
-from urllib.parse import urlparse
-import json
+import time
+import hashlib
+import functools
+import tempfile
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 import logging
+from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import ChoiceLoader, Environment, FileSystemLoader, ModuleLoader
 
 from .paths import template_path, resource_path
 from .prompt_library import PromptLibrary
 from .language_config import LanguageConfig
+from .utils import normalize_url, load_json_file, loads_json, dumps_json
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +36,201 @@ try:
 except ImportError:
     OpenAI = None
 
+# Report template, its directory (resolved once at import) and the directory
+# scripts/compile_templates.py writes its compiled modules to
+REPORT_TEMPLATE = 'daily_digest.md.j2'
+TEMPLATES_DIR = str(template_path())
+COMPILED_TEMPLATES_DIR = Path(__file__).parent / "_compiled_templates"
+
+
+# Shared requirements for the GPT key point prompts (single article and batched)
+_KEY_POINTS_REQUIREMENTS = """Extrahiere genau 3 prägnante, leicht lesbare Stichpunkte aus der Artikelzusammenfassung.
+
+Anforderungen:
+- Jeder Punkt muss klar, direkt und verständlich sein.
+- Verwende einfache, konkrete Sprache – wo möglich ohne Fachjargon.
+- Halte jeden Punkt bei 1–2 kurzen Sätzen.
+- Konzentriere dich auf die wichtigsten Fakten oder Implikationen.
+- Mach die Punkte gut scannbar und angenehm lesbar.
+
+"""
+
+_KEY_POINTS_LINE_FORMAT = """Gib ausschließlich die 3 Stichpunkte zurück, je einer pro Zeile, beginnend mit einem Bindestrich (-).
+"""
+
+_KEY_POINTS_BATCH_FORMAT = """Du erhältst mehrere Artikelzusammenfassungen, jeweils mit einer numerischen id.
+Wende die Anforderungen auf jede Zusammenfassung einzeln an.
+
+Antworte ausschließlich mit einem JSON-Objekt in diesem Format:
+{"items": [{"id": 0, "points": ["...", "...", "..."]}, ...]}
+"""
+
+# Leading bullet marker ("- ", "* ", "• ") or numbering ("1.") of a GPT key point line
+_BULLET_RE = re.compile(r'^\s*(?:[-*•]\s+|\d+\.\s*)')
+
+
+def _parse_bullet_lines(content: str) -> list[str]:
+    """Split GPT output into key points, stripping bullet markers and numbering."""
+    key_points = []
+    for line in content.split('\n'):
+        line = _BULLET_RE.sub('', line, count=1).strip()
+        if line:
+            key_points.append(line)
+    return key_points
+
+
+def _read_key_point_stream(stream, limit: int = 3) -> str:
+    """
+    Collect the output text of a streamed key point response.
+    
+    The stream is closed as soon as `limit` complete bullet lines have arrived, so the
+    call does not wait for trailing tokens. Only complete lines are returned in that case.
+    """
+    complete_lines: list[str] = []
+    pending = ""
+    bullets = 0
+    try:
+        for event in stream:
+            if getattr(event, "type", None) != "response.output_text.delta":
+                continue
+            *lines, pending = (pending + event.delta).split('\n')
+            complete_lines.extend(lines)
+            bullets += len(_parse_bullet_lines('\n'.join(lines)))
+            if bullets >= limit:
+                return '\n'.join(complete_lines)
+    finally:
+        stream.close()
+    return '\n'.join(complete_lines + [pending])
+
+
+def _summary_cache_key(summary: str) -> bytes:
+    """Cache key for GPT key points generated from a summary (in memory and in key_points_cache)."""
+    return hashlib.blake2b(summary.encode('utf-8'), digest_size=16).digest()
+
+
+def _compact_for_llm(digest_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce the digest to what the rating analysis needs.
+    
+    Topic digests are cut down to headline, relevance, top bullets and article count -
+    source URLs and the remaining bullets only inflate the prompt.
+    """
+    exec_summary = digest_data.get('executive_summary') or {}
+    topic_digests = {}
+    for topic, digest in (digest_data.get('topic_digests') or {}).items():
+        if digest.get('article_count', 0) > 0:  # Only include topics with articles
+            topic_digests[topic] = {
+                'headline': digest.get('headline', ''),
+                'why_it_matters': digest.get('why_it_matters', ''),
+                'bullets': digest.get('bullets', [])[:3],  # Top 3 bullets
+                'article_count': digest.get('article_count', 0)
+            }
+
+    return {
+        "date": digest_data.get('date'),
+        "executive_summary": {
+            key: exec_summary[key]
+            for key in ('headline', 'executive_summary', 'key_themes', 'top_priorities')
+            if key in exec_summary
+        },
+        "trending_topics": (digest_data.get('trending_topics') or [])[:10],
+        "topic_digests": topic_digests
+    }
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """
+    Write bytes to a temporary file next to path and move it into place.
+    
+    Readers never see a partially written report, even if the process dies mid-write.
+    The temporary file name is unique, so concurrent exports of the same report
+    do not write into each other's file.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix=".tmp")
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        # mkstemp creates the file owner-only; reports keep the usual permissions
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _report_max_sources() -> int:
+    """Maximum number of sources listed per topic in the report."""
+    return int(os.getenv("GERMAN_REPORT_MAX_SOURCES", "20"))
+
+
+def _datetime_format(value, format='%Y-%m-%d %H:%M:%S'):
+    """Jinja filter: reformat an ISO timestamp."""
+    try:
+        return datetime.fromisoformat(value).strftime(format)
+    except (ValueError, TypeError):
+        return value
+
+
+def _topic_name(value):
+    """Jinja filter: turn a topic key into a display name."""
+    return value.replace('_', ' ').title()
+
+
+@functools.lru_cache(maxsize=512)
+def _domain_name(value):
+    """Jinja filter: extract the host of a source URL (memoized, sources recur across topics)."""
+    try:
+        rest = value.split('://', 1)[1]
+    except (AttributeError, IndexError):
+        return value
+    # Host ends at the first path, query or fragment delimiter
+    end = len(rest)
+    for delimiter in '/?#':
+        pos = rest.find(delimiter, 0, end)
+        if pos != -1:
+            end = pos
+    return rest[:end]
+
+
+@dataclass(slots=True)
+class SourceMeta:
+    """Resolved metadata of one report source."""
+    url: str
+    title: Optional[str]
+    summary: Optional[str]
+    key_points: Optional[list[str]]
+
+
+@dataclass(slots=True)
+class TopicMeta:
+    """Resolved sources of one topic, stored as parallel lists for the template."""
+    urls: list[str] = field(default_factory=list)
+    titles: list[Optional[str]] = field(default_factory=list)
+    summaries: list[Optional[str]] = field(default_factory=list)
+    key_points: list[Optional[list[str]]] = field(default_factory=list)
+    # Sources beyond the report limit, counted but never resolved
+    more_sources: int = 0
+
+    @classmethod
+    def from_sources(cls, sources: list[SourceMeta], more_sources: int = 0) -> "TopicMeta":
+        return cls(
+            urls=[s.url for s in sources],
+            titles=[s.title for s in sources],
+            summaries=[s.summary for s in sources],
+            key_points=[s.key_points for s in sources],
+            more_sources=more_sources,
+        )
+
+    def rows(self, limit: int):
+        """Iterate (url, title, summary, key_points) for the first `limit` sources."""
+        return zip(self.urls[:limit], self.titles[:limit], self.summaries[:limit], self.key_points[:limit])
+
 
 class GermanRatingFormatter:
     """
@@ -35,6 +238,10 @@ class GermanRatingFormatter:
     Uses sequential thinking to provide rating agency perspective.
     """
     
+    # Jinja2 environment and compiled report template, shared by all instances
+    _env: Optional[Environment] = None
+    _template = None
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
@@ -42,6 +249,14 @@ class GermanRatingFormatter:
         lang_config = LanguageConfig("de")  # German for rating reports
         self.prompt_lib = PromptLibrary(lang_config)
         
+        # In-process caches so URLs/summaries recurring across topics and reports
+        # don't hit SQLite or GPT again (keyed by normalized URL / summary hash)
+        self._source_meta_cache: dict[str, dict] = {}
+        self._fulltext_cache: dict[str, str] = {}
+        self._keypoints_cache: dict[bytes, list[str]] = {}
+        # The persistent key_points_cache table is created and pruned once per formatter
+        self._key_points_table_ready = False
+        
         # Initialize OpenAI client for sequential thinking if available
         if OpenAI:
             try:
@@ -54,21 +269,27 @@ class GermanRatingFormatter:
             self.client = None
             self.logger.warning("OpenAI not available - sequential thinking disabled")
     
-    def format_to_german_markdown(self, digest_json_path: str, output_dir: str = "rating_reports") -> str:
+    def format_to_german_markdown(self, digest_json_path: str, output_dir: str = "rating_reports",
+                                  cache: bool = True) -> str:
         """
         Convert daily digest JSON to German rating agency markdown report.
         
         Args:
             digest_json_path: Path to daily digest JSON file
             output_dir: Output directory for markdown files
+            cache: Reuse source metadata and key points resolved by earlier reports.
+                   Pass False to re-read everything from the DB (key points persisted
+                   in the key_points_cache table are still reused).
             
         Returns:
             Path to generated markdown file
         """
+        if not cache:
+            self.clear_cache()
+        
         try:
             # Load digest data
-            with open(digest_json_path, 'r', encoding='utf-8') as f:
-                digest_data = json.load(f)
+            digest_data = load_json_file(digest_json_path)
             
             # Check if there are any meaningful articles to process
             topic_digests = digest_data.get('topic_digests', {})
@@ -95,15 +316,22 @@ class GermanRatingFormatter:
             output_filename = f"bonitaets_tagesanalyse_{report_date}_{report_number}.md"
             output_path = os.path.join(output_dir, output_filename)
             
-            # Generate analysis using sequential thinking (if available)
-            if self.client:
-                analysis = self._generate_rating_analysis(digest_data)
-            else:
-                # Fallback analysis without AI
-                analysis = self._generate_basic_analysis(digest_data)
+            # Resolve sources over one shared connection
+            with closing(self._connect_db()) as conn:
+                if self.client:
+                    # Stream the AI analysis on a worker thread while this thread resolves
+                    # the source metadata (DB lookups + key points) - they share no data
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        analysis_future = executor.submit(self._generate_rating_analysis, digest_data)
+                        sources_meta = self._build_sources_meta(digest_data, conn)
+                        analysis = analysis_future.result()
+                else:
+                    # Fallback analysis without AI
+                    analysis = self._generate_basic_analysis(digest_data)
+                    sources_meta = self._build_sources_meta(digest_data, conn)
             
             # Write markdown report
-            self._write_german_markdown_report(output_path, digest_data, analysis)
+            self._write_german_markdown_report(output_path, digest_data, analysis, sources_meta=sources_meta)
             
             self.logger.info(f"Generated German rating report: {output_path}")
             return output_path
@@ -144,80 +372,304 @@ class GermanRatingFormatter:
         
         return max(numbers) + 1 if numbers else 1
     
+    def clear_cache(self) -> None:
+        """Clear cached source metadata, full texts and key points."""
+        self._source_meta_cache.clear()
+        self._fulltext_cache.clear()
+        self._keypoints_cache.clear()
+    
     # --- NEW: helpers -------------------------------------------------------
-    def _resolve_source_metadata(self, source_urls: list[str]) -> list[dict]:
+    def _connect_db(self) -> sqlite3.Connection:
+        """
+        Open a connection to the pipeline DB tuned for the many small lookups of a report.
+        """
+        conn = sqlite3.connect(os.getenv("DB_PATH", "news.db"))
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        if not self._key_points_table_ready:
+            self._prepare_key_points_table(conn)
+        return conn
+
+    def _prepare_key_points_table(self, conn: sqlite3.Connection) -> None:
+        """
+        Create the persistent key point cache if needed and drop expired entries.
+        
+        Entries live for KEYPOINTS_CACHE_TTL_DAYS days (default 30).
+        """
+        ttl_seconds = int(os.getenv("KEYPOINTS_CACHE_TTL_DAYS", "30")) * 86400
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS key_points_cache (
+                    hash BLOB PRIMARY KEY,
+                    points TEXT NOT NULL,
+                    created_at INTEGER NOT NULL
+                )
+            """)
+            conn.execute("DELETE FROM key_points_cache WHERE created_at < ?",
+                         (int(time.time()) - ttl_seconds,))
+            conn.commit()
+            self._key_points_table_ready = True
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not prepare key point cache table: {e}")
+
+    def _load_stored_key_points(self, keys: list[bytes], conn: sqlite3.Connection) -> dict[bytes, list[str]]:
+        """
+        Read key points persisted by earlier runs.
+        
+        Args:
+            keys: Summary cache keys to look up
+            conn: Open DB connection
+            
+        Returns:
+            Mapping of summary cache key to its stored key points
         """
-        Map each URL to {'url': str, 'title': str, 'summary': str, 'key_points': list} 
+        try:
+            placeholders = ",".join("?" * len(keys))
+            rows = conn.execute(
+                f"SELECT hash, points FROM key_points_cache WHERE hash IN ({placeholders})",
+                keys,
+            ).fetchall()
+        except sqlite3.Error as e:
+            self.logger.debug(f"Key point cache unavailable: {e}")
+            return {}
+        return {bytes(key): loads_json(points) for key, points in rows}
+
+    def _store_key_points(self, entries: dict[bytes, list[str]], conn: sqlite3.Connection) -> None:
+        """
+        Persist generated key points so later runs skip the GPT call.
+        
+        Args:
+            entries: Mapping of summary cache key to key points
+            conn: Open DB connection
+        """
+        now = int(time.time())
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO key_points_cache(hash, points, created_at) VALUES (?, ?, ?)",
+                [(key, dumps_json(points), now) for key, points in entries.items()],
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not store key points: {e}")
+
+    def _resolve_source_metadata(self, source_urls: list[str],
+                                 conn: Optional[sqlite3.Connection] = None) -> list[SourceMeta]:
+        """
+        Map each URL to a SourceMeta (url, title, summary, key_points)
         using the SQLite DB (items and summaries tables).
         Generates key points from summary using GPT if available.
         ONLY includes articles that have summaries - ensures complete, professional reports.
+        
+        Args:
+            source_urls: Source URLs of a topic
+            conn: Open DB connection to reuse; a temporary one is opened if omitted
         """
-        results: list[dict] = []
         if not source_urls:
-            return results
+            return []
 
-        db_path = os.getenv("DB_PATH", "news.db")
-        try:
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
-            cur = conn.cursor()
-            for url in source_urls:
-                # Try to resolve by exact url or normalized_url; prefer newest hit
-                cur.execute(
-                    """
-                    SELECT i.id, i.title, i.url
-                    FROM items i
-                    WHERE i.url = ? OR i.normalized_url = ?
-                    ORDER BY i.id DESC
-                    LIMIT 1
-                    """,
-                    (url, url),
-                )
-                row = cur.fetchone()
-                if row:
-                    title = row["title"].strip() if row["title"] else None
-                    item_id = row["id"]
-                    
-                    # Get the summary for this item
-                    cur.execute(
-                        """
-                        SELECT summary
-                        FROM summaries
-                        WHERE item_id = ?
-                        ORDER BY created_at DESC
-                        LIMIT 1
-                        """,
-                        (item_id,),
-                    )
-                    summary_row = cur.fetchone()
-                    summary = summary_row["summary"] if summary_row and summary_row["summary"] else None
-                    
-                    # ONLY include articles with summaries to ensure complete reports
-                    if summary:
-                        # Generate key points from summary
-                        key_points = self._generate_article_key_points(summary)
-                        
-                        if key_points:
-                            self.logger.info(f"Generated {len(key_points)} key points for article: {title[:50] if title else url[:50]}")
-                            results.append({"url": url, "title": title, "summary": summary, "key_points": key_points})
-                        else:
-                            # Skip articles where key point generation failed
-                            self.logger.debug(f"Skipping article - key point generation failed: {title[:50] if title else url[:50]}")
-                    else:
-                        # Skip articles without summaries (debug level - this is expected during partial resets)
-                        self.logger.debug(f"Skipping article without summary: {title[:50] if title else url[:50]}")
-                # Note: We don't append articles without database entries - they won't be in the report
-        except Exception as e:
-            self.logger.warning(f"Could not resolve titles/summaries from DB: {e}")
-            # Return empty list on error to avoid incomplete reports
-            results = []
-        finally:
+        # Only URLs not resolved by an earlier call need a DB round-trip
+        pending = [u for u in dict.fromkeys(source_urls) if normalize_url(u) not in self._source_meta_cache]
+        if pending:
             try:
-                conn.close()
-            except Exception:
-                pass
+                if conn is not None:
+                    self._query_source_metadata(pending, conn)
+                else:
+                    with closing(self._connect_db()) as own_conn:
+                        self._query_source_metadata(pending, own_conn)
+            except Exception as e:
+                self.logger.warning(f"Could not resolve titles/summaries from DB: {e}")
+                # Return empty list on error to avoid incomplete reports
+                return []
+
+        return self._cached_source_metadata(source_urls)
+
+    def _cached_source_metadata(self, source_urls: list[str]) -> list[SourceMeta]:
+        """
+        Map URLs to SourceMeta from the in-process cache only, in input order.
+        URLs that were not resolved (no DB entry, no summary, failed key points)
+        are skipped - they won't be in the report.
+        """
+        results: list[SourceMeta] = []
+        for url in source_urls:
+            meta = self._source_meta_cache.get(normalize_url(url))
+            if meta:
+                results.append(SourceMeta(url=url, **meta))
+        return results
+
+    def _query_source_metadata(self, source_urls: list[str], conn: sqlite3.Connection) -> None:
+        """
+        Resolve uncached URLs against the DB and store complete entries
+        (title, summary and key points) in the source metadata cache.
+        """
+        cur = conn.cursor()
+
+        # Resolve all URLs in one query by exact url or normalized_url
+        placeholders = ",".join("?" * len(source_urls))
+        cur.execute(
+            f"""
+            SELECT i.id, i.title, i.url, i.normalized_url
+            FROM items i
+            WHERE i.url IN ({placeholders}) OR i.normalized_url IN ({placeholders})
+            ORDER BY i.id DESC
+            """,
+            (*source_urls, *source_urls),
+        )
+        # Rows are ordered newest first, so setdefault keeps the newest hit per URL
+        items_by_url: dict[str, tuple[int, Optional[str]]] = {}
+        for item_id, title, url, normalized_url in cur.fetchall():
+            items_by_url.setdefault(url, (item_id, title))
+            items_by_url.setdefault(normalized_url, (item_id, title))
+
+        # Fetch the latest summary of every resolved item in one query
+        summaries_by_item: dict[int, str] = {}
+        item_ids = list({item_id for item_id, _ in items_by_url.values()})
+        if item_ids:
+            id_placeholders = ",".join("?" * len(item_ids))
+            cur.execute(
+                f"""
+                SELECT item_id, summary
+                FROM (
+                    SELECT item_id, summary,
+                           ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY created_at DESC) AS rn
+                    FROM summaries
+                    WHERE item_id IN ({id_placeholders})
+                )
+                WHERE rn = 1
+                """,
+                item_ids,
+            )
+            summaries_by_item = dict(cur.fetchall())
+
+        # Separate fast DB resolution from slow GPT calls
+        candidates: list[tuple[str, Optional[str], str]] = []
+        for url in source_urls:
+            item = items_by_url.get(url)
+            if not item:
+                continue
+            item_id, title = item
+            title = title.strip() if title else None
+            summary = summaries_by_item.get(item_id) or None
+            
+            # ONLY include articles with summaries to ensure complete reports
+            if summary:
+                candidates.append((url, title, summary))
+            else:
+                # Skip articles without summaries (debug level - this is expected during partial resets)
+                self.logger.debug(f"Skipping article without summary: {title[:50] if title else url[:50]}")
+        
+        if not candidates:
+            return
+        
+        unique_summaries = list(dict.fromkeys(summary for _, _, summary in candidates))
+        key_points_by_summary = dict(zip(unique_summaries, self._generate_all_key_points(unique_summaries, conn)))
+        
+        for url, title, summary in candidates:
+            key_points = key_points_by_summary.get(summary)
+            if key_points:
+                self.logger.info(f"Generated {len(key_points)} key points for article: {title[:50] if title else url[:50]}")
+                self._source_meta_cache[normalize_url(url)] = {"title": title, "summary": summary, "key_points": key_points}
+            else:
+                # Skip articles where key point generation failed (not cached, retried next report)
+                self.logger.debug(f"Skipping article - key point generation failed: {title[:50] if title else url[:50]}")
+    
+    def _generate_all_key_points(self, summaries: list[str],
+                                 conn: Optional[sqlite3.Connection] = None) -> list[Optional[list[str]]]:
+        """
+        Generate key points for many summaries, aligned with the input list.
+        
+        Cached summaries are served from memory, then from the key_points_cache table
+        (when a connection is given). The rest are requested in a single batched GPT
+        call, and summaries the batch could not cover fall back to concurrent
+        per-article calls. Newly generated key points are persisted for later runs.
+        
+        Args:
+            summaries: Article summary texts
+            conn: Open DB connection for the persistent key point cache (optional)
+            
+        Returns:
+            Key points per summary (None where generation failed)
+        """
+        keys = [_summary_cache_key(s) for s in summaries]
+        results = [self._keypoints_cache.get(key) for key in keys]
+        
+        missing = [i for i, points in enumerate(results) if not points]
+        if missing and conn is not None:
+            stored = self._load_stored_key_points([keys[i] for i in missing], conn)
+            for i in missing:
+                points = stored.get(keys[i])
+                if points:
+                    results[i] = points
+                    self._keypoints_cache[keys[i]] = points
+            missing = [i for i in missing if not results[i]]
+        
+        if not missing or not self.client:
+            return results
+        generated = list(missing)
+        
+        if len(missing) > 1:
+            batch = self._request_key_points_batch([summaries[i] for i in missing])
+            for pos, i in enumerate(missing):
+                points = batch.get(pos)
+                if points:
+                    results[i] = points
+                    self._keypoints_cache[keys[i]] = points
+            missing = [i for i in missing if not results[i]]
+        
+        if missing:
+            # Per-article calls are blocking network round-trips - run them concurrently
+            max_workers = max(1, min(int(os.getenv("KEYPOINTS_CONCURRENCY", "8")), len(missing)))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for i, points in zip(missing, executor.map(self._generate_article_key_points,
+                                                           [summaries[i] for i in missing])):
+                    results[i] = points
+        
+        # Persist on this thread - the connection is not shared with the workers
+        new_entries = {keys[i]: results[i] for i in generated if results[i]}
+        if new_entries and conn is not None:
+            self._store_key_points(new_entries, conn)
+        
         return results
     
+    def _request_key_points_batch(self, summaries: list[str]) -> dict[int, list[str]]:
+        """
+        Request key points for several summaries in one GPT call.
+        
+        Args:
+            summaries: Article summary texts
+            
+        Returns:
+            Mapping of summary index to its key points (empty on failure)
+        """
+        try:
+            numbered = "\n\n".join(f"id {i}:\n{summary}" for i, summary in enumerate(summaries))
+            response = self.client.chat.completions.create(
+                model=os.getenv("MODEL_FULL", "gpt-5"),
+                messages=[
+                    {"role": "system", "content": _KEY_POINTS_REQUIREMENTS + _KEY_POINTS_BATCH_FORMAT},
+                    {"role": "user", "content": f"Article summaries:\n\n{numbered}"}
+                ],
+                response_format={"type": "json_object"}
+            )
+            
+            content = response.choices[0].message.content or ""
+            items = loads_json(content).get("items", [])
+            
+            batch: dict[int, list[str]] = {}
+            for item in items:
+                idx = item.get("id")
+                points = [p.strip() for p in item.get("points") or [] if isinstance(p, str) and p.strip()]
+                if isinstance(idx, int) and 0 <= idx < len(summaries) and points:
+                    batch[idx] = points
+            
+            self.logger.info(f"Generated key points for {len(batch)}/{len(summaries)} articles in one batched call")
+            return batch
+            
+        except Exception as e:
+            self.logger.warning(f"Batched key point generation failed, falling back to per-article calls: {e}")
+            return {}
+    
     def _generate_article_key_points(self, summary: str) -> Optional[list[str]]:
         """
         Generate exactly 3 concise key bullet points from an article summary using GPT-5.
@@ -231,28 +683,24 @@ class GermanRatingFormatter:
         if not self.client or not summary:
             return None
         
+        # Identical summaries (same article under several topics) share GPT output
+        cache_key = _summary_cache_key(summary)
+        cached = self._keypoints_cache.get(cache_key)
+        if cached:
+            return cached
+        
         try:
-            instructions = """Extrahiere genau 3 prägnante, leicht lesbare Stichpunkte aus der Artikelzusammenfassung.
-
-Anforderungen:
-- Jeder Punkt muss klar, direkt und verständlich sein.
-- Verwende einfache, konkrete Sprache – wo möglich ohne Fachjargon.
-- Halte jeden Punkt bei 1–2 kurzen Sätzen.
-- Konzentriere dich auf die wichtigsten Fakten oder Implikationen.
-- Mach die Punkte gut scannbar und angenehm lesbar.
-
-Gib ausschließlich die 3 Stichpunkte zurück, je einer pro Zeile, beginnend mit einem Bindestrich (-).
-"""
-
-            response = self.client.responses.create(
+            stream = self.client.responses.create(
                 model=os.getenv("MODEL_FULL", "gpt-5"),
-                instructions=instructions,
+                instructions=_KEY_POINTS_REQUIREMENTS + _KEY_POINTS_LINE_FORMAT,
                 input=[{"role": "user", "content": f"Article summary:\n{summary}"}],
                 max_output_tokens=1000,
-                reasoning={"effort": "low"}
+                reasoning={"effort": "low"},
+                stream=True
             )
             
-            content = (response.output_text or "").strip()
+            # Stop reading once the 3 bullets are complete
+            content = _read_key_point_stream(stream).strip()
             if not content:
                 self.logger.warning("GPT returned empty output_text for key points")
                 return None
@@ -260,43 +708,36 @@ Gib ausschließlich die 3 Stichpunkte zurück, je einer pro Zeile, beginnend mit
             self.logger.debug(f"GPT response for key points: {content[:200]}")
             
             # Parse bullet points from response
-            lines = content.split('\n')
-            key_points = []
-            for line in lines:
-                line = line.strip()
-                # Skip empty lines
-                if not line:
-                    continue
-                # Remove bullet markers if present
-                if line.startswith('- ') or line.startswith('* '):
-                    line = line[2:]
-                elif line.startswith('• '):
-                    line = line[2:]
-                # Remove numbering if present
-                import re
-                line = re.sub(r'^\d+\.\s*', '', line)
-                
-                if line:
-                    key_points.append(line)
+            key_points = _parse_bullet_lines(content)
             
             if not key_points:
                 self.logger.warning(f"Could not parse any key points from GPT response: {content[:100]}")
+                return None
             
-            return key_points if key_points else None
+            self._keypoints_cache[cache_key] = key_points
+            return key_points
             
         except Exception as e:
             self.logger.warning(f"Failed to generate key points: {e}")
             return None
 
-    def _fetch_fulltext_by_url(self, url: str) -> Optional[str]:
+    def _fetch_fulltext_by_url(self, url: str, conn: Optional[sqlite3.Connection] = None) -> Optional[str]:
         """
         Find the full extracted_text for an article URL via items -> articles.
         Returns None if not found or on error.
+        
+        Args:
+            url: Article URL
+            conn: Open DB connection to reuse; a temporary one is opened if omitted
         """
-        db_path = os.getenv("DB_PATH", "news.db")
+        cache_key = normalize_url(url)
+        if cache_key in self._fulltext_cache:
+            return self._fulltext_cache[cache_key]
+        
+        own_conn = conn is None
         try:
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
+            if own_conn:
+                conn = self._connect_db()
             cur = conn.cursor()
             # Find the item id by url/normalized_url
             cur.execute(
@@ -311,28 +752,28 @@ Gib ausschließlich die 3 Stichpunkte zurück, je einer pro Zeile, beginnend mit
             row = cur.fetchone()
             if not row:
                 return None
-            item_id = row["id"]
-            # Fetch the most recent extracted_text for that item
+            item_id = row[0]
+            # Fetch the extracted_text for that item (articles is keyed by item_id)
             cur.execute(
                 """
                 SELECT extracted_text
                 FROM articles
                 WHERE item_id = ?
-                ORDER BY id DESC
                 LIMIT 1
                 """,
                 (item_id,),
             )
             arow = cur.fetchone()
-            return arow["extracted_text"] if arow and arow["extracted_text"] else None
+            if not arow or not arow[0]:
+                return None
+            self._fulltext_cache[cache_key] = arow[0]
+            return arow[0]
         except Exception as e:
             self.logger.warning(f"Could not fetch full text for URL: {e}")
             return None
         finally:
-            try:
+            if own_conn and conn is not None:
                 conn.close()
-            except Exception:
-                pass
     
     def _generate_rating_analysis(self, digest_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -352,25 +793,26 @@ Gib ausschließlich die 3 Stichpunkte zurück, je einer pro Zeile, beginnend mit
             # Use fragment from PromptLibrary
             system_prompt = self.prompt_lib.get_fragment('formatting', 'rating_agency_analyst_role')
 
-            # Prepare digest data for analysis
-            analysis_input = {
-                "date": digest_data.get('date'),
-                "executive_summary": digest_data.get('executive_summary', {}),
-                "trending_topics": digest_data.get('trending_topics', []),
-                "topic_digests": digest_data.get('topic_digests', {})
-            }
+            # Prepare a compact view of the digest for analysis
+            analysis_input = _compact_for_llm(digest_data)
             
-            response = self.client.chat.completions.create(
+            stream = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps(analysis_input, ensure_ascii=False)}
+                    {"role": "user", "content": dumps_json(analysis_input)}
                 ],
                 response_format={"type": "json_object"},
-                max_completion_tokens=2000
+                max_completion_tokens=2000,
+                stream=True
             )
             
-            analysis_text = response.choices[0].message.content
+            # Assemble the streamed completion
+            parts = []
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+            analysis_text = "".join(parts)
             
             # Parse the analysis (simplified - in practice you'd want structured JSON)
             return {
@@ -418,64 +860,134 @@ Gib ausschließlich die 3 Stichpunkte zurück, je einer pro Zeile, beginnend mit
             "method": "basic_fallback"
         }
     
-    def _write_german_markdown_report(self, output_path: str, digest_data: Dict[str, Any],
-                                      analysis: Dict[str, Any]):
+    @staticmethod
+    def create_template_environment(loader=None) -> Environment:
         """
-        Write the German markdown report to file using a Jinja2 template.
+        Create the Jinja2 environment for report templates with the custom filters registered.
         
         Args:
-            output_path: Output file path
-            digest_data: Original digest data
-            analysis: Generated analysis
+            loader: Template loader (defaults to the templates directory)
         """
-        # Set up Jinja2 environment - use proper path resolution
-        templates_dir = str(template_path())
-        env = Environment(loader=FileSystemLoader(templates_dir))
-
-        # Define custom filters
-        def datetime_format(value, format='%Y-%m-%d %H:%M:%S'):
-            try:
-                return datetime.fromisoformat(value).strftime(format)
-            except (ValueError, TypeError):
-                return value
-
-        def topic_name(value):
-            return value.replace('_', ' ').title()
-
-        def domain_name(value):
-            try:
-                return urlparse(value).netloc
-            except:
-                return value
-
+        env = Environment(
+            loader=loader or FileSystemLoader(TEMPLATES_DIR),
+            auto_reload=False,
+            cache_size=-1
+        )
+        
         # Register custom filters
-        env.filters['datetime_format'] = datetime_format
-        env.filters['topic_name'] = topic_name
-        env.filters['domain_name'] = domain_name
+        env.filters['datetime_format'] = _datetime_format
+        env.filters['topic_name'] = _topic_name
+        env.filters['domain_name'] = _domain_name
+        return env
 
-        template = env.get_template('daily_digest.md.j2')
+    @staticmethod
+    def _template_loader():
+        """
+        Loader for the report template, preferring the precompiled module when it is current.
+        
+        A compiled module older than its source template is ignored, so template edits take
+        effect without recompiling.
+        """
+        source_loader = FileSystemLoader(TEMPLATES_DIR)
+        compiled = COMPILED_TEMPLATES_DIR / ModuleLoader.get_module_filename(REPORT_TEMPLATE)
+        try:
+            if compiled.stat().st_mtime >= Path(TEMPLATES_DIR, REPORT_TEMPLATE).stat().st_mtime:
+                return ChoiceLoader([ModuleLoader(str(COMPILED_TEMPLATES_DIR)), source_loader])
+        except OSError:
+            pass
+        return source_loader
 
-        # Resolve source metadata
+    @classmethod
+    def _get_template(cls):
+        """
+        Get the compiled report template, building the Jinja2 environment on first use.
+        
+        The environment (with custom filters) and the compiled template are cached on
+        the class so repeated report generation skips template parsing/compilation.
+        """
+        if cls._template is None:
+            env = cls.create_template_environment(cls._template_loader())
+            cls._env = env
+            cls._template = env.get_template(REPORT_TEMPLATE)
+        return cls._template
+    
+    def _build_sources_meta(self, digest_data: Dict[str, Any],
+                            conn: Optional[sqlite3.Connection] = None,
+                            max_sources: Optional[int] = None) -> Dict[str, TopicMeta]:
+        """
+        Resolve the sources of every topic digest.
+        
+        Only the first `max_sources` sources of a topic are resolved - the rest never
+        appear in the report, so they skip the DB lookup and key point generation.
+        
+        Args:
+            digest_data: Daily digest JSON data
+            conn: Open DB connection for source lookups (optional)
+            max_sources: Sources per topic to resolve (defaults to GERMAN_REPORT_MAX_SOURCES)
+            
+        Returns:
+            Mapping of topic name to its resolved sources
+        """
+        if max_sources is None:
+            max_sources = _report_max_sources()
+        deduped_by_topic: Dict[str, list[str]] = {}
         for topic_name, topic_data in digest_data.get('topic_digests', {}).items():
             sources = topic_data.get('sources') or []
             if sources:
-                seen = set()
-                deduped = [u for u in sources if not (u in seen or seen.add(u))]
-                meta = self._resolve_source_metadata(deduped)
-                topic_data['sources_meta'] = meta
+                # Dedup on the normalized URL (tracking params, fragment, case) but keep
+                # the first-seen original URL for lookup and display
+                first_seen: dict[str, str] = {}
+                for u in sources:
+                    first_seen.setdefault(normalize_url(u), u)
+                deduped_by_topic[topic_name] = list(first_seen.values())
+
+        # Resolve every topic's sources in one pass (one DB round-trip, one key point batch).
+        # The per-topic lists are then read from the cache only: URLs the pass could not
+        # resolve (no summary, failed key points) are not cached, and resolving per topic
+        # would retry the DB queries and GPT calls for them once per topic.
+        all_urls = [u for urls in deduped_by_topic.values() for u in urls[:max_sources]]
+        self._resolve_source_metadata(all_urls, conn)
+
+        return {
+            topic_name: TopicMeta.from_sources(
+                self._cached_source_metadata(urls[:max_sources]),
+                more_sources=max(len(urls) - max_sources, 0)
+            )
+            for topic_name, urls in deduped_by_topic.items()
+        }
+    
+    def _write_german_markdown_report(self, output_path: str, digest_data: Dict[str, Any],
+                                      analysis: Dict[str, Any],
+                                      conn: Optional[sqlite3.Connection] = None,
+                                      sources_meta: Optional[Dict[str, TopicMeta]] = None):
+        """
+        Write the German markdown report to file using a Jinja2 template.
+        
+        Args:
+            output_path: Output file path
+            digest_data: Original digest data
+            analysis: Generated analysis
+            conn: Open DB connection for source lookups (optional)
+            sources_meta: Already resolved sources per topic; resolved here if omitted
+        """
+        template = self._get_template()
+
+        # Resolve source metadata into a separate structure - the caller's digest stays untouched
+        if sources_meta is None:
+            sources_meta = self._build_sources_meta(digest_data, conn)
 
         # Combine data for the template
         context = {
             'data': digest_data,
             'analysis': analysis,
-            'max_sources': int(os.getenv("GERMAN_REPORT_MAX_SOURCES", "20"))
+            'sources_meta': sources_meta,
+            'max_sources': _report_max_sources()
         }
         
         # Render the template
         output = template.render(context)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(output)
+        _write_atomic(output_path, output.encode('utf-8'))
 
 
 def format_daily_digest_to_german_markdown(digest_json_path: str, output_dir: str = "rating_reports") -> str:
@@ -8,17 +8,203 @@ This module implements multiple approaches to decode Google News RSS redirect UR
 4. Proper rate limiting and error handling
 """
 
+import os
 import re
 import base64
+import functools
 import json
 import time
+import sqlite3
 import asyncio
 import logging
-from typing import Optional, Dict, Any
-from urllib.parse import urlparse, parse_qs, quote, unquote
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+from urllib.parse import parse_qs, quote, unquote
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+
+# Patterns compiled once at import - the decoder runs them for every redirect URL
+# URLs embedded in decoded legacy (base64) article IDs - matched on the raw bytes, so
+# only ASCII whitespace and controls end a URL (0x80-0xff are UTF-8 multibyte sequences)
+_URL_RE_BYTES = re.compile(rb'https?://[^\x00-\x20\x7f]+')
+# window.location / location.href / document.location redirects in scripts
+_LOC_PATTERNS = [
+    re.compile(r'window\.location\s*=\s*["\']([^"\']+)["\']'),
+    re.compile(r'location\.href\s*=\s*["\']([^"\']+)["\']'),
+    re.compile(r'document\.location\s*=\s*["\']([^"\']+)["\']'),
+]
+# Base64 characters decoded to probe an article ID for the new format marker (18 bytes)
+_MARKER_PROBE_CHARS = 24
+# Quoted non-Google URLs in script data structures
+_SCRIPT_URL_RE = re.compile(r'"(https?://(?!news\.google\.com|google\.com|googleapis\.com)[^"]+)"')
+# Bare non-Google URLs anywhere in the page
+_HTML_URL_RE = re.compile(r'https?://(?!news\.google\.com|google\.com|googleapis\.com)[a-zA-Z0-9\-\.]+\.[a-zA-Z]{2,}[^\s"<>]*')
+# Quoted URLs in batchexecute API responses
+_API_URL_RE = re.compile(r'"(https?://(?!news\.google\.com)[^"]+)"')
+# First URL in a browser agent's answer
+_RESULT_URL_RE = re.compile(r'https?://[^\s]+')
+
+# Pull parsers reused per thread (see _pull_parser)
+_parser_tls = threading.local()
+
+# Structural selectors for the redirect page, compiled once like the regexes above
+_SCRIPT_TEXT_XPATH = etree.XPath("//script/text()")
+_ANCHOR_HREF_XPATH = etree.XPath("//a/@href")
+
+# Instructions for the headless browser fallback
+_BROWSER_PROMPT_TMPL = """Navigate to this Google News URL and wait for it to redirect to the final article page: {url}
+
+Instructions:
+1. Open the URL and wait for any redirects to complete
+2. If there's a consent dialog or cookie banner, accept it
+3. Wait until you reach the final article page (not on news.google.com)
+4. Return ONLY the final URL of the article page
+5. Close the browser when done
+
+Return just the final URL, nothing else."""
+
+# Google domains and Google APIs - never the article itself
+_SKIP_DOMAINS = (
+    'google.com', 'googleapis.com', 'googleusercontent.com',
+    'googlenews.com', 'googleapi.com', 'gstatic.com'
+)
+# Common non-article URLs
+_SKIP_PATTERNS = (
+    '/tags/', '/authors/', '/search/', '/feed/',
+    'facebook.com', 'twitter.com', 'instagram.com',
+    'youtube.com', 'linkedin.com', 'pinterest.com',
+    '.css', '.js', '.png', '.jpg', '.gif', '.pdf',
+    'kidsmanagement', 'management-pa', 'boq-identity'  # Block problematic Google identity endpoints
+)
+# One case-insensitive alternation each, so a candidate is checked in a single scan
+_SKIP_DOMAIN_RE = re.compile('|'.join(map(re.escape, _SKIP_DOMAINS)), re.IGNORECASE)
+_SKIP_PATH_RE = re.compile('|'.join(map(re.escape, _SKIP_PATTERNS)), re.IGNORECASE)
+
+# Serves the redirect pages and the batchexecute API, which share one rate limit
+GOOGLE_NEWS_HOST = "news.google.com"
+
+
+def _decode_body(content: bytes, encoding: Optional[str]) -> str:
+    """
+    Decode a response body once.
+    
+    Callers pass response.encoding, so the charset rules of requests still apply (e.g.
+    ISO-8859-1 for text/* responses without a charset). Unlike response.text this never
+    falls back to charset detection - UTF-8 is used only when the encoding is None or
+    an unknown charset name.
+    """
+    try:
+        return content.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        # Unknown charset name in the Content-Type header
+        return content.decode('utf-8', errors='replace')
+
+
+def _build_freq(params: Dict[str, Any]) -> str:
+    """
+    Build the batchexecute f.req value for the HKKQWd RPC.
+    
+    The RPC arguments are a JSON array serialized into a string inside the outer JSON
+    envelope - json.dumps handles the nested quoting and escapes quotes in the params.
+    """
+    args = json.dumps(
+        [params['param1'], params.get('param2', ''), None, params.get('param3', '')],
+        separators=(',', ':')
+    )
+    return json.dumps([[["HKKQWd", args, None, "generic"]]], separators=(',', ':'))
+
+
+def _pull_parser(encoding: Optional[str]) -> etree.HTMLPullParser:
+    """
+    Incremental HTML parser that reports <meta> tags as soon as they are fed.
+    
+    Parsers are reused per thread and encoding - a closed parser accepts the next
+    document, so page parsing skips the parser setup. Release with _finish_parser().
+    """
+    encoding = encoding or 'utf-8'
+    parsers = getattr(_parser_tls, 'parsers', None)
+    if parsers is None:
+        parsers = _parser_tls.parsers = {}
+    parser = parsers.get(encoding)
+    if parser is None:
+        try:
+            parser = etree.HTMLPullParser(events=('start',), tag='meta', encoding=encoding, recover=True)
+        except LookupError:
+            # Unknown charset name in the Content-Type header
+            return _pull_parser('utf-8')
+        parsers[encoding] = parser
+    return parser
+
+
+def _finish_parser(parser: etree.HTMLPullParser):
+    """
+    Close a pull parser so it is ready for the next document.
+    
+    Returns:
+        Root element of the parsed page, or None for an empty document
+    """
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        return None
+    finally:
+        # Drop unread events - they would otherwise surface with the next document
+        for _ in parser.read_events():
+            pass
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_valid_news_url(url: str) -> bool:
+    """
+    Check if a URL looks like a valid news article URL.
+    
+    Memoized - the same candidate typically shows up in script data, anchors and page text.
+    """
+    # Must have proper scheme and domain - plain string checks, no full urlparse
+    scheme = url[:8].lower()
+    if scheme.startswith('https://'):
+        netloc_start = 8
+    elif scheme.startswith('http://'):
+        netloc_start = 7
+    else:
+        return False
+    
+    # Domain ends at the first path, query or fragment delimiter
+    netloc_end = len(url)
+    for delimiter in '/?#':
+        pos = url.find(delimiter, netloc_start, netloc_end)
+        if pos != -1:
+            netloc_end = pos
+    netloc = url[netloc_start:netloc_end]
+    if not netloc:
+        return False
+    
+    # Skip Google domains and Google APIs
+    if _SKIP_DOMAIN_RE.search(netloc):
+        return False
+    
+    # Skip common non-article URLs
+    if _SKIP_PATH_RE.search(url):
+        return False
+    
+    # Must have reasonable length
+    if len(url) < 20 or len(url) > 500:
+        return False
+    
+    # Domain must have at least one dot and valid TLD
+    domain_parts = netloc.lower().split('.')
+    if len(domain_parts) < 2 or len(domain_parts[-1]) < 2:
+        return False
+    
+    return True
+
+
+def _article_id(google_news_url: str) -> str:
+    """Extract the article ID (the part after /articles/, without query) of a Google News URL."""
+    return google_news_url.split("/articles/", 1)[-1].split("?", 1)[0]
 
 
 class GoogleNewsDecoder:
@@ -27,13 +213,45 @@ class GoogleNewsDecoder:
     Implements multiple fallback strategies as documented in research.
     """
     
-    def __init__(self, request_timeout: int = 15):
+    # Kept on the class for existing callers; the validator itself is module-level
+    _is_valid_news_url = staticmethod(_is_valid_news_url)
+    
+    def __init__(self, request_timeout: int = 15, cache_db_path: Optional[str] = None):
         self.request_timeout = request_timeout
         self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
+        # One requests.Session per thread - sessions are not thread-safe (see decode_many)
+        self._local = threading.local()
+        
+        # Rate limiting, tracked per host on the monotonic clock
+        self.min_request_interval = 1.0  # Minimum 1 second between requests to the same host
+        self._next_request_slot: Dict[str, float] = {}
+        self._rate_lock = threading.Lock()
+        
+        # Persistent decode cache (article ID -> original URL) so URLs decoded by an
+        # earlier run skip the HTTP round-trip; disabled without a DB path
+        self.cache_db_path = cache_db_path
+        if cache_db_path:
+            self._init_decode_cache()
+    
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's HTTP session, created on first use (assigning replaces it for that thread only)."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._new_session()
+        return session
+    
+    @session.setter
+    def session(self, session: requests.Session):
+        self._local.session = session
+    
+    @staticmethod
+    def _new_session() -> requests.Session:
+        """HTTP session with browser-like headers."""
+        session = requests.Session()
         
         # Headers to avoid consent blocks and appear more human-like
-        self.session.headers.update({
+        session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
@@ -43,75 +261,134 @@ class GoogleNewsDecoder:
             'Upgrade-Insecure-Requests': '1',
             'Cookie': 'CONSENT=YES+cb; NID=123;',  # Bypass EU consent pages
         })
+        return session
+    
+    def _init_decode_cache(self):
+        """Create the decode cache table and drop entries older than GNEWS_DECODE_CACHE_TTL_DAYS."""
+        ttl_seconds = int(os.getenv("GNEWS_DECODE_CACHE_TTL_DAYS", "30")) * 86400
+        try:
+            with closing(sqlite3.connect(self.cache_db_path)) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS gnews_decoded_urls (
+                        gnews_id TEXT PRIMARY KEY,
+                        final_url TEXT NOT NULL,
+                        ts INTEGER NOT NULL
+                    )
+                """)
+                conn.execute("DELETE FROM gnews_decoded_urls WHERE ts < ?", (int(time.time()) - ttl_seconds,))
+                conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Google News decode cache disabled: {e}")
+            self.cache_db_path = None
+    
+    def _get_cached_url(self, article_id: str) -> Optional[str]:
+        """Look up a previously decoded article URL."""
+        if not self.cache_db_path:
+            return None
+        try:
+            with closing(sqlite3.connect(self.cache_db_path)) as conn:
+                row = conn.execute(
+                    "SELECT final_url FROM gnews_decoded_urls WHERE gnews_id = ?", (article_id,)
+                ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            self.logger.debug("Decode cache lookup failed: %s", e)
+            return None
+    
+    def _cache_decoded_url(self, article_id: str, url: str):
+        """Store a decoded article URL for later runs."""
+        if not self.cache_db_path:
+            return
+        try:
+            with closing(sqlite3.connect(self.cache_db_path)) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO gnews_decoded_urls(gnews_id, final_url, ts) VALUES (?, ?, ?)",
+                    (article_id, url, int(time.time()))
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            self.logger.debug("Decode cache write failed: %s", e)
+    
+    def _reserve_request_slot(self, host: str) -> float:
+        """
+        Reserve the next free request slot for a host.
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 1.0  # Minimum 1 second between requests
+        Returns:
+            Seconds to wait until the reserved slot
+        """
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request_slot.get(host, now))
+            self._next_request_slot[host] = start + self.min_request_interval
+        return start - now
     
-    def _rate_limit(self):
-        """Implement rate limiting to avoid being blocked by Google."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            sleep_time = self.min_request_interval - elapsed
+    def _rate_limit(self, host: str = GOOGLE_NEWS_HOST):
+        """
+        Implement rate limiting to avoid being blocked by Google.
+        
+        Each caller reserves the next free slot for the host under a lock and sleeps
+        outside it, so concurrent decodes stay spaced out without serializing their
+        round-trips, and different hosts don't throttle each other.
+        """
+        sleep_time = self._reserve_request_slot(host)
+        if sleep_time > 0:
             time.sleep(sleep_time)
-        self.last_request_time = time.time()
     
-    def decode_base64_url(self, encoded_url: str) -> Optional[str]:
+    async def _rate_limit_async(self, host: str = GOOGLE_NEWS_HOST):
+        """Async variant of _rate_limit that yields to the event loop while waiting."""
+        sleep_time = self._reserve_request_slot(host)
+        if sleep_time > 0:
+            await asyncio.sleep(sleep_time)
+    
+    def decode_base64_url(self, article_id: str) -> Optional[str]:
         """
         Decode legacy format Google News URLs using Base64 decoding.
         Works for older-style links (pre July 2024).
         
         Args:
-            encoded_url: The CBMi... portion of the Google News URL
+            article_id: The CBMi... portion of the Google News URL (see _article_id)
             
         Returns:
             Decoded original URL or None if failed/new format
         """
         try:
-            # Extract the encoded part after /articles/
-            if "/articles/" not in encoded_url:
+            # Probe the first 18 bytes for the new format marker (it follows the short
+            # header) before decoding the full ~600 character payload
+            head = article_id[:_MARKER_PROBE_CHARS]
+            if b'AU_yqL' in base64.urlsafe_b64decode(head + '=' * (-len(head) % 4)):
+                self.logger.debug("Detected new format URL - base64 decoding not applicable")
                 return None
             
-            encoded_part = encoded_url.split("/articles/")[-1]
-            
-            # Remove any query parameters
-            if "?" in encoded_part:
-                encoded_part = encoded_part.split("?")[0]
-            
-            # Decode base64
-            try:
-                decoded_bytes = base64.b64decode(encoded_part + '==')  # Add padding if needed
-            except Exception:
-                # Try URL-safe base64
-                decoded_bytes = base64.urlsafe_b64decode(encoded_part + '==')
-            
-            decoded_str = decoded_bytes.decode('utf-8', errors='ignore')
+            # Decode base64 with exact padding - the URL-safe decoder accepts the
+            # standard alphabet as well, so one call covers both encodings
+            decoded_bytes = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
             
             # Check for new format marker
-            if decoded_str.startswith('AU_yqL') or 'AU_yqL' in decoded_str:
+            if b'AU_yqL' in decoded_bytes:
                 self.logger.debug("Detected new format URL - base64 decoding not applicable")
                 return None
             
-            # Look for URL patterns in the decoded string
+            # Look for URL patterns in the decoded bytes (only the winner is decoded to str)
             # The format typically has magic bytes, then length, then URL
-            url_pattern = re.compile(r'https?://[^\s\x00-\x1f\x7f-\x9f]+')
-            urls = url_pattern.findall(decoded_str)
+            urls = _URL_RE_BYTES.findall(decoded_bytes)
             
             if urls:
                 # Return the first non-AMP URL, or first URL if no non-AMP found
                 for url in urls:
-                    if 'amp' not in url.lower():
-                        self.logger.debug(f"Base64 decoded URL: {url}")
+                    if b'amp' not in url.lower():
+                        url = url.decode('utf-8', errors='ignore')
+                        self.logger.debug("Base64 decoded URL: %s", url)
                         return url
                 
                 # If only AMP URLs found, return the first one
-                self.logger.debug(f"Base64 decoded URL (AMP): {urls[0]}")
-                return urls[0]
+                url = urls[0].decode('utf-8', errors='ignore')
+                self.logger.debug("Base64 decoded URL (AMP): %s", url)
+                return url
             
             return None
             
         except Exception as e:
-            self.logger.debug(f"Base64 decoding failed: {e}")
+            self.logger.debug("Base64 decoding failed: %s", e)
             return None
     
     def extract_from_html_api(self, google_url: str) -> Optional[str]:
@@ -128,72 +405,89 @@ class GoogleNewsDecoder:
         try:
             self._rate_limit()
             
-            # Fetch the Google News redirect page
-            response = self.session.get(google_url, timeout=self.request_timeout, allow_redirects=True)
-            response.raise_for_status()
-            
-            # Check if we got redirected to the final URL
-            if response.url != google_url and not 'news.google.com' in response.url:
-                if self._is_valid_news_url(response.url):
-                    self.logger.debug(f"Got final URL via redirect: {response.url}")
-                    return response.url
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Method 1: Look for meta refresh redirects
-            meta_refresh = soup.find('meta', attrs={'http-equiv': 'refresh'})
-            if meta_refresh and hasattr(meta_refresh, 'get'):
-                content = meta_refresh.get('content')
-                # Format is usually "0;url=http://example.com"
-                if content and isinstance(content, str) and 'url=' in content:
-                    url = content.split('url=', 1)[1]
-                    if self._is_valid_news_url(url):
-                        self.logger.debug(f"Found URL in meta refresh: {url}")
-                        return url
+            # Fetch the Google News redirect page as a stream
+            response = self.session.get(google_url, timeout=self.request_timeout,
+                                        allow_redirects=True, stream=True)
+            try:
+                response.raise_for_status()
+                
+                # Check if we got redirected to the final URL
+                if response.url != google_url and not 'news.google.com' in response.url:
+                    if _is_valid_news_url(response.url):
+                        self.logger.debug("Got final URL via redirect: %s", response.url)
+                        return response.url
+                
+                # Parse while downloading - a meta refresh in <head> ends the download early
+                parser = _pull_parser(response.encoding)
+                try:
+                    chunks = []
+                    refresh_seen = False
+                    for chunk in response.iter_content(chunk_size=16384):
+                        chunks.append(chunk)
+                        parser.feed(chunk)
+                        for _, meta in parser.read_events():
+                            # Method 1: Look for meta refresh redirects (only the first one counts)
+                            if refresh_seen or (meta.get('http-equiv') or '').lower() != 'refresh':
+                                continue
+                            refresh_seen = True
+                            content = meta.get('content')
+                            # Format is usually "0;url=http://example.com"
+                            if content and 'url=' in content:
+                                url = content.split('url=', 1)[1]
+                                if _is_valid_news_url(url):
+                                    self.logger.debug("Found URL in meta refresh: %s", url)
+                                    return url
+                finally:
+                    # Runs on early exit and errors too - the parser is reused by the next page
+                    tree = _finish_parser(parser)
+            finally:
+                response.close()
+            
+            if tree is None:
+                return None
+            
+            # Decode the body once for the page-text scan
+            body = _decode_body(b''.join(chunks), response.encoding)
+            
+            # The same URL usually shows up in scripts, anchors and page text alike -
+            # validate each one once
+            seen = set()
+            
+            def is_new_valid(url: str) -> bool:
+                if url in seen:
+                    return False
+                seen.add(url)
+                return _is_valid_news_url(url)
             
             # Method 2: Look for javascript redirects
-            scripts = soup.find_all('script')
-            for script in scripts:
-                script_content = script.get_text() if script else None
-                
-                if script_content:
-                    # Look for window.location or location.href patterns
-                    location_patterns = [
-                        r'window\.location\s*=\s*["\']([^"\']+)["\']',
-                        r'location\.href\s*=\s*["\']([^"\']+)["\']',
-                        r'document\.location\s*=\s*["\']([^"\']+)["\']'
-                    ]
-                    
-                    for pattern in location_patterns:
-                        matches = re.findall(pattern, script_content)
-                        for url in matches:
-                            if self._is_valid_news_url(url):
-                                self.logger.debug(f"Found URL in JS redirect: {url}")
-                                return url
-                    
-                    # Look for URL patterns in data structures
-                    url_matches = re.findall(r'"(https?://(?!news\.google\.com|google\.com|googleapis\.com)[^"]+)"', script_content)
-                    for url in url_matches:
-                        if self._is_valid_news_url(url):
-                            self.logger.debug(f"Found URL in script data: {url}")
+            for script_content in _SCRIPT_TEXT_XPATH(tree):
+                # Look for window.location or location.href patterns
+                for pattern in _LOC_PATTERNS:
+                    for match in pattern.finditer(script_content):
+                        url = match.group(1)
+                        if is_new_valid(url):
+                            self.logger.debug("Found URL in JS redirect: %s", url)
                             return url
+                
+                # Look for URL patterns in data structures
+                for match in _SCRIPT_URL_RE.finditer(script_content):
+                    url = match.group(1)
+                    if is_new_valid(url):
+                        self.logger.debug("Found URL in script data: %s", url)
+                        return url
             
             # Method 3: Look for anchor tags with direct links
-            links = soup.find_all('a', href=True)
-            for link in links:
-                if hasattr(link, 'get') and callable(getattr(link, 'get', None)):
-                    href = link.get('href')
-                    if href and isinstance(href, str) and self._is_valid_news_url(href):
-                        self.logger.debug(f"Found URL in anchor tag: {href}")
-                        return href
+            for href in _ANCHOR_HREF_XPATH(tree):
+                if href and is_new_valid(href):
+                    self.logger.debug("Found URL in anchor tag: %s", href)
+                    return href
             
             # Method 4: Direct URL extraction from HTML (more conservative)
-            url_pattern = re.compile(r'https?://(?!news\.google\.com|google\.com|googleapis\.com)[a-zA-Z0-9\-\.]+\.[a-zA-Z]{2,}[^\s"<>]*')
-            urls = url_pattern.findall(response.text)
-            
-            for url in urls:
-                if self._is_valid_news_url(url):
-                    self.logger.debug(f"Found URL in HTML content: {url}")
+            # Scan lazily - the first valid match wins, no need to collect every URL on the page
+            for match in _HTML_URL_RE.finditer(body):
+                url = match.group(0)
+                if is_new_valid(url):
+                    self.logger.debug("Found URL in HTML content: %s", url)
                     return url
             
             return None
@@ -237,7 +531,7 @@ class GoogleNewsDecoder:
             
             # Add the extracted parameters
             if 'param1' in params:
-                payload['f.req'] = f'[[["HKKQWd","[\\"{params["param1"]}\\",\\"{params.get("param2", "")}\\",null,\\"{params.get("param3", "")}\\"]",null,"generic"]]]'
+                payload['f.req'] = _build_freq(params)
             
             self._rate_limit()
             
@@ -250,69 +544,21 @@ class GoogleNewsDecoder:
             
             if response.status_code == 200:
                 # Parse the response - it's typically in a specific Google format
-                response_text = response.text
+                response_text = _decode_body(response.content, response.encoding)
                 
                 # Look for URL in the response
-                url_pattern = re.compile(r'"(https?://(?!news\.google\.com)[^"]+)"')
-                urls = url_pattern.findall(response_text)
-                
-                for url in urls:
-                    if self._is_valid_news_url(url):
-                        self.logger.debug(f"Batchexecute API returned: {url}")
+                for match in _API_URL_RE.finditer(response_text):
+                    url = match.group(1)
+                    if _is_valid_news_url(url):
+                        self.logger.debug("Batchexecute API returned: %s", url)
                         return url
             
             return None
             
         except Exception as e:
-            self.logger.debug(f"Batchexecute API call failed: {e}")
+            self.logger.debug("Batchexecute API call failed: %s", e)
             return None
     
-    def _is_valid_news_url(self, url: str) -> bool:
-        """Check if a URL looks like a valid news article URL."""
-        try:
-            parsed = urlparse(url)
-            
-            # Must have proper scheme and domain
-            if not parsed.scheme in ['http', 'https'] or not parsed.netloc:
-                return False
-            
-            # Skip Google domains and Google APIs
-            skip_domains = [
-                'google.com', 'googleapis.com', 'googleusercontent.com',
-                'googlenews.com', 'googleapi.com', 'gstatic.com'
-            ]
-            
-            for domain in skip_domains:
-                if domain in parsed.netloc.lower():
-                    return False
-            
-            # Skip common non-article URLs
-            skip_patterns = [
-                '/tags/', '/authors/', '/search/', '/feed/',
-                'facebook.com', 'twitter.com', 'instagram.com',
-                'youtube.com', 'linkedin.com', 'pinterest.com',
-                '.css', '.js', '.png', '.jpg', '.gif', '.pdf',
-                'kidsmanagement', 'management-pa', 'boq-identity'  # Block problematic Google identity endpoints
-            ]
-            
-            for pattern in skip_patterns:
-                if pattern in url.lower():
-                    return False
-            
-            # Must have reasonable length
-            if len(url) < 20 or len(url) > 500:
-                return False
-            
-            # Domain must have at least one dot and valid TLD
-            domain_parts = parsed.netloc.lower().split('.')
-            if len(domain_parts) < 2 or len(domain_parts[-1]) < 2:
-                return False
-            
-            return True
-            
-        except Exception:
-            return False
-    
     def decode_url(self, google_news_url: str) -> Optional[str]:
         """
         Main method to decode a Google News redirect URL.
@@ -327,24 +573,55 @@ class GoogleNewsDecoder:
         if not google_news_url or 'news.google.com/rss/articles/' not in google_news_url:
             return google_news_url  # Not a Google News redirect
         
-        self.logger.debug(f"Attempting to decode Google News URL: {google_news_url[:100]}...")
+        self.logger.debug("Attempting to decode Google News URL: %s...", google_news_url[:100])
+        
+        # Serve URLs decoded by an earlier run from the cache
+        article_id = _article_id(google_news_url)
+        cached_url = self._get_cached_url(article_id)
+        if cached_url:
+            self.logger.debug("Decoded URL served from cache: %s", cached_url)
+            return cached_url
         
         # Method 1: Try Base64 decoding first (faster for legacy URLs)
-        decoded_url = self.decode_base64_url(google_news_url)
+        decoded_url = self.decode_base64_url(article_id)
         if decoded_url:
-            self.logger.info(f"Successfully decoded using Base64 method")
+            self.logger.info("Successfully decoded using Base64 method")
+            self._cache_decoded_url(article_id, decoded_url)
             return decoded_url
         
         # Method 2: Try HTML parsing and API method (for new format)
         decoded_url = self.extract_from_html_api(google_news_url)
         if decoded_url:
-            self.logger.info(f"Successfully decoded using HTML/API method")
+            self.logger.info("Successfully decoded using HTML/API method")
+            self._cache_decoded_url(article_id, decoded_url)
             return decoded_url
         
         # All methods failed
         self.logger.warning(f"Failed to decode Google News URL: {google_news_url[:100]}...")
         return None
     
+    def decode_many(self, google_news_urls: List[str], max_workers: int = 4) -> Dict[str, Optional[str]]:
+        """
+        Decode several Google News URLs concurrently.
+        
+        Requests to Google still respect the rate limit, but their network
+        round-trips overlap instead of running back to back. Each worker thread
+        uses its own HTTP session.
+        
+        Args:
+            google_news_urls: Google News redirect URLs (duplicates are decoded once)
+            max_workers: Maximum number of concurrent decodes
+            
+        Returns:
+            Mapping of each input URL to its original article URL (None if decoding failed)
+        """
+        unique_urls = list(dict.fromkeys(google_news_urls))
+        if not unique_urls:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_urls)))) as executor:
+            return dict(zip(unique_urls, executor.map(self.decode_url, unique_urls)))
+    
     async def decode_with_browser(self, google_news_url: str, mcp_agent) -> Optional[str]:
         """
         Fallback method using headless browser to let Google's JavaScript run.
@@ -360,29 +637,30 @@ class GoogleNewsDecoder:
         if not mcp_agent:
             return None
         
+        # Browser decodes are the slowest method - never repeat one from an earlier run
+        article_id = _article_id(google_news_url)
+        cached_url = self._get_cached_url(article_id)
+        if cached_url:
+            self.logger.debug("Decoded URL served from cache: %s", cached_url)
+            return cached_url
+        
         try:
-            self.logger.debug(f"Using browser fallback for: {google_news_url[:100]}...")
+            self.logger.debug("Using browser fallback for: %s...", google_news_url[:100])
             
-            prompt = f"""Navigate to this Google News URL and wait for it to redirect to the final article page: {google_news_url}
-
-Instructions:
-1. Open the URL and wait for any redirects to complete
-2. If there's a consent dialog or cookie banner, accept it
-3. Wait until you reach the final article page (not on news.google.com)
-4. Return ONLY the final URL of the article page
-5. Close the browser when done
-
-Return just the final URL, nothing else."""
+            prompt = _BROWSER_PROMPT_TMPL.format(url=google_news_url)
             
+            # The browser loads the Google News page too - respect the same rate limit
+            await self._rate_limit_async()
             result = await mcp_agent.run(prompt)
             
             if result and isinstance(result, str):
                 # Extract URL from the result
-                url_match = re.search(r'https?://[^\s]+', result)
+                url_match = _RESULT_URL_RE.search(result)
                 if url_match:
                     final_url = url_match.group(0)
-                    if self._is_valid_news_url(final_url):
+                    if _is_valid_news_url(final_url):
                         self.logger.info(f"Browser successfully decoded to: {final_url}")
+                        self._cache_decoded_url(article_id, final_url)
                         return final_url
             
             return None
@@ -4,28 +4,207 @@ GPT-based Title Deduplication System - Step 4
 Implements title-based clustering using GPT-5-mini to eliminate duplicate
 news stories while selecting the most comprehensive article from each group.
 This approach is more cost-effective than content-based similarity as it only
-processes titles and makes a single GPT API call per batch.
+processes titles and makes one GPT API call per chunk of titles (chunks are
+clustered concurrently).
 """
 
 import os
 import json
+import asyncio
 import sqlite3
 import hashlib
 import logging
+import re
+import threading
 import time
-from typing import Dict, List, Any, Tuple, Optional
-from datetime import datetime, date
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Any, Tuple, Optional
+from datetime import datetime, date, timedelta
+from difflib import SequenceMatcher
 import openai
 
-from .utils import log_step_start, log_step_complete, format_number
+from .utils import (
+    log_step_start, log_step_complete, format_number, retry_wait,
+    SQLITE_PRAGMAS, RETRYABLE_GPT_ERRORS, MAX_GPT_ATTEMPTS, EventLoopMixin
+)
 
+# Optional fast fuzzy matching (C-accelerated); falls back to difflib
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
 
-class GPTTitleDeduplicator:
+
+# One line of clustering output: "index, group label"
+_CLUSTER_LINE_RE = re.compile(r'^\s*(\d+)\.?\s*,\s*(.+?)\s*$')
+
+# Structured output of a clustering call: [title index, group number] pairs
+_CLUSTERING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "assignments": {
+            "type": "array",
+            "items": {
+                "type": "array",
+                "items": {"type": "integer"}
+            }
+        }
+    },
+    "required": ["assignments"],
+    "additionalProperties": False
+}
+
+# Article fields loaded for deduplication, aliased to the returned keys (the text itself stays in SQLite)
+_ARTICLE_COLUMNS = """
+    i.id, i.title, i.url, i.source,
+    i.published_at, i.first_seen_at,
+    LENGTH(a.extracted_text) as content_length,
+    i.triage_confidence as confidence
+"""
+
+# Matched, scraped articles first seen or published in [day_start, day_end), compared
+# as strings: offset timestamps count on the local date they were written with
+_Q_GATHER = f"""
+    SELECT {_ARTICLE_COLUMNS}
+    FROM items i
+    JOIN articles a ON i.id = a.item_id
+    WHERE +i.is_match = 1  -- unary + keeps the planner on the date indexes
+    AND a.extracted_text IS NOT NULL 
+    AND a.extracted_text != ''
+    AND (
+        (i.published_at >= ? AND i.published_at < ?)
+        OR (i.first_seen_at >= ? AND i.first_seen_at < ?)
+    )
+    ORDER BY i.triage_confidence DESC, content_length DESC
+    LIMIT ?
+"""
+
+# Primary articles of clusters UNION ALL never-clustered articles - the branches
+# cannot overlap, so no DISTINCT pass over the joined rows is needed. The NOT
+# EXISTS probe is only cheap through idx_ac_article, which _ensure_indexes creates
+_Q_PRIMARY = """
+    SELECT i.id, i.source, i.url, i.title, i.published_at, i.first_seen_at,
+           i.triage_confidence, ac.cluster_id, ac.is_primary
+    FROM items i
+    JOIN article_clusters ac ON i.id = ac.article_id
+    WHERE ac.clustering_method = 'gpt_title_clustering'
+    AND ac.is_primary = 1
+    AND i.is_match = 1
+    AND EXISTS (SELECT 1 FROM articles a WHERE a.item_id = i.id AND a.extracted_text IS NOT NULL)
+    UNION ALL
+    SELECT i.id, i.source, i.url, i.title, i.published_at, i.first_seen_at,
+           i.triage_confidence, NULL, NULL
+    FROM items i
+    WHERE i.is_match = 1
+    AND NOT EXISTS (
+        SELECT 1 FROM article_clusters ac
+        WHERE ac.article_id = i.id AND ac.clustering_method = 'gpt_title_clustering'
+    )
+    AND EXISTS (SELECT 1 FROM articles a WHERE a.item_id = i.id AND a.extracted_text IS NOT NULL)
+    ORDER BY triage_confidence DESC, first_seen_at DESC
+    LIMIT ?
+"""
+
+# Hot queries whose plans are checked once per process when debug logging is on
+_CHECKED_QUERIES = {'gather': _Q_GATHER, 'primary': _Q_PRIMARY}
+_query_plans_checked = False
+
+# Query plan step reading every row of a table without an index ("SCAN ac", or
+# "SCAN TABLE article_clusters" before SQLite 3.36)
+_TABLE_SCAN_RE = re.compile(r'^SCAN (TABLE )?(?!CONSTANT ROW)\w+\b(?!.* USING (COVERING )?INDEX)')
+
+
+def _titles_hash(titles: Iterable[str]) -> str:
+    """Order-independent hash of a set of titles (key of the cluster cache)."""
+    return hashlib.sha256('\n'.join(sorted(titles)).encode()).hexdigest()
+
+
+def _title_key(title: str) -> str:
+    """Normalize a title for exact duplicate detection (case and whitespace insensitive)."""
+    return ' '.join(title.split()).casefold()
+
+
+def _token_set_ratio(a: str, b: str) -> float:
+    """difflib version of rapidfuzz's fuzz.token_set_ratio (0-100, case-insensitive)."""
+    tokens_a, tokens_b = set(a.lower().split()), set(b.lower().split())
+    common = ' '.join(sorted(tokens_a & tokens_b))
+    with_a = f"{common} {' '.join(sorted(tokens_a - tokens_b))}".strip()
+    with_b = f"{common} {' '.join(sorted(tokens_b - tokens_a))}".strip()
+    pairs = [(with_a, with_b)]
+    if common:
+        pairs += [(common, with_a), (common, with_b)]
+    return 100 * max(SequenceMatcher(None, x, y).ratio() for x, y in pairs)
+
+
+def _merge_groups(groups: Iterable[List[int]]) -> List[List[int]]:
+    """
+    Merge overlapping index groups (union-find).
+    
+    Returns:
+        Connected groups with more than one member, each in ascending index order
+    """
+    parent = {}
+    
+    def find(i):
+        while parent.setdefault(i, i) != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for group in groups:
+        root = find(group[0])
+        for i in group[1:]:
+            parent[find(i)] = root
+    
+    merged = {}
+    for i in sorted(parent):
+        merged.setdefault(find(i), []).append(i)
+    return [members for members in merged.values() if len(members) > 1]
+
+
+class GPTTitleDeduplicator(EventLoopMixin):
     """GPT-based title clustering for news article deduplication."""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, use_batch_api: Optional[bool] = None):
+        """
+        Args:
+            db_path: Path to SQLite database file
+            use_batch_api: Cluster through the OpenAI Batch API (half price, results
+                within 24h, resolved by poll_pending_batches). Defaults to the
+                DEDUP_USE_BATCH_API environment variable.
+        """
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
+        # One connection per thread - resolved batches are stored on a background thread
+        self._local = threading.local()
+        self._conns = []
+        self._conns_lock = threading.Lock()
+        self._storage_pool = None
+        # Event loop of the async client, created on first use (see _run)
+        self._loop = None
+        
+        if use_batch_api is None:
+            use_batch_api = os.getenv('DEDUP_USE_BATCH_API', '').lower() in ('1', 'true', 'yes')
+        self.use_batch_api = use_batch_api
+        
+        # Batches smaller than this are clustered locally by fuzzy title matching (0 disables)
+        self.local_threshold = int(os.getenv('DEDUP_LOCAL_THRESHOLD', '10'))
+        self.local_score_cutoff = float(os.getenv('DEDUP_LOCAL_SCORE_CUTOFF', '85'))
+        
+        # Titles per GPT call - larger batches are split and clustered concurrently
+        self.chunk_size = max(2, int(os.getenv('DEDUP_CHUNK_SIZE', '50')))
+        
+        # Share of already clustered titles above which only the new titles go to GPT
+        self.cache_reuse_ratio = float(os.getenv('DEDUP_CACHE_REUSE_RATIO', '0.95'))
+        
+        # Only the highest-confidence articles of the day are deduplicated
+        self.max_dedup_articles = int(os.getenv('DEDUP_MAX_ARTICLES', '500'))
+        self.cluster_cache_enabled = True
+        self._init_cluster_cache()
+        self._ensure_indexes()
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._check_query_plans()
         
         # Initialize OpenAI client
         self._init_openai_client()
@@ -37,134 +216,406 @@ class GPTTitleDeduplicator:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
         self.openai_client = openai.OpenAI(api_key=api_key)
+        # Retries are handled by call_gpt_for_clustering_async
+        self.async_client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
         self.model_mini = os.getenv('MODEL_MINI', 'gpt-4o-mini')
         
         self.logger.info(f"Initialized GPT deduplicator with model: {self.model_mini}")
     
+    def _connection(self) -> sqlite3.Connection:
+        """
+        The calling thread's database connection, opened on first use with the
+        deduplicator's pragmas.
+        
+        The connection runs in autocommit mode - multi-statement writes open
+        their own transaction with BEGIN.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # check_same_thread=False only so close() can close it from another thread
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+    
+    def _submit_storage(self, fn, *args) -> Future:
+        """Run a database write on the storage thread, so poll_pending_batches can resolve the next batch meanwhile."""
+        if self._storage_pool is None:
+            self._storage_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dedup-storage')
+        return self._storage_pool.submit(fn, *args)
+    
+    def close(self):
+        """
+        Wait for pending storage, close all database connections and the async
+        client's event loop (they are reopened on next use).
+        """
+        if self._storage_pool is not None:
+            self._storage_pool.shutdown(wait=True)
+            self._storage_pool = None
+        if self._loop is not None:
+            self._loop.run_until_complete(self.async_client.close())
+            self._loop.close()
+            self._loop = None
+            # A closed client cannot send requests again
+            self.async_client = openai.AsyncOpenAI(api_key=self.openai_client.api_key, max_retries=0)
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _init_cluster_cache(self):
+        """Create the clustering cache tables and drop entries older than DEDUP_CACHE_TTL_DAYS."""
+        ttl = f"-{int(os.getenv('DEDUP_CACHE_TTL_DAYS', '7'))} days"
+        try:
+            conn = self._connection()
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cluster_cache (
+                    titles_hash TEXT PRIMARY KEY,
+                    result_json TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT (datetime('now'))
+                );
+                CREATE TABLE IF NOT EXISTS cluster_cache_titles (
+                    title TEXT PRIMARY KEY,
+                    story TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT (datetime('now'))
+                );
+                CREATE TABLE IF NOT EXISTS pending_batches (
+                    batch_id TEXT PRIMARY KEY,
+                    article_ids TEXT NOT NULL,  -- JSON list, in prompt order
+                    chunk_size INTEGER NOT NULL,
+                    created_at TIMESTAMP DEFAULT (datetime('now'))
+                );
+            """)
+            conn.execute("DELETE FROM cluster_cache WHERE created_at < datetime('now', ?)", (ttl,))
+            conn.execute("DELETE FROM cluster_cache_titles WHERE created_at < datetime('now', ?)", (ttl,))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Clustering cache disabled: {e}")
+            self.cluster_cache_enabled = False
+    
+    def _ensure_indexes(self):
+        """Create the indexes that keep today's-articles lookups and per-article cluster access off full scans."""
+        try:
+            conn = self._connection()
+            # One index per OR branch of the published_at / first_seen_at range filter;
+            # article_clusters(article_id) serves the per-article DELETE and the
+            # never-clustered NOT EXISTS probe without relying on the digest generator
+            conn.executescript("""
+                CREATE INDEX IF NOT EXISTS idx_items_published_at ON items(published_at);
+                CREATE INDEX IF NOT EXISTS idx_items_first_seen_at ON items(first_seen_at);
+                CREATE INDEX IF NOT EXISTS idx_ac_article ON article_clusters(article_id, is_primary);
+            """)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not create deduplication indexes: {e}")
+
+    def _check_query_plans(self):
+        """Warn once per process if a hot query scans a whole table (e.g. after a schema change dropped an index)."""
+        global _query_plans_checked
+        if _query_plans_checked:
+            return
+        _query_plans_checked = True
+
+        conn = self._connection()
+        for name, query in _CHECKED_QUERIES.items():
+            try:
+                plan = conn.execute("EXPLAIN QUERY PLAN " + query, (None,) * query.count('?')).fetchall()
+            except sqlite3.Error as e:
+                self.logger.debug(f"Could not check query plan of {name}: {e}")
+                continue
+            if any(_TABLE_SCAN_RE.match(row[-1]) for row in plan):
+                self.logger.warning("Unindexed scan in %s", name)
+
+    def _get_cached_clusters(self, titles_hash: str) -> Optional[List[List[str]]]:
+        """Look up the title groups stored for exactly this set of titles."""
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT result_json FROM cluster_cache WHERE titles_hash = ?", (titles_hash,)
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+        except sqlite3.Error as e:
+            self.logger.debug("Clustering cache lookup failed: %s", e)
+            return None
+    
+    def _get_known_stories(self, titles: List[str]) -> Dict[str, str]:
+        """Map the titles clustered by an earlier run to their story key."""
+        known = {}
+        try:
+            conn = self._connection()
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(titles), 500):
+                batch = titles[start:start + 500]
+                known.update(conn.execute(
+                    f"SELECT title, story FROM cluster_cache_titles WHERE title IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall())
+        except sqlite3.Error as e:
+            self.logger.debug("Clustering cache lookup failed: %s", e)
+        return known
+    
+    def _store_cached_clusters(self, titles_hash: str, titles: List[str], clusters: Dict[str, List[int]]):
+        """Store the clustering of a title set, and each title's story for partial reuse."""
+        title_groups = [sorted({titles[i] for i in indices}) for indices in clusters.values()]
+        # A story is keyed by its alphabetically first title; unclustered titles are their own story
+        stories = {title: title for title in titles}
+        for group in title_groups:
+            stories.update(dict.fromkeys(group, group[0]))
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN")
+            conn.execute(
+                "INSERT OR REPLACE INTO cluster_cache (titles_hash, result_json) VALUES (?, ?)",
+                (titles_hash, json.dumps(title_groups, ensure_ascii=False))
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO cluster_cache_titles (title, story) VALUES (?, ?)",
+                stories.items()
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            self.logger.warning(f"Could not store clustering in cache: {e}")
+    
     def gather_scraped_articles_for_today(self) -> List[Dict[str, Any]]:
         """
         Gather all articles that passed AI filter and have been scraped today.
-        This includes articles from all pipeline runs today, not just the current run.
+        This includes articles from all pipeline runs today, not just the current run,
+        capped at the max_dedup_articles highest-confidence ones.
         """
-        today = date.today().strftime('%Y-%m-%d')
+        # Half-open range of today's ISO-8601 timestamp strings. Comparing the raw columns
+        # (instead of DATE(column) = ?) lets SQLite use their indexes, and it matches on the
+        # local calendar date as written: '...T00:38:08+02:00' counts for that day, where
+        # DATE() converted offset timestamps to UTC and moved it to the previous day
+        today = date.today()
+        day_start, day_end = today.isoformat(), (today + timedelta(days=1)).isoformat()
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = self._connection()
         
         # Query to get all matched articles with scraped content from today
-        cursor = conn.execute("""
-            SELECT DISTINCT 
-                i.id, i.title, i.url, i.source,
-                i.published_at, i.first_seen_at,
-                COALESCE(a.extracted_text, '') as content,
-                LENGTH(COALESCE(a.extracted_text, '')) as content_length,
-                i.triage_confidence
-            FROM items i
-            JOIN articles a ON i.id = a.item_id
-            WHERE i.is_match = 1
-            AND a.extracted_text IS NOT NULL 
-            AND a.extracted_text != ''
-            AND (
-                DATE(i.published_at) = ?
-                OR DATE(i.first_seen_at) = ?
-            )
-            ORDER BY i.triage_confidence DESC, content_length DESC
-        """, (today, today))
+        cursor = conn.execute(_Q_GATHER, (day_start, day_end, day_start, day_end, self.max_dedup_articles))
         
-        articles = []
-        for row in cursor.fetchall():
-            articles.append({
-                'id': row['id'],
-                'title': row['title'],
-                'url': row['url'],
-                'source': row['source'],
-                'published_at': row['published_at'],
-                'first_seen_at': row['first_seen_at'],
-                'content_length': row['content_length'],
-                'confidence': row['triage_confidence']
-            })
-        
-        conn.close()
+        articles = [dict(row) for row in cursor]
         
         self.logger.info(f"Found {len(articles)} scraped articles from today for deduplication")
         return articles
     
+    def _load_articles(self, article_ids: List[int]) -> List[Dict[str, Any]]:
+        """Load articles by ID in the shape returned by gather_scraped_articles_for_today (unordered)."""
+        articles = []
+        conn = self._connection()
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(article_ids), 500):
+            batch = article_ids[start:start + 500]
+            articles.extend(dict(row) for row in conn.execute(f"""
+                SELECT {_ARTICLE_COLUMNS}
+                FROM items i
+                JOIN articles a ON i.id = a.item_id
+                WHERE i.id IN ({','.join('?' * len(batch))})
+            """, batch))
+        return articles
+    
     def create_clustering_prompt(self, articles: List[Dict[str, Any]]) -> str:
         """Create the prompt for GPT-5-mini to cluster article titles."""
         
-        # Build the titles list
-        titles_list = []
-        for i, article in enumerate(articles, 1):
-            titles_list.append(f"{i}. {article['title']}")
+        # Build the titles list - one line per title, so embedded line breaks cannot fake an index
+        titles_text = '\n'.join(
+            f"{i}. {' '.join(article['title'].splitlines())}" for i, article in enumerate(articles, 1)
+        )
         
-        titles_text = '\n'.join(titles_list)
+        system_prompt = "Group duplicate news titles."
         
-        system_prompt = """You are an AI assistant grouping news article titles that refer to the same event. Group titles by story."""
-        
-        user_prompt = f"""List the titles:
-{titles_text}
+        user_prompt = f"""{titles_text}
 
-Identify which titles describe the same news. Assign a group label (e.g., Group1, Group2, ...) to each title that belongs to the same story. Output each title's index with its group label, one per line (format: index, groupX)."""
+Give titles about the same story the same group number. Return one [index, group] pair per title."""
         
         return system_prompt, user_prompt
     
+    def _clustering_request(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        """Build the chat completion arguments shared by the sync and async clustering calls."""
+        return {
+            "model": self.model_mini,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            # Using default temperature as custom values not supported by this model
+            "max_completion_tokens": 1000,  # Updated parameter for newer models
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "title_clusters",
+                    "schema": _CLUSTERING_SCHEMA,
+                    "strict": True
+                }
+            }
+        }
+    
     def call_gpt_for_clustering(self, system_prompt: str, user_prompt: str) -> str:
         """Make API call to GPT-5-mini for title clustering."""
-        try:
-            response = self.openai_client.chat.completions.create(
-                model=self.model_mini,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                # Using default temperature as custom values not supported by this model
-                max_completion_tokens=1000  # Updated parameter for newer models
+        return self._run(self.call_gpt_for_clustering_async(system_prompt, user_prompt))
+    
+    async def call_gpt_for_clustering_async(self, system_prompt: str, user_prompt: str) -> str:
+        """
+        Async variant of call_gpt_for_clustering, used to cluster chunks concurrently.
+        
+        Rate limits, timeouts, connection and server errors are retried up to
+        MAX_GPT_ATTEMPTS times with randomized exponential backoff.
+        """
+        for attempt in range(1, MAX_GPT_ATTEMPTS + 1):
+            try:
+                response = await self.async_client.chat.completions.create(
+                    **self._clustering_request(system_prompt, user_prompt)
+                )
+                
+                output_text = response.choices[0].message.content
+                self.logger.debug(f"GPT clustering response: {output_text}")
+                return output_text
+                
+            except RETRYABLE_GPT_ERRORS as e:
+                if attempt == MAX_GPT_ATTEMPTS:
+                    self.logger.warning(f"GPT API call failed after {attempt} attempts: {e}")
+                    raise
+                wait = retry_wait(attempt, e)
+                self.logger.debug("GPT API call failed (attempt %d), retrying in %.1fs: %s", attempt, wait, e)
+                await asyncio.sleep(wait)
+                
+            except Exception as e:
+                self.logger.error(f"GPT API call failed: {e}")
+                raise
+    
+    async def _cluster_chunk(self, chunk: List[Dict[str, Any]], chunk_idx: int) -> Dict[str, List[int]]:
+        """
+        Cluster one chunk of articles.
+        
+        Returns:
+            Duplicate clusters with chunk-local indices and group names prefixed
+            with the chunk id, so equal labels from different chunks stay apart
+        """
+        system_prompt, user_prompt = self.create_clustering_prompt(chunk)
+        gpt_output = await self.call_gpt_for_clustering_async(system_prompt, user_prompt)
+        clusters = self.parse_clustering_output(gpt_output, len(chunk))
+        return {f"c{chunk_idx}_{group}": indices for group, indices in clusters.items()}
+    
+    async def _cluster_in_chunks(self, articles: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        """
+        Cluster articles in chunks of chunk_size with concurrent GPT calls.
+        
+        Returns:
+            Duplicate clusters as group name -> indices into articles
+        """
+        offsets = range(0, len(articles), self.chunk_size)
+        chunk_results = await asyncio.gather(*(
+            self._cluster_chunk(articles[offset:offset + self.chunk_size], chunk_idx)
+            for chunk_idx, offset in enumerate(offsets)
+        ))
+        
+        clusters = {}
+        for offset, chunk_clusters in zip(offsets, chunk_results):
+            for group, indices in chunk_clusters.items():
+                clusters[group] = [offset + i for i in indices]
+        return clusters
+    
+    async def _cluster_titles(self, articles: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        """
+        Cluster all article titles, chunking large batches.
+        
+        Duplicates that land in different chunks are recovered by a second pass
+        over one representative title per story (the first title of each chunk
+        cluster plus every unclustered title), see _merge_across_chunks.
+        """
+        if len(articles) < 2:
+            return {}
+        
+        # Verbatim duplicates (syndicated copies) are grouped locally; GPT sees each title once
+        same_title = {}
+        for i, article in enumerate(articles):
+            same_title.setdefault(_title_key(article['title']), []).append(i)
+        if len(same_title) < len(articles):
+            representatives = [indices[0] for indices in same_title.values()]
+            self.logger.info(f"Grouped {len(articles) - len(representatives)} verbatim duplicate titles locally")
+            rep_clusters = await self._cluster_titles([articles[i] for i in representatives])
+            groups = [indices for indices in same_title.values() if len(indices) > 1]
+            groups.extend(
+                [i for j in rep_indices for i in same_title[_title_key(articles[representatives[j]]['title'])]]
+                for rep_indices in rep_clusters.values()
             )
-            
-            output_text = response.choices[0].message.content
-            self.logger.debug(f"GPT clustering response: {output_text}")
-            return output_text
-            
-        except Exception as e:
-            self.logger.error(f"GPT API call failed: {e}")
-            raise
+            return {f"group{n}": members for n, members in enumerate(_merge_groups(groups), 1)}
+        
+        clusters = await self._cluster_in_chunks(articles)
+        if len(articles) <= self.chunk_size:
+            return clusters
+        return await self._merge_across_chunks(articles, clusters)
+    
+    async def _merge_across_chunks(self, articles: List[Dict[str, Any]],
+                                   clusters: Dict[str, List[int]]) -> Dict[str, List[int]]:
+        """Second clustering pass over one representative per story to merge stories split across chunks."""
+        # Representatives: each cluster's first member stands in for the whole cluster
+        members = {}
+        clustered = set()
+        for group, indices in clusters.items():
+            members[indices[0]] = group
+            clustered.update(indices)
+        representatives = [i for i in range(len(articles)) if i not in clustered or i in members]
+        
+        cross_clusters = await self._cluster_in_chunks([articles[i] for i in representatives])
+        for group, rep_indices in cross_clusters.items():
+            merged = []
+            for rep_idx in rep_indices:
+                article_idx = representatives[rep_idx]
+                chunk_group = members.get(article_idx)
+                merged.extend(clusters.pop(chunk_group, []) if chunk_group else [article_idx])
+            clusters[f"x_{group}"] = list(dict.fromkeys(merged))
+        
+        self.logger.info(f"Clustered {len(articles)} titles in chunks of {self.chunk_size} "
+                         f"({len(cross_clusters)} cross-chunk merges)")
+        return clusters
     
     def parse_clustering_output(self, gpt_output: str, num_articles: int) -> Dict[str, List[int]]:
         """
         Parse GPT output to identify clusters of duplicate articles.
         
         Args:
-            gpt_output: Raw output from GPT
+            gpt_output: Raw output from GPT (JSON [index, group] pairs, or "index, groupX" lines)
             num_articles: Expected number of articles
             
         Returns:
             Dictionary mapping group names to lists of article indices
         """
-        clusters = {}
+        clusters = defaultdict(list)
         
-        for line in gpt_output.strip().split('\n'):
-            line = line.strip()
-            if not line or ',' not in line:
-                continue
-            
-            try:
-                # Parse format: "index, groupX"
-                parts = line.split(',', 1)
-                index_str = parts[0].strip()
-                group_str = parts[1].strip()
-                
-                # Extract index (handle various formats like "1" or "1.")
-                index = int(index_str.rstrip('.'))
-                
-                # Validate index range
+        try:
+            assignments = json.loads(gpt_output)['assignments']
+        except (ValueError, KeyError, TypeError):
+            assignments = None
+        
+        if isinstance(assignments, list):
+            # JSON format: {"assignments": [[1, 1], [2, 1], ...]} (or [{"idx": 1, "group": "G1"}, ...])
+            for assignment in assignments:
+                try:
+                    if isinstance(assignment, dict):
+                        index, group = assignment['idx'], assignment['group']
+                    else:
+                        index, group = assignment
+                    index = int(index)
+                    group = str(group)
+                except (KeyError, TypeError, ValueError):
+                    self.logger.warning(f"Could not parse assignment: {assignment!r}")
+                    continue
                 if 1 <= index <= num_articles:
-                    if group_str not in clusters:
-                        clusters[group_str] = []
-                    clusters[group_str].append(index - 1)  # Convert to 0-based
-                    
-            except (ValueError, IndexError) as e:
-                self.logger.warning(f"Could not parse line: '{line}' - {e}")
-                continue
+                    clusters[group].append(index - 1)  # Convert to 0-based
+        else:
+            self.logger.debug("Clustering output is not JSON - parsing it line by line")
+            self._parse_clustering_lines(gpt_output, num_articles, clusters)
         
         # Filter to only groups with multiple articles (duplicates)
         duplicate_clusters = {group: indices for group, indices in clusters.items() 
@@ -173,6 +624,287 @@ Identify which titles describe the same news. Assign a group label (e.g., Group1
         self.logger.info(f"Parsed {len(duplicate_clusters)} duplicate clusters from GPT output")
         return duplicate_clusters
     
+    def _parse_clustering_lines(self, gpt_output: str, num_articles: int, clusters: Dict[str, List[int]]):
+        """Collect assignments from the plain "index, groupX" line format into clusters."""
+        for line in gpt_output.splitlines():
+            # Parse format: "index, groupX" (index may carry a trailing dot, e.g. "1.")
+            match = _CLUSTER_LINE_RE.match(line)
+            if not match:
+                if ',' in line:
+                    self.logger.warning(f"Could not parse line: '{line.strip()}'")
+                continue
+            
+            index = int(match.group(1))
+            
+            # Validate index range
+            if 1 <= index <= num_articles:
+                clusters[match.group(2)].append(index - 1)  # Convert to 0-based
+    
+    def _local_cluster(self, articles: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        """
+        Cluster a small batch without GPT: titles whose token set ratio reaches
+        local_score_cutoff are duplicates (transitively).
+        
+        Returns:
+            Duplicate clusters in the shape of parse_clustering_output
+        """
+        titles = [article['title'] for article in articles]
+        pairs = []
+        for i, title in enumerate(titles[:-1]):
+            others = titles[i + 1:]
+            if process is not None:
+                matches = process.extract(title, others, scorer=fuzz.token_set_ratio, processor=str.lower,
+                                          score_cutoff=self.local_score_cutoff, limit=None)
+                pairs.extend([i, i + 1 + j] for _, _, j in matches)
+            else:
+                pairs.extend([i, i + 1 + j] for j, other in enumerate(others)
+                             if _token_set_ratio(title, other) >= self.local_score_cutoff)
+        
+        clusters = {f"local{n}": members for n, members in enumerate(_merge_groups(pairs), 1)}
+        self.logger.info(f"Clustered {len(articles)} titles locally: {len(clusters)} duplicate clusters")
+        return clusters
+    
+    def _cluster_with_cache(self, articles: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        """
+        Cluster article titles, reusing the results of earlier runs.
+        
+        Batches below local_threshold are clustered locally (see _local_cluster).
+        An unchanged title set is served from the cache without any GPT call. When
+        at least cache_reuse_ratio of the titles were clustered before, their
+        stories are kept and GPT only sees the new titles plus one title per
+        known story.
+        
+        Returns:
+            Duplicate clusters as group name -> indices into articles
+        """
+        # Small batches: a local fuzzy match is cheaper than a GPT round-trip
+        if len(articles) < self.local_threshold:
+            return self._local_cluster(articles)
+        
+        if not self.cluster_cache_enabled:
+            return self._run(self._cluster_titles(articles))
+        
+        titles = [article['title'] for article in articles]
+        titles_hash = _titles_hash(titles)
+        cached_groups = self._get_cached_clusters(titles_hash)
+        if cached_groups is not None:
+            self.logger.info("Title set unchanged since the last run - reusing cached clusters")
+            indices_by_title = {}
+            for i, title in enumerate(titles):
+                indices_by_title.setdefault(title, []).append(i)
+            return {
+                f"cached{n}": [i for title in group for i in indices_by_title.get(title, [])]
+                for n, group in enumerate(cached_groups, 1)
+            }
+        
+        unique_titles = list(dict.fromkeys(titles))
+        known = self._get_known_stories(unique_titles)
+        if known and len(known) >= self.cache_reuse_ratio * len(unique_titles):
+            clusters = self._cluster_new_titles(articles, known)
+        else:
+            clusters = self._run(self._cluster_titles(articles))
+        
+        self._store_cached_clusters(titles_hash, titles, clusters)
+        return clusters
+    
+    def _cluster_new_titles(self, articles: List[Dict[str, Any]], known: Dict[str, str]) -> Dict[str, List[int]]:
+        """Cluster only the titles missing from known against one representative per known story."""
+        stories = {}
+        new_indices = []
+        for i, article in enumerate(articles):
+            story = known.get(article['title'])
+            if story is None:
+                new_indices.append(i)
+            else:
+                stories.setdefault(story, []).append(i)
+        
+        groups = list(stories.values())
+        self.logger.info(f"Reusing clusters of {len(articles) - len(new_indices)} known titles, "
+                         f"clustering {len(new_indices)} new titles")
+        if new_indices and len(groups) + len(new_indices) > 1:
+            subset = [group[0] for group in groups] + new_indices
+            new_clusters = self._run(self._cluster_titles([articles[i] for i in subset]))
+            groups.extend([subset[j] for j in indices] for indices in new_clusters.values())
+        
+        return {f"group{n}": members for n, members in enumerate(_merge_groups(groups), 1)}
+    
+    def _submit_clustering_batch(self, articles: List[Dict[str, Any]]) -> str:
+        """
+        Submit the clustering prompts (one per chunk) as an OpenAI batch job.
+        
+        Returns:
+            ID of the batch, recorded in pending_batches with the article IDs
+        """
+        lines = []
+        for chunk_idx, offset in enumerate(range(0, len(articles), self.chunk_size)):
+            system_prompt, user_prompt = self.create_clustering_prompt(articles[offset:offset + self.chunk_size])
+            lines.append(json.dumps({
+                "custom_id": f"chunk{chunk_idx}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._clustering_request(system_prompt, user_prompt)
+            }, ensure_ascii=False))
+        
+        batch_file = self.openai_client.files.create(
+            file=("title_clustering.jsonl", '\n'.join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = self.openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO pending_batches (batch_id, article_ids, chunk_size) VALUES (?, ?, ?)",
+            (batch.id, json.dumps([article['id'] for article in articles]), self.chunk_size)
+        )
+        
+        self.logger.info(f"Submitted clustering batch {batch.id} for {len(articles)} articles "
+                         f"({len(lines)} requests)")
+        return batch.id
+    
+    def poll_pending_batches(self) -> List[Dict[str, Any]]:
+        """
+        Resolve clustering batches submitted by earlier runs.
+        
+        Completed batches are parsed, merged across chunks and stored like a
+        regular deduplication run; failed or expired batches, and completed ones
+        without a usable output file, are dropped. Batches still in progress, or
+        whose output could not be fetched or merged, are left for the next poll.
+        
+        Returns:
+            One result summary per resolved batch
+        """
+        conn = self._connection()
+        pending = conn.execute(
+            "SELECT batch_id, article_ids, chunk_size FROM pending_batches ORDER BY created_at"
+        ).fetchall()
+        
+        # A resolved batch is stored in the background while the next one is downloaded and merged
+        stored = []
+        try:
+            for batch_id, article_ids_json, chunk_size in pending:
+                future = self._poll_batch(batch_id, json.loads(article_ids_json), chunk_size)
+                if future is not None:
+                    stored.append((batch_id, future))
+        finally:
+            results = []
+            for batch_id, future in stored:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    self.logger.error(f"Storing clustering batch {batch_id} failed: {e}")
+                    continue
+                self._drop_pending_batch(batch_id)
+        
+        return results
+    
+    def _poll_batch(self, batch_id: str, article_ids: List[int], chunk_size: int) -> Optional[Future]:
+        """
+        Check one pending batch and submit its clusters for storage once completed.
+        
+        Returns:
+            Future of the storage result, or None if nothing was stored
+        """
+        try:
+            batch = self.openai_client.batches.retrieve(batch_id)
+        except openai.OpenAIError as e:
+            self.logger.warning(f"Could not check clustering batch {batch_id}: {e}")
+            return None
+        
+        if batch.status in ('failed', 'expired', 'cancelled'):
+            self.logger.warning(f"Clustering batch {batch_id} ended with status '{batch.status}' - dropping it")
+            self._drop_pending_batch(batch_id)
+            return None
+        if batch.status != 'completed':
+            self.logger.info(f"Clustering batch {batch_id} still {batch.status}")
+            return None
+        
+        # Every request failed: the batch has no output file to download
+        if not batch.output_file_id:
+            self.logger.warning(f"Clustering batch {batch_id} completed without an output file - dropping it")
+            self._drop_pending_batch(batch_id)
+            return None
+        
+        try:
+            output = self.openai_client.files.content(batch.output_file_id).text
+            return self._resolve_batch(batch_id, article_ids, chunk_size, output)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self.logger.warning(f"Could not parse clustering batch {batch_id} - dropping it: {e}")
+            self._drop_pending_batch(batch_id)
+        except Exception as e:
+            self.logger.error(f"Resolving clustering batch {batch_id} failed: {e}")
+        return None
+    
+    def _drop_pending_batch(self, batch_id: str):
+        """Forget a resolved or dropped batch; a failed delete only means it is polled again."""
+        try:
+            self._connection().execute("DELETE FROM pending_batches WHERE batch_id = ?", (batch_id,))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not remove clustering batch {batch_id} from pending_batches: {e}")
+    
+    def _pending_article_batches(self) -> Dict[int, str]:
+        """Map each article ID covered by a pending clustering batch to the ID of that batch."""
+        rows = self._connection().execute("SELECT batch_id, article_ids FROM pending_batches").fetchall()
+        return {article_id: batch_id for batch_id, article_ids_json in rows
+                for article_id in json.loads(article_ids_json)}
+    
+    def _resolve_batch(self, batch_id: str, article_ids: List[int], chunk_size: int,
+                       output: str) -> Future:
+        """Turn the output file of a completed clustering batch into clusters and submit them for storage."""
+        clusters = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            chunk_idx = int(result['custom_id'][len('chunk'):])
+            response = result.get('response') or {}
+            if result.get('error') or response.get('status_code') != 200:
+                self.logger.warning(f"Batch {batch_id} request {result['custom_id']} failed: "
+                                    f"{result.get('error') or response.get('status_code')}")
+                continue
+            
+            offset = chunk_idx * chunk_size
+            content = response['body']['choices'][0]['message']['content']
+            chunk_len = min(chunk_size, len(article_ids) - offset)
+            for group, indices in self.parse_clustering_output(content, chunk_len).items():
+                clusters[f"c{chunk_idx}_{group}"] = [offset + i for i in indices]
+        
+        # Articles deleted since submission drop out; renumber the rest
+        loaded = {article['id']: article for article in self._load_articles(article_ids)}
+        new_index = {}
+        articles = []
+        for i, article_id in enumerate(article_ids):
+            if article_id in loaded:
+                new_index[i] = len(articles)
+                articles.append(loaded[article_id])
+        clusters = {group: [new_index[i] for i in indices if i in new_index] for group, indices in clusters.items()}
+        clusters = {group: indices for group, indices in clusters.items() if len(indices) > 1}
+        
+        if len(article_ids) > chunk_size:
+            clusters = self._run(self._merge_across_chunks(articles, clusters))
+        
+        return self._submit_storage(self._store_resolved_batch, batch_id, articles, clusters)
+    
+    def _store_resolved_batch(self, batch_id: str, articles: List[Dict[str, Any]],
+                              clusters: Dict[str, List[int]]) -> Dict[str, Any]:
+        """Cache and store the clusters of a resolved batch (runs on the storage thread)."""
+        if self.cluster_cache_enabled:
+            titles = [article['title'] for article in articles]
+            self._store_cached_clusters(_titles_hash(titles), titles, clusters)
+        storage_results = self.store_clusters_in_database(articles, clusters)
+        
+        self.logger.info(f"Resolved clustering batch {batch_id}: {len(clusters)} clusters, "
+                         f"{storage_results['duplicates_marked']} duplicates marked")
+        return {
+            'batch_id': batch_id,
+            'articles_processed': len(articles),
+            'clusters_found': len(clusters),
+            'duplicates_marked': storage_results['duplicates_marked']
+        }
+    
     def select_primary_article_by_length(self, cluster_articles: List[Dict[str, Any]]) -> Tuple[int, str]:
         """
         Select the primary article from a cluster based on content length.
@@ -189,15 +921,10 @@ Identify which titles describe the same news. Assign a group label (e.g., Group1
         if len(cluster_articles) == 1:
             return 0, "Only article in cluster"
         
-        # Find article with longest content
-        max_length = 0
-        best_idx = 0
-        
-        for i, article in enumerate(cluster_articles):
-            content_length = article.get('content_length', 0)
-            if content_length > max_length:
-                max_length = content_length
-                best_idx = i
+        # Find article with longest content (first one wins ties)
+        best_idx = max(range(len(cluster_articles)),
+                       key=lambda i: cluster_articles[i].get('content_length', 0))
+        max_length = cluster_articles[best_idx].get('content_length', 0)
         
         # Build selection reason
         primary_article = cluster_articles[best_idx]
@@ -209,67 +936,74 @@ Identify which titles describe the same news. Assign a group label (e.g., Group1
                                  clusters: Dict[str, List[int]]) -> Dict[str, Any]:
         """Store clustering results in the article_clusters table."""
         
-        conn = sqlite3.connect(self.db_path)
-        
         total_duplicates_marked = 0
         cluster_results = []
+        rows = []
         
-        try:
-            for group_name, article_indices in clusters.items():
-                # Get articles in this cluster
-                cluster_articles = [articles[i] for i in article_indices]
-                
-                # Generate cluster ID
-                cluster_id = hashlib.md5(
-                    f"gpt_cluster_{group_name}_{len(cluster_articles)}".encode()
-                ).hexdigest()[:12]
-                
-                # Select primary article
-                primary_idx, selection_reason = self.select_primary_article_by_length(cluster_articles)
-                primary_article = cluster_articles[primary_idx]
-                
-                # Store cluster in database
-                for i, article in enumerate(cluster_articles):
-                    is_primary = (i == primary_idx)
-                    
-                    conn.execute("""
-                        INSERT OR REPLACE INTO article_clusters
-                        (cluster_id, article_id, is_primary, similarity_score, clustering_method)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (
-                        cluster_id,
-                        article['id'],
-                        1 if is_primary else 0,
-                        1.0,  # GPT clustering is binary (same story or not)
-                        'gpt_title_clustering'
-                    ))
-                    
-                    if not is_primary:
-                        total_duplicates_marked += 1
-                
-                # Track results
-                cluster_results.append({
-                    'cluster_id': cluster_id,
-                    'group_name': group_name,
-                    'size': len(cluster_articles),
-                    'primary_title': primary_article['title'][:60] + "...",
-                    'primary_source': primary_article.get('source', 'unknown'),
-                    'primary_length': primary_article.get('content_length', 0),
-                    'selection_reason': selection_reason
-                })
+        for group_name, article_indices in clusters.items():
+            # Get articles in this cluster
+            cluster_articles = [articles[i] for i in article_indices]
+            
+            # Generate cluster ID (48 bits) from the member articles, so a rerun over
+            # the same articles reproduces it and different groups never share one
+            cluster_id = hashlib.blake2b(
+                ",".join(str(article_id) for article_id in sorted(a['id'] for a in cluster_articles)).encode(),
+                digest_size=6
+            ).hexdigest()
+            
+            # Select primary article
+            primary_idx, selection_reason = self.select_primary_article_by_length(cluster_articles)
+            primary_article = cluster_articles[primary_idx]
+            
+            # Collect the cluster's rows - all clusters are written in one transaction below
+            for i, article in enumerate(cluster_articles):
+                is_primary = (i == primary_idx)
+                rows.append((
+                    cluster_id,
+                    article['id'],
+                    1 if is_primary else 0,
+                    1.0,  # GPT clustering is binary (same story or not)
+                    'gpt_title_clustering'
+                ))
                 
-                self.logger.debug(f"Cluster {cluster_id}: {len(cluster_articles)} articles, "
-                                f"primary: {primary_article.get('source', 'unknown')} "
-                                f"({primary_article.get('content_length', 0):,} chars)")
+                if not is_primary:
+                    total_duplicates_marked += 1
+            
+            # Track results
+            cluster_results.append({
+                'cluster_id': cluster_id,
+                'group_name': group_name,
+                'size': len(cluster_articles),
+                'primary_title': primary_article['title'][:60] + "...",
+                'primary_source': primary_article.get('source', 'unknown'),
+                'primary_length': primary_article.get('content_length', 0),
+                'selection_reason': selection_reason
+            })
             
+            self.logger.debug(f"Cluster {cluster_id}: {len(cluster_articles)} articles, "
+                            f"primary: {primary_article.get('source', 'unknown')} "
+                            f"({primary_article.get('content_length', 0):,} chars)")
+        
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # This clustering replaces earlier GPT clusterings of the same articles (reruns
+            # of the day) - otherwise an article could stay primary of a stale cluster
+            conn.executemany(
+                "DELETE FROM article_clusters WHERE clustering_method = 'gpt_title_clustering' AND article_id = ?",
+                ((article['id'],) for article in articles)
+            )
+            conn.executemany("""
+                INSERT INTO article_clusters
+                (cluster_id, article_id, is_primary, similarity_score, clustering_method)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
             conn.commit()
             
         except Exception as e:
             conn.rollback()
             self.logger.error(f"Database error storing clusters: {e}")
             raise
-        finally:
-            conn.close()
         
         return {
             'clusters_stored': len(clusters),
@@ -314,12 +1048,43 @@ Identify which titles describe the same news. Assign a group label (e.g., Group1
         
         self.logger.info(f"Processing {len(articles)} scraped articles for GPT-based deduplication")
         
-        # Step 2: Create clustering prompt
-        system_prompt, user_prompt = self.create_clustering_prompt(articles)
+        # Batch API: submit and let poll_pending_batches() store the clusters later
+        if self.use_batch_api and len(articles) >= self.local_threshold and not (
+            self.cluster_cache_enabled
+            and self._get_cached_clusters(_titles_hash(a['title'] for a in articles)) is not None
+        ):
+            try:
+                # Articles already waiting in an earlier batch are not submitted (and paid for) again
+                pending = self._pending_article_batches()
+                uncovered = [article for article in articles if article['id'] not in pending]
+                if len(uncovered) > 1:
+                    batch_id = self._submit_clustering_batch(uncovered)
+                else:
+                    batch_id = next(pending[a['id']] for a in articles if a['id'] in pending)
+                    self.logger.info(f"Articles already pending in clustering batch {batch_id} - not resubmitting")
+            except Exception as e:
+                self.logger.error(f"Submitting clustering batch failed: {e}")
+                return {
+                    "articles_processed": len(articles),
+                    "clusters_found": 0,
+                    "duplicates_marked": 0,
+                    "primary_articles": len(articles),
+                    "deduplication_rate": "0.0%",
+                    "error": str(e)
+                }
+            return {
+                "articles_processed": len(articles),
+                "clusters_found": 0,
+                "duplicates_marked": 0,
+                "primary_articles": len(articles),
+                "deduplication_rate": "0.0%",
+                "batch_id": batch_id,
+                "status": "pending"
+            }
         
-        # Step 3: Call GPT-5-mini for clustering
+        # Steps 2-4: Prompt GPT-5-mini per chunk of titles (or match small batches locally) and parse the clusters
         try:
-            gpt_output = self.call_gpt_for_clustering(system_prompt, user_prompt)
+            clusters = self._cluster_with_cache(articles)
         except Exception as e:
             self.logger.error(f"GPT clustering failed: {e}")
             return {
@@ -331,18 +1096,22 @@ Identify which titles describe the same news. Assign a group label (e.g., Group1
                 "error": str(e)
             }
         
-        # Step 4: Parse clustering output
-        clusters = self.parse_clustering_output(gpt_output, len(articles))
-        
         if not clusters:
             self.logger.info("No duplicate clusters found by GPT")
-            return {
+            results = {
                 "articles_processed": len(articles),
                 "clusters_found": 0,
                 "duplicates_marked": 0,
                 "primary_articles": len(articles),
                 "deduplication_rate": "0.0%"
             }
+            # Still clear earlier clusterings, so stale duplicate rows don't hide these articles
+            try:
+                self.store_clusters_in_database(articles, {})
+            except Exception as e:
+                self.logger.error(f"Failed to clear earlier clusters: {e}")
+                results["error"] = str(e)
+            return results
         
         # Step 5: Store clusters in database
         try:
@@ -392,20 +1161,9 @@ Identify which titles describe the same news. Assign a group label (e.g., Group1
         Returns:
             List of primary/unique articles ready for summarization
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        
-        cursor = conn.execute("""
-            SELECT DISTINCT i.id, i.source, i.url, i.title, i.published_at, 
-                   i.triage_confidence, ac.cluster_id, ac.is_primary
-            FROM items i
-            LEFT JOIN article_clusters ac ON i.id = ac.article_id AND ac.clustering_method = 'gpt_title_clustering'
-            WHERE i.is_match = 1 
-            AND EXISTS (SELECT 1 FROM articles a WHERE a.item_id = i.id AND a.extracted_text IS NOT NULL)
-            AND (ac.is_primary = 1 OR ac.article_id IS NULL)
-            ORDER BY i.triage_confidence DESC, i.first_seen_at DESC
-            LIMIT ?
-        """, (limit,))
+        conn = self._connection()
+        
+        cursor = conn.execute(_Q_PRIMARY, (limit,))
         
         articles = []
         for row in cursor.fetchall():
@@ -420,7 +1178,5 @@ Identify which titles describe the same news. Assign a group label (e.g., Group1
                 'is_clustered': row['cluster_id'] is not None
             })
         
-        conn.close()
-        
         self.logger.info(f"Retrieved {len(articles)} primary/unclustered articles for summarization")
         return articles
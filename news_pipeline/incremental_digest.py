@@ -6,18 +6,158 @@ and only generating content for new articles, then merging with existing digests
 """
 
 import os
-import json
+import sys
+import hashlib
+import asyncio
 import sqlite3
 import logging
-from typing import List, Dict, Any, Optional, Set, Tuple
+import threading
+import time
+from array import array
+from functools import cached_property
+from typing import Iterable, List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from news_pipeline.prompt_library import PromptLibrary
 from news_pipeline.language_config import LanguageConfig
+from news_pipeline.utils import (
+    retry_wait, loads_json, dumps_json, SQLITE_PRAGMAS, RETRYABLE_GPT_ERRORS, MAX_GPT_ATTEMPTS, EventLoopMixin
+)
+
+# Optional compiled JSON Schema validation of model responses; skipped when not installed
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+
+# Applied to the state manager's connection
+_PRAGMAS = SQLITE_PRAGMAS + ("PRAGMA cache_size=-64000",)
+
+# Processed-ID sets up to this size are excluded with NOT IN (?, ...); larger
+# ones go through a temp table to stay below SQLite's bound parameter limit
+_MAX_INLINE_IDS = 500
+
+# Seconds between status checks of a running partial digest batch
+_BATCH_POLL_INTERVAL = 30.0
+
+
+# Structured output schemas of the partial digest and merge requests
+_PARTIAL_DIGEST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "key_insights": {"type": "array", "items": {"type": "string"}, "maxItems": 5},
+        "important_developments": {"type": "array", "items": {"type": "string"}, "maxItems": 3},
+        "new_sources": {"type": "array", "items": {"type": "string"}},
+        "entities_mentioned": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["key_insights", "important_developments", "new_sources", "entities_mentioned"],
+    "additionalProperties": False
+}
+
+_MERGED_DIGEST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "headline": {"type": "string"},
+        "why_it_matters": {"type": "string"},
+        "sources": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["headline", "why_it_matters", "sources"],
+    "additionalProperties": False
+}
+
+# Compiled once; each raises fastjsonschema.JsonSchemaException (a ValueError) on a mismatch
+if fastjsonschema is not None:
+    _validate_partial_digest = fastjsonschema.compile(_PARTIAL_DIGEST_SCHEMA)
+    _validate_merged_digest = fastjsonschema.compile(_MERGED_DIGEST_SCHEMA)
+else:
+    _validate_partial_digest = _validate_merged_digest = None
+
+
+# digest_state clustered on its natural key: lookups by (digest_date, topic) and
+# digest_date ranges go straight to the row, without a rowid or separate index
+_CREATE_DIGEST_STATE = """
+    CREATE TABLE {name} (
+        digest_date TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        processed_article_ids BLOB NOT NULL,
+        digest_content TEXT NOT NULL,
+        article_count INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (digest_date, topic)
+    ) WITHOUT ROWID
+"""
+
+_DIGEST_STATE_COLUMNS = ("digest_date, topic, processed_article_ids, digest_content, "
+                         "article_count, created_at, updated_at")
+
+def _pack_ids(article_ids: Iterable[int]) -> bytes:
+    """Pack article IDs into a sorted little-endian int64 array blob."""
+    packed = array('q', sorted(article_ids))
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_ids(value: Any) -> List[int]:
+    """Read processed article IDs stored as a packed blob, or as a JSON list by older versions."""
+    if isinstance(value, str):
+        return loads_json(value)
+    ids = array('q')
+    ids.frombytes(value)
+    if sys.byteorder != 'little':
+        ids.byteswap()
+    return ids.tolist()
+
+# Digest state statements - kept as constants so every call hits sqlite3's prepared statement cache
+_Q_GET_STATE = """
+    SELECT processed_article_ids, digest_content, article_count, 
+           created_at, updated_at
+    FROM digest_state 
+    WHERE digest_date = ? AND topic = ?
+"""
+
+_Q_GET_STATES = """
+    SELECT topic, processed_article_ids, digest_content, article_count,
+           created_at, updated_at
+    FROM digest_state 
+    WHERE digest_date = ?
+"""
+
+# Insert, or update the row of this date and topic in place (created_at is kept)
+_Q_SAVE_STATE = """
+    INSERT INTO digest_state 
+    (digest_date, topic, processed_article_ids, digest_content, 
+     article_count, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(digest_date, topic) DO UPDATE SET
+        processed_article_ids = excluded.processed_article_ids,
+        digest_content = excluded.digest_content,
+        article_count = excluded.article_count,
+        updated_at = excluded.updated_at
+"""
+
+_Q_GET_MERGE = "SELECT result FROM digest_merge_cache WHERE key = ?"
+
+_Q_SAVE_MERGE = """
+    INSERT OR REPLACE INTO digest_merge_cache (key, result, created_at)
+    VALUES (?, ?, ?)
+"""
+
+# Digest fields that change on every run and must not affect the merge cache key
+_VOLATILE_DIGEST_FIELDS = ('generated_at', 'last_updated')
+
+_Q_LOG_GENERATION = """
+    INSERT INTO digest_generation_log 
+    (digest_date, generation_type, topics_processed, total_articles,
+     new_articles, api_calls_made, execution_time_seconds, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
 
 class DigestStateManager:
@@ -26,26 +166,88 @@ class DigestStateManager:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
+        self._conn = None
+        self._lock = threading.Lock()
+        self._migrate_digest_state()
+        self._ensure_indexes()
     
-    def get_digest_state(self, date: str, topic: str) -> Optional[Dict[str, Any]]:
-        """Get existing digest state for a specific date and topic."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def _migrate_digest_state(self):
+        """Rebuild a digest_state table created with a rowid as a WITHOUT ROWID table."""
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'digest_state'"
+                ).fetchone()
+                if row is None or 'WITHOUT ROWID' in row['sql'].upper():
+                    return
+                
+                try:
+                    conn.execute("BEGIN")
+                    conn.execute(_CREATE_DIGEST_STATE.format(name="digest_state_new"))
+                    conn.execute(f"INSERT INTO digest_state_new ({_DIGEST_STATE_COLUMNS}) "
+                                 f"SELECT {_DIGEST_STATE_COLUMNS} FROM digest_state")
+                    conn.execute("DROP TABLE digest_state")
+                    conn.execute("ALTER TABLE digest_state_new RENAME TO digest_state")
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            self.logger.info("Migrated digest_state to a WITHOUT ROWID table")
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not migrate digest_state table: {e}")
+    
+    def _ensure_indexes(self):
+        """
+        Create the merge cache table and the digest_date index that lets
+        clear_old_states avoid a full scan of the generation log.
         
-        cursor = conn.execute("""
-            SELECT processed_article_ids, digest_content, article_count, 
-                   created_at, updated_at
-            FROM digest_state 
-            WHERE digest_date = ? AND topic = ?
-        """, (date, topic))
+        digest_state needs no extra index: its primary key starts with digest_date.
+        """
+        try:
+            with self._lock:
+                self._connection().executescript("""
+                    CREATE TABLE IF NOT EXISTS digest_merge_cache (
+                        key TEXT PRIMARY KEY,
+                        result TEXT NOT NULL,
+                        created_at TEXT NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_digest_merge_cache_created ON digest_merge_cache(created_at);
+                    CREATE INDEX IF NOT EXISTS idx_digest_log_date ON digest_generation_log(digest_date);
+                """)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not create digest state indexes: {e}")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Long-lived database connection, opened on first use. Callers hold self._lock.
         
-        row = cursor.fetchone()
-        conn.close()
+        The connection runs in autocommit mode - multi-statement writes open
+        their own transaction with BEGIN.
+        """
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            for pragma in _PRAGMAS:
+                self._conn.execute(pragma)
+        return self._conn
+    
+    def close(self) -> None:
+        """Close the database connection (it is reopened on next use)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def get_digest_state(self, date: str, topic: str) -> Optional[Dict[str, Any]]:
+        """Get existing digest state for a specific date and topic."""
+        with self._lock:
+            row = self._connection().execute(_Q_GET_STATE, (date, topic)).fetchone()
         
         if row:
             return {
-                'processed_article_ids': json.loads(row['processed_article_ids']),
-                'digest_content': json.loads(row['digest_content']),
+                'processed_article_ids': _unpack_ids(row['processed_article_ids']),
+                'digest_content': loads_json(row['digest_content']),
                 'article_count': row['article_count'],
                 'created_at': row['created_at'],
                 'updated_at': row['updated_at']
@@ -55,208 +257,392 @@ class DigestStateManager:
     def save_digest_state(self, date: str, topic: str, article_ids: List[int], 
                          digest_content: Dict[str, Any]) -> None:
         """Save or update digest state."""
-        conn = sqlite3.connect(self.db_path)
         current_time = datetime.now().isoformat()
         
-        # Check if state exists
-        existing = self.get_digest_state(date, topic)
-        
-        if existing:
-            # Update existing state
-            conn.execute("""
-                UPDATE digest_state 
-                SET processed_article_ids = ?, digest_content = ?, 
-                    article_count = ?, updated_at = ?
-                WHERE digest_date = ? AND topic = ?
-            """, (json.dumps(article_ids), json.dumps(digest_content),
-                  len(article_ids), current_time, date, topic))
-        else:
-            # Insert new state
-            conn.execute("""
-                INSERT INTO digest_state 
-                (digest_date, topic, processed_article_ids, digest_content, 
-                 article_count, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (date, topic, json.dumps(article_ids), json.dumps(digest_content),
-                  len(article_ids), current_time, current_time))
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._connection().execute(_Q_SAVE_STATE, (
+                date, topic, _pack_ids(article_ids), dumps_json(digest_content),
+                len(article_ids), current_time, current_time
+            ))
+    
+    def save_digest_states_bulk(self, date: str,
+                                items: Iterable[Tuple[str, List[int], Dict[str, Any]]]) -> None:
+        """
+        Save or update the digest states of several topics in one transaction.
+        
+        Args:
+            date: Digest date
+            items: (topic, article_ids, digest_content) per topic
+        """
+        current_time = datetime.now().isoformat()
+        rows = [
+            (date, topic, _pack_ids(article_ids), dumps_json(digest_content),
+             len(article_ids), current_time, current_time)
+            for topic, article_ids, digest_content in items
+        ]
+        if not rows:
+            return
+        
+        with self._lock:
+            conn = self._connection()
+            try:
+                conn.execute("BEGIN")
+                conn.executemany(_Q_SAVE_STATE, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
     
     def get_all_digest_states(self, date: str) -> Dict[str, Dict[str, Any]]:
         """Get all digest states for a specific date."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        
-        cursor = conn.execute("""
-            SELECT topic, processed_article_ids, digest_content, article_count,
-                   created_at, updated_at
-            FROM digest_state 
-            WHERE digest_date = ?
-        """, (date,))
+        with self._lock:
+            rows = self._connection().execute(_Q_GET_STATES, (date,)).fetchall()
         
         states = {}
-        for row in cursor.fetchall():
+        for row in rows:
             states[row['topic']] = {
-                'processed_article_ids': json.loads(row['processed_article_ids']),
-                'digest_content': json.loads(row['digest_content']),
+                'processed_article_ids': _unpack_ids(row['processed_article_ids']),
+                'digest_content': loads_json(row['digest_content']),
                 'article_count': row['article_count'],
                 'created_at': row['created_at'],
                 'updated_at': row['updated_at']
             }
         
-        conn.close()
         return states
     
     def clear_old_states(self, days_to_keep: int = 7) -> None:
         """Clear digest states older than specified days."""
         cutoff_date = (datetime.now() - timedelta(days=days_to_keep)).strftime('%Y-%m-%d')
         
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("DELETE FROM digest_state WHERE digest_date < ?", (cutoff_date,))
-        conn.execute("DELETE FROM digest_generation_log WHERE digest_date < ?", (cutoff_date,))
-        conn.commit()
-        conn.close()
+        with self._lock:
+            conn = self._connection()
+            try:
+                conn.execute("BEGIN")
+                conn.execute("DELETE FROM digest_state WHERE digest_date < ?", (cutoff_date,))
+                conn.execute("DELETE FROM digest_generation_log WHERE digest_date < ?", (cutoff_date,))
+                # created_at is an ISO timestamp, so it sorts against the plain cutoff date
+                conn.execute("DELETE FROM digest_merge_cache WHERE created_at < ?", (cutoff_date,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            # Refresh planner statistics the deletes may have invalidated
+            conn.execute("PRAGMA optimize")
         
         self.logger.info(f"Cleared digest states older than {cutoff_date}")
 
+    def get_cached_merge(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a previously merged digest by its cache key."""
+        with self._lock:
+            row = self._connection().execute(_Q_GET_MERGE, (key,)).fetchone()
+        return loads_json(row['result']) if row else None
+    
+    def cache_merge(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a merged digest under its cache key."""
+        with self._lock:
+            self._connection().execute(_Q_SAVE_MERGE, (key, dumps_json(result), datetime.now().isoformat()))
+
     def log_generation(self, date: str, generation_type: str, topics_processed: int,
                       total_articles: int, new_articles: int = 0, 
                       api_calls: int = 0, execution_time: float = 0.0) -> None:
         """Log digest generation statistics."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            INSERT INTO digest_generation_log 
-            (digest_date, generation_type, topics_processed, total_articles,
-             new_articles, api_calls_made, execution_time_seconds, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (date, generation_type, topics_processed, total_articles,
-              new_articles, api_calls, execution_time, datetime.now().isoformat()))
-        conn.commit()
-        conn.close()
-
-
-class IncrementalDigestGenerator:
+        with self._lock:
+            self._connection().execute(_Q_LOG_GENERATION, (
+                date, generation_type, topics_processed, total_articles,
+                new_articles, api_calls, execution_time, datetime.now().isoformat()
+            ))
+
+
+class IncrementalDigestGenerator(EventLoopMixin):
     """Generates incremental digests by processing only new articles."""
     
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.client = OpenAI()
+        # Retries are handled by _stream_completion
+        self.async_client = AsyncOpenAI(max_retries=0)
+        # Event loop of the sync entry points, created on first use (see _run)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self.model = os.getenv("MODEL_MINI", "gpt-4o-mini")
+        # Seconds one streamed digest response may take before the topic is given up
+        self.request_timeout = float(os.getenv("DIGEST_REQUEST_TIMEOUT", "120"))
+        
+        # Generate partial digests through the Batch API (half price, up to 24h) - for scheduled runs
+        self.use_batch_api = os.getenv('DIGEST_USE_BATCH_API', '').lower() in ('1', 'true', 'yes')
         self.state_manager = DigestStateManager(db_path)
         self.logger = logging.getLogger(__name__)
         
         # Initialize prompt library for German prompts
         lang_config = LanguageConfig("de")
         self.prompt_lib = PromptLibrary(lang_config)
+        
+        self._conn = None
+        self._ensure_indexes()
+    
+    def _ensure_indexes(self):
+        """Create the indexes backing the new-articles-per-topic query."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.executescript("""
+                    CREATE INDEX IF NOT EXISTS idx_summaries_topic_covered
+                        ON summaries(topic, topic_already_covered, item_id);
+                    CREATE INDEX IF NOT EXISTS idx_items_published_at ON items(published_at);
+                    CREATE INDEX IF NOT EXISTS idx_ac_article ON article_clusters(article_id, is_primary);
+                """)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not create incremental digest indexes: {e}")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Read connection for the new-articles query, opened on first use and kept for every topic."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            for pragma in _PRAGMAS:
+                self._conn.execute(pragma)
+        return self._conn
+    
+    def close(self) -> None:
+        """Close the async client, the event loop and the database connections."""
+        if self._loop is not None:
+            self._loop.run_until_complete(self.async_client.close())
+            self._loop.close()
+            self._loop = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.state_manager.close()
     
     def get_new_articles_for_topic(self, topic: str, date: str, 
                                   processed_ids: Set[int]) -> List[Dict[str, Any]]:
         """Get articles for topic that haven't been processed yet."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = self._connection()
+        
+        # Half-open range of the day's ISO-8601 timestamp strings - unlike DATE(published_at) = ?
+        # it can use the published_at index. It matches the local calendar date as written:
+        # '...T00:38:08+02:00' belongs to that day, where DATE() converted offset timestamps
+        # to UTC and moved it to the previous day's digest
+        day_end = (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        
+        # Exclude processed_ids in SQL rather than fetching and dropping them here
+        params = [topic, date, day_end]
+        exclude_processed = ""
+        if len(processed_ids) > _MAX_INLINE_IDS:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS processed(id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.processed")
+            conn.executemany("INSERT INTO processed VALUES (?)", ((article_id,) for article_id in processed_ids))
+            exclude_processed = "AND i.id NOT IN (SELECT id FROM temp.processed)"
+        elif processed_ids:
+            exclude_processed = f"AND i.id NOT IN ({','.join('?' * len(processed_ids))})"
+            params.extend(processed_ids)
         
         # Get articles from the specified date that aren't in processed_ids
-        cursor = conn.execute("""
+        cursor = conn.execute(f"""
             SELECT i.id, i.url, i.title, i.source, i.published_at,
-                   s.summary, s.key_points_json, s.entities_json
+                   s.summary,
+                   -- Only the first three key points are sent to the model
+                   (SELECT json_group_array(value) FROM json_each(NULLIF(s.key_points_json, ''))
+                    WHERE key < 3) AS key_points_top3
             FROM items i
             JOIN summaries s ON i.id = s.item_id
             LEFT JOIN article_clusters ac ON i.id = ac.article_id
             WHERE s.topic = ? 
-            AND DATE(i.published_at) = ?
+            AND i.published_at >= ? AND i.published_at < ?
             AND COALESCE(s.topic_already_covered, 0) = 0
             AND (ac.is_primary = 1 OR ac.article_id IS NULL)
+            {exclude_processed}
             ORDER BY i.triage_confidence DESC, s.created_at DESC
-        """, (topic, date))
+        """, params)
         
         new_articles = []
         for row in cursor.fetchall():
-            if row['id'] not in processed_ids:
-                # Parse JSON fields
-                key_points = json.loads(row['key_points_json']) if row['key_points_json'] else []
-                entities = json.loads(row['entities_json']) if row['entities_json'] else {}
-                
-                new_articles.append({
-                    'id': row['id'],
-                    'url': row['url'],
-                    'title': row['title'],
-                    'source': row['source'],
-                    'published_at': row['published_at'],
-                    'summary': row['summary'],
-                    'key_points': key_points,
-                    'entities': entities
-                })
+            # Parse JSON fields (entities are not used for digests and stay unloaded)
+            key_points = loads_json(row['key_points_top3'])
+            
+            new_articles.append({
+                'id': row['id'],
+                'url': row['url'],
+                'title': row['title'],
+                'source': row['source'],
+                'published_at': row['published_at'],
+                'summary': row['summary'],
+                'key_points': key_points
+            })
         
-        conn.close()
         return new_articles
     
+    # System prompts come from the prompt library; resolved on first use, then reused for every topic
+    @cached_property
+    def _partial_digest_system_prompt(self) -> str:
+        return self.prompt_lib.get_fragment('digest', 'partial_digest_generation')
+    
+    @cached_property
+    def _merge_digests_system_prompt(self) -> str:
+        return self.prompt_lib.get_fragment('digest', 'merge_digests')
+    
+    def _partial_digest_request(self, topic: str, new_articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the Chat Completions request body for a topic's partial digest."""
+        system_prompt = self._partial_digest_system_prompt
+
+        # Prepare input data
+        input_data = {
+            'topic': topic,
+            'new_article_count': len(new_articles),
+            'articles': []
+        }
+        
+        for article in new_articles:
+            input_data['articles'].append({
+                'title': article['title'],
+                'url': article['url'],
+                'source': article['source'],
+                'summary': article['summary'],
+                'key_points': article['key_points']  # top 3, cut in SQL
+            })
+        
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": dumps_json(input_data)}
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "partial_digest",
+                    "schema": _PARTIAL_DIGEST_SCHEMA,
+                    "strict": True
+                }
+            }
+        }
+    
+    def _parse_partial_digest(self, response_content: Optional[str], article_count: int) -> Dict[str, Any]:
+        """
+        Turn a partial digest response into the partial digest dict.
+        
+        Raises ValueError on an empty response, or (with fastjsonschema installed)
+        on one that does not match the partial digest schema.
+        """
+        if not response_content:
+            raise ValueError("OpenAI response content is empty")
+        
+        result = loads_json(response_content)
+        if _validate_partial_digest is not None:
+            _validate_partial_digest(result)
+        result['article_count'] = article_count
+        result['generated_at'] = datetime.now().isoformat()
+        
+        return result
+    
+    async def _stream_completion(self, request: Dict[str, Any]) -> str:
+        """
+        Send a Chat Completions request through the async client and return the
+        streamed message content.
+        
+        Rate limits, timeouts, connection and server errors are retried up to
+        MAX_GPT_ATTEMPTS times with randomized exponential backoff. A response
+        taking longer than request_timeout raises asyncio.TimeoutError, so one
+        slow topic cannot hold up the others.
+        """
+        async def read_stream():
+            stream = await self.async_client.chat.completions.create(**request, stream=True)
+            parts = []
+            async for chunk in stream:
+                if chunk.choices:
+                    parts.append(chunk.choices[0].delta.content or "")
+            return "".join(parts)
+        
+        for attempt in range(1, MAX_GPT_ATTEMPTS + 1):
+            try:
+                return await asyncio.wait_for(read_stream(), timeout=self.request_timeout)
+            except RETRYABLE_GPT_ERRORS as e:
+                if attempt == MAX_GPT_ATTEMPTS:
+                    raise
+                wait = retry_wait(attempt, e)
+                self.logger.debug("OpenAI call failed (attempt %d), retrying in %.1fs: %s", attempt, wait, e)
+                await asyncio.sleep(wait)
+    
     def generate_partial_digest(self, topic: str, new_articles: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Generate digest content for new articles only."""
+        return self._run(self.generate_partial_digest_async(topic, new_articles))
+    
+    async def generate_partial_digest_async(self, topic: str,
+                                            new_articles: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Async variant of generate_partial_digest, used to generate topics concurrently."""
         if not new_articles:
             return None
             
         try:
-            # Use prompt library for system prompt
-            system_prompt = self.prompt_lib.get_fragment('digest', 'partial_digest_generation')
-
-            # Prepare input data
-            input_data = {
-                'topic': topic,
-                'new_article_count': len(new_articles),
-                'articles': []
-            }
+            response_content = await self._stream_completion(self._partial_digest_request(topic, new_articles))
+            return self._parse_partial_digest(response_content, len(new_articles))
             
-            for article in new_articles:
-                input_data['articles'].append({
-                    'title': article['title'],
-                    'url': article['url'],
-                    'source': article['source'],
-                    'summary': article['summary'],
-                    'key_points': article['key_points'][:3]
+        except Exception as e:
+            self.logger.error(f"Error generating partial digest for {topic}: {e}")
+            return None
+    
+    def generate_all_partial_digests(self, topic_to_articles: Dict[str, List[Dict[str, Any]]]
+                                     ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Generate the partial digests of several topics as one OpenAI Batch API job.
+        
+        Batch requests cost half as much but may take up to 24h, so this blocks
+        until the batch has finished - meant for scheduled runs.
+        
+        Returns:
+            Partial digest per topic with new articles (None where generation failed)
+        """
+        topics = [topic for topic, articles in topic_to_articles.items() if articles]
+        results = {topic: None for topic in topics}
+        if not topics:
+            return results
+        
+        try:
+            lines = [
+                dumps_json({
+                    "custom_id": f"topic{n}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._partial_digest_request(topic, topic_to_articles[topic])
                 })
-            
-            response_schema = {
-                "type": "object",
-                "properties": {
-                    "key_insights": {"type": "array", "items": {"type": "string"}, "maxItems": 5},
-                    "important_developments": {"type": "array", "items": {"type": "string"}, "maxItems": 3},
-                    "new_sources": {"type": "array", "items": {"type": "string"}},
-                    "entities_mentioned": {"type": "array", "items": {"type": "string"}}
-                },
-                "required": ["key_insights", "important_developments", "new_sources", "entities_mentioned"],
-                "additionalProperties": False
-            }
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps(input_data)}
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "partial_digest",
-                        "schema": response_schema,
-                        "strict": True
-                    }
-                }
+                for n, topic in enumerate(topics)
+            ]
+            batch_file = self.client.files.create(
+                file=("partial_digests.jsonl", "\n".join(lines).encode('utf-8')), purpose="batch"
             )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+            )
+            self.logger.info(f"Submitted partial digest batch {batch.id} for {len(topics)} topics")
             
-            response_content = response.choices[0].message.content
-            if response_content is None:
-                raise ValueError("OpenAI response content is None")
-            
-            result = json.loads(response_content)
-            result['article_count'] = len(new_articles)
-            result['generated_at'] = datetime.now().isoformat()
-            
-            return result
+            while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+                time.sleep(_BATCH_POLL_INTERVAL)
+                batch = self.client.batches.retrieve(batch.id)
             
+            if batch.status != 'completed':
+                self.logger.error(f"Partial digest batch {batch.id} ended with status '{batch.status}'")
+                return results
+            output = self.client.files.content(batch.output_file_id).text
         except Exception as e:
-            self.logger.error(f"Error generating partial digest for {topic}: {e}")
-            return None
+            self.logger.error(f"Error running partial digest batch: {e}")
+            return results
+        
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = loads_json(line)
+            topic = topics[int(result['custom_id'][len('topic'):])]
+            response = result.get('response') or {}
+            try:
+                if result.get('error') or response.get('status_code') != 200:
+                    raise ValueError(result.get('error') or f"status {response.get('status_code')}")
+                content = response['body']['choices'][0]['message']['content']
+                results[topic] = self._parse_partial_digest(content, len(topic_to_articles[topic]))
+            except Exception as e:
+                self.logger.error(f"Error generating partial digest for {topic}: {e}")
+        
+        return results
     
     def merge_digests(self, existing_digest: Dict[str, Any], 
                      partial_digest: Dict[str, Any], topic: str) -> Dict[str, Any]:
@@ -267,15 +653,41 @@ class IncrementalDigestGenerator:
         'bullets' and 'executive_summary' fields. These fields are silently
         dropped in the merged output.
         """
+        return self._run(self.merge_digests_async(existing_digest, partial_digest, topic))
+    
+    @staticmethod
+    def _merge_cache_key(existing_digest: Dict[str, Any], partial_digest: Dict[str, Any],
+                         topic: str) -> str:
+        """Content hash of a merge's inputs, ignoring timestamps that differ between runs."""
+        def stable(digest):
+            return {k: v for k, v in digest.items() if k not in _VOLATILE_DIGEST_FIELDS}
+        payload = dumps_json([stable(existing_digest), stable(partial_digest), topic])
+        return hashlib.blake2b(payload.encode('utf-8')).hexdigest()
+    
+    async def merge_digests_async(self, existing_digest: Dict[str, Any],
+                                  partial_digest: Dict[str, Any], topic: str) -> Dict[str, Any]:
+        """
+        Async variant of merge_digests, used to merge topics concurrently.
+        
+        Merges are cached by their inputs, so re-running the same merge (retries,
+        manual re-runs) does not call the model again.
+        """
         try:
+            cache_key = self._merge_cache_key(existing_digest, partial_digest, topic)
+            cached = self.state_manager.get_cached_merge(cache_key)
+            if cached is not None:
+                self.logger.info(f"Using cached merged digest for {topic}")
+                # The key ignores timestamps, so report this run's time like a fresh merge
+                now = datetime.now().isoformat()
+                return {**cached, 'generated_at': now, 'last_updated': now}
+            
             # Check for old format and log warning
             if 'bullets' in existing_digest:
                 self.logger.warning(f"Old format detected in existing digest for {topic}: contains 'bullets' field (will be dropped)")
             if 'executive_summary' in existing_digest:
                 self.logger.warning(f"Old format detected in existing digest for {topic}: contains 'executive_summary' field (will be dropped)")
             
-            # Use prompt library for system prompt
-            system_prompt = self.prompt_lib.get_fragment('digest', 'merge_digests')
+            system_prompt = self._merge_digests_system_prompt
 
             input_data = {
                 'topic': topic,
@@ -284,38 +696,28 @@ class IncrementalDigestGenerator:
                 'total_articles': existing_digest.get('article_count', 0) + partial_digest.get('article_count', 0)
             }
             
-            response_schema = {
-                "type": "object",
-                "properties": {
-                    "headline": {"type": "string"},
-                    "why_it_matters": {"type": "string"},
-                    "sources": {"type": "array", "items": {"type": "string"}}
-                },
-                "required": ["headline", "why_it_matters", "sources"],
-                "additionalProperties": False
-            }
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            response_content = await self._stream_completion({
+                "model": self.model,
+                "messages": [
                     {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps(input_data)}
+                    {"role": "user", "content": dumps_json(input_data)}
                 ],
-                response_format={
+                "response_format": {
                     "type": "json_schema",
                     "json_schema": {
                         "name": "merged_digest",
-                        "schema": response_schema,
+                        "schema": _MERGED_DIGEST_SCHEMA,
                         "strict": True
                     }
                 }
-            )
+            })
             
-            response_content = response.choices[0].message.content
-            if response_content is None:
-                raise ValueError("OpenAI response content is None")
+            if not response_content:
+                raise ValueError("OpenAI response content is empty")
             
-            result = json.loads(response_content)
+            result = loads_json(response_content)
+            if _validate_merged_digest is not None:
+                _validate_merged_digest(result)
             
             # Add metadata
             result.update({
@@ -326,6 +728,7 @@ class IncrementalDigestGenerator:
                 'last_updated': datetime.now().isoformat()
             })
             
+            self.state_manager.cache_merge(cache_key, result)
             return result
             
         except Exception as e:
@@ -335,13 +738,9 @@ class IncrementalDigestGenerator:
             existing_digest['last_updated'] = datetime.now().isoformat()
             return existing_digest
     
-    def generate_incremental_topic_digest(self, topic: str, date: str) -> Tuple[Dict[str, Any], bool]:
-        """
-        Generate or update topic digest incrementally.
-        
-        Returns:
-            Tuple of (digest_dict, was_updated)
-        """
+    def _load_topic_state(self, topic: str, date: str
+                          ) -> Tuple[Set[int], Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Get the processed article IDs, existing digest and new articles of a topic."""
         # Get existing state
         existing_state = self.state_manager.get_digest_state(date, topic)
         
@@ -355,6 +754,86 @@ class IncrementalDigestGenerator:
         # Get new articles
         new_articles = self.get_new_articles_for_topic(topic, date, processed_ids)
         
+        return processed_ids, existing_digest, new_articles
+    
+    def generate_incremental_topic_digest(self, topic: str, date: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Generate or update topic digest incrementally.
+        
+        Returns:
+            Tuple of (digest_dict, was_updated)
+        """
+        processed_ids, existing_digest, new_articles = self._load_topic_state(topic, date)
+        partial_digest = self.generate_partial_digest(topic, new_articles)
+        return self._complete_topic_digest(topic, date, processed_ids, existing_digest,
+                                           new_articles, partial_digest)
+    
+    def generate_incremental_topic_digests(self, topics: List[str], date: str
+                                           ) -> Dict[str, Tuple[Dict[str, Any], bool]]:
+        """
+        Generate or update the digests of several topics incrementally.
+        
+        With use_batch_api the partial digests of all topics go out as one
+        Batch API job; otherwise they are generated concurrently. Merges into
+        existing digests always run concurrently.
+        
+        Returns:
+            Tuple of (digest_dict, was_updated) per topic
+        """
+        states = {topic: self._load_topic_state(topic, date) for topic in topics}
+        
+        partial_digests = None
+        if self.use_batch_api:
+            partial_digests = self.generate_all_partial_digests(
+                {topic: state[2] for topic, state in states.items() if state[2]}
+            )
+        updates = self._run(self._generate_digest_updates(states, partial_digests))
+        
+        pending_saves = []
+        results = {
+            topic: self._complete_topic_digest(topic, date, *states[topic], *updates.get(topic, (None, None)),
+                                               pending_saves=pending_saves)
+            for topic in topics
+        }
+        self.state_manager.save_digest_states_bulk(date, pending_saves)
+        return results
+    
+    async def _generate_digest_updates(self, states: Dict[str, Tuple[Set[int], Optional[Dict[str, Any]], List[Dict[str, Any]]]],
+                                       partial_digests: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+                                       ) -> Dict[str, Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """
+        Generate the partial digest (unless given) and merged digest of every topic with new articles, concurrently.
+        
+        Returns:
+            Tuple of (partial_digest, merged_digest) per topic, merged_digest being None for new digests
+        """
+        async def update(topic, existing_digest, new_articles):
+            if partial_digests is not None:
+                partial_digest = partial_digests.get(topic)
+            else:
+                partial_digest = await self.generate_partial_digest_async(topic, new_articles)
+            merged_digest = None
+            if partial_digest and existing_digest:
+                merged_digest = await self.merge_digests_async(existing_digest, partial_digest, topic)
+            return topic, (partial_digest, merged_digest)
+        
+        updates = await asyncio.gather(*(
+            update(topic, existing_digest, new_articles)
+            for topic, (_, existing_digest, new_articles) in states.items() if new_articles
+        ))
+        return dict(updates)
+    
+    def _complete_topic_digest(self, topic: str, date: str, processed_ids: Set[int],
+                               existing_digest: Optional[Dict[str, Any]], new_articles: List[Dict[str, Any]],
+                               partial_digest: Optional[Dict[str, Any]],
+                               merged_digest: Optional[Dict[str, Any]] = None,
+                               pending_saves: Optional[List[Tuple[str, List[int], Dict[str, Any]]]] = None
+                               ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Merge a topic's partial digest into its existing digest (unless merged_digest
+        is given) and save the new state - or append it to pending_saves for the
+        caller to save in bulk.
+        """
         if not new_articles:
             # No new articles, return existing digest
             if existing_digest:
@@ -374,8 +853,6 @@ class IncrementalDigestGenerator:
                     'generated_at': datetime.now().isoformat()
                 }, False
         
-        # Generate partial digest for new articles
-        partial_digest = self.generate_partial_digest(topic, new_articles)
         if not partial_digest:
             # Failed to generate partial digest, return existing if available
             return existing_digest or {}, False
@@ -383,7 +860,9 @@ class IncrementalDigestGenerator:
         # Merge with existing or create new digest
         was_updated = True
         if existing_digest:
-            final_digest = self.merge_digests(existing_digest, partial_digest, topic)
+            if merged_digest is None:
+                merged_digest = self.merge_digests(existing_digest, partial_digest, topic)
+            final_digest = merged_digest
             # surface how many were new in THIS run for KPI accuracy
             final_digest['new_articles_count'] = len(partial_digest.get('new_articles', [])) if 'new_articles' in partial_digest else len(new_articles)
         else:
@@ -397,6 +876,9 @@ class IncrementalDigestGenerator:
         all_processed_ids = list(processed_ids) + [a['id'] for a in new_articles]
         
         # Save state
-        self.state_manager.save_digest_state(date, topic, all_processed_ids, final_digest)
+        if pending_saves is not None:
+            pending_saves.append((topic, all_processed_ids, final_digest))
+        else:
+            self.state_manager.save_digest_state(date, topic, all_processed_ids, final_digest)
         
         return final_digest, was_updated
@@ -9,12 +9,34 @@ This module now focuses solely on language selection and configuration.
 """
 
 import os
-from typing import Dict, Any
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+# Display name per supported language
+_LANGUAGE_NAMES = MappingProxyType({'de': "Deutsch", 'en': "English"})
+
+# Output format instructions per language (read-only, shared by all instances)
+_OUTPUT_FORMAT_INSTRUCTIONS = {
+    'de': MappingProxyType({
+        "json_instruction": "Antworten Sie mit einem gültigen JSON-Objekt im angegebenen Schema.",
+        "markdown_instruction": "Formatieren Sie die Ausgabe als gut strukturiertes Markdown.",
+        "bullet_format": "Verwenden Sie Aufzählungszeichen (•) für Listen.",
+        "emphasis": "Verwenden Sie **Fettschrift** für wichtige Begriffe."
+    }),
+    'en': MappingProxyType({
+        "json_instruction": "Respond with a valid JSON object following the specified schema.",
+        "markdown_instruction": "Format the output as well-structured Markdown.",
+        "bullet_format": "Use bullet points (•) for lists.",
+        "emphasis": "Use **bold** for important terms."
+    }),
+}
+
+
 class LanguageConfig:
     """
     Centralized language configuration for the news analysis pipeline.
@@ -35,7 +57,7 @@ class LanguageConfig:
             language = os.getenv("PIPELINE_LANGUAGE", "en")
         
         self.language = language.lower()
-        if self.language not in ['de', 'en']:
+        if self.language not in _LANGUAGE_NAMES:
             raise ValueError(f"Unsupported language: {language}. Supported: 'de', 'en'")
     
     def is_german(self) -> bool:
@@ -52,40 +74,34 @@ class LanguageConfig:
     
     def get_language_name(self) -> str:
         """Get the current language name."""
-        return "Deutsch" if self.language == 'de' else "English"
+        return _LANGUAGE_NAMES[self.language]
     
-    def get_output_format_instructions(self) -> Dict[str, str]:
-        """Get output format instructions in the configured language."""
-        if self.language == 'de':
-            return {
-                "json_instruction": "Antworten Sie mit einem gültigen JSON-Objekt im angegebenen Schema.",
-                "markdown_instruction": "Formatieren Sie die Ausgabe als gut strukturiertes Markdown.",
-                "bullet_format": "Verwenden Sie Aufzählungszeichen (•) für Listen.",
-                "emphasis": "Verwenden Sie **Fettschrift** für wichtige Begriffe."
-            }
-        else:
-            return {
-                "json_instruction": "Respond with a valid JSON object following the specified schema.",
-                "markdown_instruction": "Format the output as well-structured Markdown.",
-                "bullet_format": "Use bullet points (•) for lists.",
-                "emphasis": "Use **bold** for important terms."
-            }
+    def get_output_format_instructions(self) -> Mapping[str, str]:
+        """Get output format instructions in the configured language (read-only)."""
+        return _OUTPUT_FORMAT_INSTRUCTIONS[self.language]
 
 
 # Global instance for easy access
 _global_language_config = None
+_global_language_config_lock = threading.Lock()
 
 def get_language_config() -> LanguageConfig:
-    """Get the global language configuration instance."""
+    """Get the global language configuration instance (created once, also across threads)."""
     global _global_language_config
-    if _global_language_config is None:
-        _global_language_config = LanguageConfig()
-    return _global_language_config
+    config = _global_language_config
+    if config is None:
+        with _global_language_config_lock:
+            if _global_language_config is None:
+                _global_language_config = LanguageConfig()
+            config = _global_language_config
+    return config
 
 def set_language(language: str) -> None:
     """Set the global language configuration."""
     global _global_language_config
-    _global_language_config = LanguageConfig(language)
+    config = LanguageConfig(language)
+    with _global_language_config_lock:
+        _global_language_config = config
 
 def is_german_mode() -> bool:
     """Check if the pipeline is configured for German output."""
@@ -6,16 +6,19 @@ making the application work regardless of the current working directory.
 Solves the common issue where Task Scheduler runs processes from C:\Windows\System32.
 """
 
+from functools import lru_cache
 from pathlib import Path
 import os
 
 
+@lru_cache(maxsize=1)
 def project_root() -> Path:
     """
     Get the project root directory (NewsAnalysis_2.0 folder).
     
     This function locates the project root by looking for characteristic files
-    like setup.py, requirements.txt, or the news_pipeline directory.
+    like setup.py, requirements.txt, or the news_pipeline directory. The search
+    runs once per process; later calls return the cached result.
     
     Returns:
         Path: Absolute path to the project root
@@ -36,8 +39,15 @@ def project_root() -> Path:
         "news_pipeline/__init__.py"
     ]
     
+    # One directory listing answers the top-level markers; nested ones fall back to exists()
+    try:
+        with os.scandir(project_dir) as entries:
+            top_level = {entry.name for entry in entries}
+    except OSError:
+        top_level = set()
+    
     for marker in markers:
-        if (project_dir / marker).exists():
+        if marker in top_level or ('/' in marker and (project_dir / marker).exists()):
             return project_dir
     
     # If we can't find markers, raise an error with helpful information
@@ -123,19 +133,21 @@ def safe_open(path, mode: str = 'r', **kwargs):
     if isinstance(path, str):
         path = Path(path)
     
-    if 'w' not in mode and 'a' not in mode and not path.exists():
+    # Ensure parent directory exists for write operations
+    if 'w' in mode or 'a' in mode:
+        ensure_parent_dir(path)
+        return open(path, mode, **kwargs)
+    
+    # Just open - a separate exists() check would stat the file a second time
+    try:
+        return open(path, mode, **kwargs)
+    except FileNotFoundError as e:
         raise FileNotFoundError(
             f"Required file not found: {path}\n"
             f"Project root: {project_root()}\n"
             f"Current working directory: {Path.cwd()}\n"
             f"Expected absolute path: {path.resolve()}"
-        )
-    
-    # Ensure parent directory exists for write operations
-    if 'w' in mode or 'a' in mode:
-        ensure_parent_dir(path)
-    
-    return open(path, mode, **kwargs)
+        ) from e
 
 
 # Convenience functions for common paths
@@ -25,17 +25,59 @@ Usage:
     rating = prompt_lib.formatting.rating_prompt()
 """
 
+import json
 import yaml
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional, TYPE_CHECKING
+from typing import Callable, Dict, Any, Iterable, Mapping, Optional, Tuple, TYPE_CHECKING
+
+from news_pipeline.paths import config_path
 
 if TYPE_CHECKING:
     from news_pipeline.language_config import LanguageConfig
 
+# libyaml's C loader when PyYAML was built with it (several times faster), else the pure-Python one
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 # Set up logger for this module
 logger = logging.getLogger(__name__)
 
+# Merged, pre-parsed copy of the prompt YAML files (see scripts/compile_prompts.py);
+# used only while it is newer than every YAML file in the prompts directory
+COMPILED_PROMPTS_FILE = "_compiled.json"
+
+# Stage files loaded up front by PromptLibrary(..., eager=True)
+PIPELINE_STAGES = ("filtering", "deduplication", "analysis", "formatting", "digest")
+
+
+def write_compiled_prompts(prompts_dir: Optional[Path] = None) -> Path:
+    """
+    Parse every prompt YAML file once and write them merged into COMPILED_PROMPTS_FILE.
+    
+    Args:
+        prompts_dir: Prompts directory (default: config/prompts)
+        
+    Returns:
+        Path of the written file
+    """
+    prompts_dir = Path(prompts_dir) if prompts_dir is not None else config_path("prompts")
+    compiled = {"stages": {}, "fragments": {}}
+    for yaml_path in sorted(prompts_dir.glob("*.yaml")):
+        with open(yaml_path, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=_YamlLoader) or {}
+        if yaml_path.stem == "fragments":
+            compiled["fragments"] = data
+        else:
+            compiled["stages"][yaml_path.stem] = data
+    
+    target = prompts_dir / COMPILED_PROMPTS_FILE
+    with open(target, 'w', encoding='utf-8') as f:
+        json.dump(compiled, f, ensure_ascii=False)
+    return target
+
 
 class PromptLibrary:
     """
@@ -58,16 +100,32 @@ class PromptLibrary:
         >>> prompt = prompt_lib.filtering.classification_prompt(topic="creditreform")
     """
     
-    def __init__(self, language_config: 'LanguageConfig') -> None:
+    def __init__(self, language_config: 'LanguageConfig', eager: bool = False,
+                 prompts_dir: Optional[Path] = None) -> None:
         """
         Initialize PromptLibrary with language configuration.
         
         Args:
             language_config: LanguageConfig instance for language-aware prompt retrieval
+            eager: Load the fragments and all pipeline stage prompts now, instead of
+                   on first use (keeps file parsing out of the first per-article call)
+            prompts_dir: Directory of the prompt YAML files (default: config/prompts)
         """
         self._language_config = language_config
         self._cache: Dict[str, Dict[str, Any]] = {}
-        self._prompts_dir = Path("config/prompts")
+        # Per stage, built when its YAML is loaded: template text and its bound format_map
+        self._templates: Dict[str, Dict[str, str]] = {}
+        self._compiled: Dict[str, Dict[str, Callable[[Mapping[str, Any]], str]]] = {}
+        # Formatted topic prompts by (stage, prompt name, topic) - topics are a small fixed set
+        self._topic_prompts: Dict[Tuple[str, str, str], str] = {}
+        # Resolved against the project root once, so loading works from any working directory
+        self._prompts_dir = Path(prompts_dir) if prompts_dir is not None else config_path("prompts")
+        self._stage_files: Dict[str, Path] = {
+            stage: self._prompts_dir / f"{stage}.yaml" for stage in PIPELINE_STAGES
+        }
+        self._exists_cache: Dict[Path, bool] = {}
+        # Contents of COMPILED_PROMPTS_FILE, read on first use ({} when missing or stale)
+        self._precompiled: Optional[Dict[str, Any]] = None
         
         # Initialize pipeline stage subclasses
         self.filtering = FilteringPrompts(self, language_config)
@@ -76,6 +134,9 @@ class PromptLibrary:
         self.formatting = FormattingPrompts(self, language_config)
         self.digest = DigestPrompts(self, language_config)
         
+        if eager:
+            self.preload()
+        
         logger.info(f"PromptLibrary initialized with language: {language_config.get_language_name()}")
     
     def get_fragment(self, category: str, fragment_name: str) -> str:
@@ -103,24 +164,7 @@ class PromptLibrary:
         """
         # Lazy load fragments on first use
         if not hasattr(self, '_fragments'):
-            fragments_path = self._prompts_dir / "fragments.yaml"
-            
-            if not fragments_path.exists():
-                raise FileNotFoundError(
-                    f"Fragments file not found: {fragments_path}. "
-                    f"Please ensure config/prompts/fragments.yaml exists."
-                )
-            
-            try:
-                with open(fragments_path, 'r', encoding='utf-8') as f:
-                    self._fragments = yaml.safe_load(f) or {}
-                    logger.debug(f"Loaded {len(self._fragments)} fragment categories")
-            except yaml.YAMLError as e:
-                logger.error(f"Error parsing fragments YAML: {e}")
-                raise
-            except Exception as e:
-                logger.error(f"Error loading fragments file: {e}")
-                raise
+            self._load_fragments()
         
         # Validate category exists
         if category not in self._fragments:
@@ -140,6 +184,53 @@ class PromptLibrary:
         
         return self._fragments[category][fragment_name]
     
+    def _load_fragments(self) -> None:
+        """Load config/prompts/fragments.yaml (or its precompiled copy) into self._fragments."""
+        precompiled = self._load_precompiled().get("fragments")
+        if precompiled is not None:
+            self._fragments = precompiled
+            return
+        
+        fragments_path = self._prompts_dir / "fragments.yaml"
+        
+        if not self._path_exists(fragments_path):
+            raise FileNotFoundError(
+                f"Fragments file not found: {fragments_path}. "
+                f"Please ensure config/prompts/fragments.yaml exists."
+            )
+        
+        try:
+            with open(fragments_path, 'r', encoding='utf-8') as f:
+                self._fragments = yaml.load(f, Loader=_YamlLoader) or {}
+                logger.debug(f"Loaded {len(self._fragments)} fragment categories")
+        except yaml.YAMLError as e:
+            logger.error(f"Error parsing fragments YAML: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error loading fragments file: {e}")
+            raise
+    
+    def preload(self, stages: Iterable[str] = PIPELINE_STAGES) -> None:
+        """
+        Load the fragments and the prompts of the given stages now.
+        
+        Files that do not exist are skipped here; using them still raises
+        FileNotFoundError as with lazy loading.
+        
+        Args:
+            stages: Stages to load (default: every pipeline stage; empty for fragments only)
+        """
+        try:
+            self._load_fragments()
+        except FileNotFoundError as e:
+            logger.debug(f"Skipping fragments preload: {e}")
+        
+        for stage in stages:
+            try:
+                self._load_stage_prompts(stage)
+            except FileNotFoundError as e:
+                logger.debug(f"Skipping {stage} prompts preload: {e}")
+    
     def get_prompt(self, stage: str, prompt_name: str) -> str:
         """
         Retrieve a prompt template from YAML configuration.
@@ -159,21 +250,59 @@ class PromptLibrary:
             >>> template = prompt_lib.get_prompt("filtering", "classification_prompt")
             >>> prompt = template.format(topic="creditreform")
         """
-        stage_prompts = self._load_stage_prompts(stage)
+        if stage not in self._templates:
+            self._load_stage_prompts(stage)
         
-        if prompt_name not in stage_prompts:
-            available = ", ".join(stage_prompts.keys())
-            raise KeyError(
-                f"Prompt '{prompt_name}' not found in {stage}.yaml. "
-                f"Available prompts: {available}"
-            )
+        try:
+            return self._templates[stage][prompt_name]
+        except KeyError:
+            raise self._missing_prompt(stage, prompt_name) from None
+    
+    def format_prompt(self, stage: str, prompt_name: str, **params: Any) -> str:
+        """
+        Retrieve a prompt template and fill in its {parameter} placeholders.
         
-        prompt_config = stage_prompts[prompt_name]
+        Args:
+            stage: Pipeline stage name (e.g., 'filtering', 'digest')
+            prompt_name: Name of the prompt to retrieve
+            **params: Values for the template placeholders
+            
+        Returns:
+            Formatted prompt ready for GPT API
+            
+        Raises:
+            KeyError: If prompt_name not found in stage configuration
+            
+        Example:
+            >>> prompt = prompt_lib.format_prompt("filtering", "classification_prompt", topic="creditreform")
+        """
+        if stage not in self._compiled:
+            self._load_stage_prompts(stage)
         
-        # Handle both simple string templates and dictionary configs
-        if isinstance(prompt_config, dict):
-            return prompt_config.get("template", "")
-        return prompt_config
+        try:
+            format_map = self._compiled[stage][prompt_name]
+        except KeyError:
+            raise self._missing_prompt(stage, prompt_name) from None
+        return format_map(params)
+    
+    def format_topic_prompt(self, stage: str, prompt_name: str, topic: str) -> str:
+        """
+        format_prompt for prompts whose only parameter is the topic, formatted
+        once per topic and reused until clear_cache.
+        """
+        key = (stage, prompt_name, topic)
+        prompt = self._topic_prompts.get(key)
+        if prompt is None:
+            prompt = self._topic_prompts[key] = self.format_prompt(stage, prompt_name, topic=topic)
+        return prompt
+    
+    def _missing_prompt(self, stage: str, prompt_name: str) -> KeyError:
+        """Build the KeyError for a prompt name the stage does not define."""
+        available = ", ".join(self._cache[stage].keys())
+        return KeyError(
+            f"Prompt '{prompt_name}' not found in {stage}.yaml. "
+            f"Available prompts: {available}"
+        )
     
     def _load_stage_prompts(self, stage: str) -> Dict[str, Any]:
         """
@@ -181,6 +310,9 @@ class PromptLibrary:
         
         Implements caching to avoid repeated file reads. YAML files are only
         loaded once per stage during the lifetime of the PromptLibrary instance.
+        Loading also unwraps each prompt's template text (plain string or the
+        'template' key of a dict config) and binds its format_map, so get_prompt
+        and format_prompt are single dictionary lookups.
         
         Args:
             stage: Pipeline stage name (e.g., 'filtering', 'deduplication')
@@ -192,28 +324,77 @@ class PromptLibrary:
             FileNotFoundError: If YAML file for stage doesn't exist
         """
         if stage not in self._cache:
-            filepath = self._prompts_dir / f"{stage}.yaml"
+            stage_prompts = self._load_precompiled().get("stages", {}).get(stage)
+            if stage_prompts is None:
+                stage_prompts = self._read_stage_yaml(stage)
             
-            if not filepath.exists():
-                logger.error(f"Prompt configuration file not found: {filepath}")
-                raise FileNotFoundError(
-                    f"Prompt file not found: {filepath}. "
-                    f"Please ensure config/prompts/{stage}.yaml exists."
-                )
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    self._cache[stage] = yaml.safe_load(f) or {}
-                    logger.debug(f"Loaded {len(self._cache[stage])} prompts from {stage}.yaml")
-            except yaml.YAMLError as e:
-                logger.error(f"Error parsing YAML file {filepath}: {e}")
-                raise
-            except Exception as e:
-                logger.error(f"Error loading prompt file {filepath}: {e}")
-                raise
+            templates = {
+                name: config.get("template", "") if isinstance(config, dict) else config
+                for name, config in stage_prompts.items()
+            }
+            self._cache[stage] = stage_prompts
+            self._templates[stage] = templates
+            self._compiled[stage] = {name: template.format_map for name, template in templates.items()}
         
         return self._cache[stage]
     
+    def _read_stage_yaml(self, stage: str) -> Dict[str, Any]:
+        """Parse config/prompts/<stage>.yaml."""
+        filepath = self._stage_files.get(stage) or self._prompts_dir / f"{stage}.yaml"
+        
+        if not self._path_exists(filepath):
+            logger.error(f"Prompt configuration file not found: {filepath}")
+            raise FileNotFoundError(
+                f"Prompt file not found: {filepath}. "
+                f"Please ensure config/prompts/{stage}.yaml exists."
+            )
+        
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                stage_prompts = yaml.load(f, Loader=_YamlLoader) or {}
+                logger.debug(f"Loaded {len(stage_prompts)} prompts from {stage}.yaml")
+        except yaml.YAMLError as e:
+            logger.error(f"Error parsing YAML file {filepath}: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error loading prompt file {filepath}: {e}")
+            raise
+        
+        return stage_prompts
+    
+    def _load_precompiled(self) -> Dict[str, Any]:
+        """
+        Read COMPILED_PROMPTS_FILE once, so all stages and fragments come from a
+        single JSON parse instead of one YAML parse each.
+        
+        Returns {} (and the YAML files are used) when the file is missing, or
+        older than any YAML file - i.e. a prompt was edited after compiling.
+        """
+        if self._precompiled is None:
+            self._precompiled = {}
+            compiled_path = self._prompts_dir / COMPILED_PROMPTS_FILE
+            try:
+                compiled_mtime = compiled_path.stat().st_mtime
+                newest_source = max((p.stat().st_mtime for p in self._prompts_dir.glob("*.yaml")), default=0.0)
+                if compiled_mtime >= newest_source:
+                    with open(compiled_path, 'r', encoding='utf-8') as f:
+                        self._precompiled = json.load(f)
+                    logger.debug(f"Loaded precompiled prompts from {compiled_path}")
+                else:
+                    logger.debug(f"Ignoring stale precompiled prompts: {compiled_path}")
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load precompiled prompts {compiled_path}: {e}")
+        return self._precompiled
+    
+    def _path_exists(self, path: Path) -> bool:
+        """Path.exists() remembered per path until clear_cache."""
+        exists = self._exists_cache.get(path)
+        if exists is None:
+            exists = self._exists_cache[path] = path.exists()
+        return exists
+    
     def get_prompt_metadata(self, stage: str, prompt_name: str) -> Optional[Dict[str, Any]]:
         """
         Get metadata for a prompt (description, parameters, examples, cost estimates).
@@ -251,20 +432,27 @@ class PromptLibrary:
     def clear_cache(self) -> None:
         """Clear the prompt cache. Useful for testing or reloading configurations."""
         self._cache.clear()
+        self._templates.clear()
+        self._compiled.clear()
+        self._topic_prompts.clear()
+        self._exists_cache.clear()
+        self._precompiled = None
         logger.debug("Prompt cache cleared")
 
 
-class FilteringPrompts:
+class StagePrompts:
     """
-    Prompts for the filtering pipeline stage.
+    Base class of the pipeline stage prompt accessors.
     
-    Provides access to prompts used in filter.py for initial article classification
-    and relevance filtering based on topic criteria.
+    Subclasses set `stage` to their YAML file name and expose one method per
+    prompt, each a single lookup through the parent PromptLibrary.
     """
     
+    stage: str = ""
+    
     def __init__(self, library: PromptLibrary, language_config: 'LanguageConfig') -> None:
         """
-        Initialize FilteringPrompts.
+        Initialize the stage prompts.
         
         Args:
             library: Parent PromptLibrary instance
@@ -273,6 +461,25 @@ class FilteringPrompts:
         self._library = library
         self._language_config = language_config
     
+    def _prompt(self, prompt_name: str) -> str:
+        """Template of one of this stage's prompts."""
+        return self._library.get_prompt(self.stage, prompt_name)
+    
+    def _topic_prompt(self, prompt_name: str, topic: str) -> str:
+        """One of this stage's prompts, formatted for a topic."""
+        return self._library.format_topic_prompt(self.stage, prompt_name, topic)
+
+
+class FilteringPrompts(StagePrompts):
+    """
+    Prompts for the filtering pipeline stage.
+    
+    Provides access to prompts used in filter.py for initial article classification
+    and relevance filtering based on topic criteria.
+    """
+    
+    stage = "filtering"
+    
     def classification_prompt(self, topic: str) -> str:
         """
         Get the article classification prompt for topic-based filtering.
@@ -286,11 +493,10 @@ class FilteringPrompts:
         Example:
             >>> prompt = prompt_lib.filtering.classification_prompt(topic="creditreform")
         """
-        template = self._library.get_prompt("filtering", "classification_prompt")
-        return template.format(topic=topic)
+        return self._topic_prompt("classification_prompt", topic)
 
 
-class DeduplicationPrompts:
+class DeduplicationPrompts(StagePrompts):
     """
     Prompts for the deduplication pipeline stage.
     
@@ -298,16 +504,7 @@ class DeduplicationPrompts:
     cross_run_deduplication.py for identifying duplicate or similar articles.
     """
     
-    def __init__(self, library: PromptLibrary, language_config: 'LanguageConfig') -> None:
-        """
-        Initialize DeduplicationPrompts.
-        
-        Args:
-            library: Parent PromptLibrary instance
-            language_config: LanguageConfig for language-aware prompts
-        """
-        self._library = library
-        self._language_config = language_config
+    stage = "deduplication"
     
     def clustering_prompt(self) -> str:
         """
@@ -319,11 +516,10 @@ class DeduplicationPrompts:
         Example:
             >>> prompt = prompt_lib.deduplication.clustering_prompt()
         """
-        template = self._library.get_prompt("deduplication", "clustering_prompt")
-        return template
+        return self._prompt("clustering_prompt")
 
 
-class AnalysisPrompts:
+class AnalysisPrompts(StagePrompts):
     """
     Prompts for the analysis pipeline stage.
     
@@ -331,16 +527,7 @@ class AnalysisPrompts:
     key point extraction, and entity recognition.
     """
     
-    def __init__(self, library: PromptLibrary, language_config: 'LanguageConfig') -> None:
-        """
-        Initialize AnalysisPrompts.
-        
-        Args:
-            library: Parent PromptLibrary instance
-            language_config: LanguageConfig for language-aware prompts
-        """
-        self._library = library
-        self._language_config = language_config
+    stage = "analysis"
     
     def summarization_prompt(self) -> str:
         """
@@ -352,8 +539,7 @@ class AnalysisPrompts:
         Example:
             >>> prompt = prompt_lib.analysis.summarization_prompt()
         """
-        template = self._library.get_prompt("analysis", "summarization_prompt")
-        return template
+        return self._prompt("summarization_prompt")
     
     def key_points_prompt(self) -> str:
         """
@@ -365,8 +551,7 @@ class AnalysisPrompts:
         Example:
             >>> prompt = prompt_lib.analysis.key_points_prompt()
         """
-        template = self._library.get_prompt("analysis", "key_points_prompt")
-        return template
+        return self._prompt("key_points_prompt")
     
     def entity_extraction_prompt(self) -> str:
         """
@@ -378,11 +563,10 @@ class AnalysisPrompts:
         Example:
             >>> prompt = prompt_lib.analysis.entity_extraction_prompt()
         """
-        template = self._library.get_prompt("analysis", "entity_extraction_prompt")
-        return template
+        return self._prompt("entity_extraction_prompt")
 
 
-class FormattingPrompts:
+class FormattingPrompts(StagePrompts):
     """
     Prompts for the formatting pipeline stage.
     
@@ -390,16 +574,7 @@ class FormattingPrompts:
     generating formatted rating agency reports and analyses.
     """
     
-    def __init__(self, library: PromptLibrary, language_config: 'LanguageConfig') -> None:
-        """
-        Initialize FormattingPrompts.
-        
-        Args:
-            library: Parent PromptLibrary instance
-            language_config: LanguageConfig for language-aware prompts
-        """
-        self._library = library
-        self._language_config = language_config
+    stage = "formatting"
     
     def rating_prompt(self) -> str:
         """
@@ -414,11 +589,10 @@ class FormattingPrompts:
         Example:
             >>> prompt = prompt_lib.formatting.rating_prompt()
         """
-        template = self._library.get_prompt("formatting", "rating_prompt")
-        return template
+        return self._prompt("rating_prompt")
 
 
-class DigestPrompts:
+class DigestPrompts(StagePrompts):
     """
     Prompts for the digest generation pipeline stage.
     
@@ -426,16 +600,7 @@ class DigestPrompts:
     for creating topic digests and merging updates.
     """
     
-    def __init__(self, library: PromptLibrary, language_config: 'LanguageConfig') -> None:
-        """
-        Initialize DigestPrompts.
-        
-        Args:
-            library: Parent PromptLibrary instance
-            language_config: LanguageConfig for language-aware prompts
-        """
-        self._library = library
-        self._language_config = language_config
+    stage = "digest"
     
     def partial_digest_prompt(self, topic: str) -> str:
         """
@@ -450,8 +615,7 @@ class DigestPrompts:
         Example:
             >>> prompt = prompt_lib.digest.partial_digest_prompt(topic="creditreform")
         """
-        template = self._library.get_prompt("digest", "partial_digest_prompt")
-        return template.format(topic=topic)
+        return self._topic_prompt("partial_digest_prompt", topic)
     
     def merge_digests_prompt(self, topic: str) -> str:
         """
@@ -466,8 +630,7 @@ class DigestPrompts:
         Example:
             >>> prompt = prompt_lib.digest.merge_digests_prompt(topic="creditreform")
         """
-        template = self._library.get_prompt("digest", "merge_digests_prompt")
-        return template.format(topic=topic)
+        return self._topic_prompt("merge_digests_prompt", topic)
     
     def topic_digest_prompt(self, topic: str) -> str:
         """
@@ -482,5 +645,4 @@ class DigestPrompts:
         Example:
             >>> prompt = prompt_lib.digest.topic_digest_prompt(topic="creditreform")
         """
-        template = self._library.get_prompt("digest", "topic_digest_prompt")
-        return template.format(topic=topic)
+        return self._topic_prompt("topic_digest_prompt", topic)
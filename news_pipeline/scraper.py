@@ -19,6 +19,11 @@ from langchain_openai import ChatOpenAI
 from .google_news_decoder import GoogleNewsDecoder
 
 
+def _skip_google_news_redirects() -> bool:
+    """Feature flag: skip Google News redirects by default (due to frequent failures and policy changes)."""
+    return os.getenv("SKIP_GNEWS_REDIRECTS", "true").lower() in ("1", "true", "yes", "on")
+
+
 class ContentScraper:
     """Content extraction using MCP+Playwright and Trafilatura fallback."""
     
@@ -30,7 +35,9 @@ class ContentScraper:
         self.logger = logging.getLogger(__name__)
         
         # Initialize Google News decoder
-        self.google_decoder = GoogleNewsDecoder(request_timeout=self.request_timeout)
+        self.google_decoder = GoogleNewsDecoder(request_timeout=self.request_timeout, cache_db_path=db_path)
+        # Google News redirects of the latest scrape batch, decoded up front (see _prefetch_google_news_urls)
+        self._decoded_urls: Dict[str, Optional[str]] = {}
         
         # Initialize MCP client
         self.mcp_client = None
@@ -221,16 +228,17 @@ Return the extracted text as plain text without any formatting or metadata."""
         if "news.google.com/rss/articles/" not in url:
             return url
 
-        # Feature flag: skip Google News redirects by default (due to frequent failures and policy changes)
-        skip_gnews = os.getenv("SKIP_GNEWS_REDIRECTS", "true").lower() in ("1", "true", "yes", "on")
-        if skip_gnews:
+        if _skip_google_news_redirects():
             self.logger.warning(f"Skipping Google News redirect URL (causes redirect loops): {url[:100]}...")
             return None
 
         self.logger.info(f"Attempting to decode Google News redirect: {url[:100]}...")
         
-        # Try to decode using our comprehensive decoder
-        decoded_url = self.google_decoder.decode_url(url)
+        # Try to decode using our comprehensive decoder (unless the batch prefetch already did)
+        if url in self._decoded_urls:
+            decoded_url = self._decoded_urls[url]
+        else:
+            decoded_url = self.google_decoder.decode_url(url)
         
         if decoded_url:
             self.logger.info(f"Successfully decoded Google News URL: {decoded_url}")
@@ -255,6 +263,18 @@ Return the extracted text as plain text without any formatting or metadata."""
         self.logger.warning(f"Failed to decode Google News URL, skipping: {url[:100]}...")
         return None
     
+    def _prefetch_google_news_urls(self, articles: List[Dict[str, Any]]):
+        """
+        Decode the Google News redirects of a scrape batch concurrently, so the
+        per-article loop does not wait on each decode's round-trips in turn.
+        """
+        gnews_urls = [a['url'] for a in articles if "news.google.com/rss/articles/" in a['url']]
+        if gnews_urls and not _skip_google_news_redirects():
+            self.logger.info(f"Decoding {len(gnews_urls)} Google News redirects")
+            self._decoded_urls = self.google_decoder.decode_many(gnews_urls)
+        else:
+            self._decoded_urls = {}
+    
     def extract_content(self, url: str) -> tuple[Optional[str], str]:
         """
         Extract content using both methods with fallback.
@@ -522,6 +542,8 @@ Return the extracted text as plain text without any formatting or metadata."""
         
         self.logger.info(f"Scraping content from {len(articles)} {'selected' if run_id else ''} articles")
         
+        self._prefetch_google_news_urls(articles)
+        
         for i, article in enumerate(articles, 1):
             if 'rank' in article:
                 self.logger.info(f"Scraping {i}/{len(articles)} [Rank {article['rank']}]: {article['title'][:100]}...")
@@ -2,12 +2,25 @@
 Utility functions for the news pipeline.
 """
 
+import asyncio
 import hashlib
+import json
+import mmap
+import random
 import re
+from typing import Any, Optional
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 from urllib.robotparser import RobotFileParser
 from dateutil import parser as date_parser
 import logging
+import openai
+
+# Optional fast JSON (C-accelerated); falls back to the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def normalize_url(url: str) -> str:
     """
@@ -354,3 +367,86 @@ def format_rate(success: int, total: int) -> str:
     if total == 0:
         return "0%"
     return f"{(success/total)*100:.1f}%"
+
+
+# Applied to every long-lived SQLite connection of the pipeline
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Transient API failures worth retrying (429, timeouts, dropped connections, 5xx)
+RETRYABLE_GPT_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+MAX_GPT_ATTEMPTS = 5
+
+
+def retry_wait(attempt: int, error: Exception, max_wait: float = 30.0) -> float:
+    """
+    Seconds to wait before retrying a failed API call.
+    
+    Random between 1s and 2^attempt seconds (capped at max_wait), but never
+    shorter than a Retry-After header sent with the error.
+    """
+    floor = 1.0
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            floor = max(floor, float(response.headers.get('retry-after')))
+        except (TypeError, ValueError):
+            pass
+    return max(floor, random.uniform(1.0, min(max_wait, 2.0 ** attempt)))
+
+
+class EventLoopMixin:
+    """
+    Runs the coroutines of a sync class on one event loop per instance.
+    
+    The async client's connection pool is bound to the loop it first ran on, so
+    every sync entry point reuses one loop - a fresh asyncio.run() loop per call
+    would fail on the pooled connections with "Event loop is closed".
+    """
+    
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _run(self, coro):
+        """Run a coroutine to completion on the instance's event loop (created on first use)."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+
+def load_json_file(path: str) -> Any:
+    """
+    Load a JSON file, using orjson on a memory-mapped view when available.
+    
+    Files that cannot be mapped (e.g. empty ones) fall back to the stdlib json module.
+    """
+    if orjson is not None:
+        try:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+        except ValueError:
+            pass
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def loads_json(text: str) -> Any:
+    """Parse a JSON string, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dumps_json(obj: Any) -> str:
+    """Serialize to a UTF-8 JSON string (non-ASCII kept as-is), using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False)
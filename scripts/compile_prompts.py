@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Merge the prompt YAML files into one pre-parsed JSON file.
+
+PromptLibrary loads config/prompts/_compiled.json in preference to parsing each
+config/prompts/*.yaml, as long as it is newer than all of them.
+Rerun this script after editing a prompt (a stale file is simply ignored).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import from news_pipeline
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from news_pipeline.prompt_library import write_compiled_prompts
+
+
+def main():
+    """Main function to run the compilation."""
+    try:
+        target = write_compiled_prompts()
+        print(f"Compiled prompts written to {target}")
+    except Exception as e:
+        print(f"Error compiling prompts: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Precompile the Jinja2 report templates into Python modules.
+
+The German rating report loads news_pipeline/_compiled_templates/ in preference to
+parsing templates/*.j2, as long as the compiled module is newer than its source.
+Rerun this script after editing a template (a stale module is simply ignored).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import from news_pipeline
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from news_pipeline.german_rating_formatter import GermanRatingFormatter, COMPILED_TEMPLATES_DIR
+
+
+def compile_templates(target: Path = COMPILED_TEMPLATES_DIR):
+    """Compile all .j2 templates into target as importable Python modules."""
+    env = GermanRatingFormatter.create_template_environment()
+    target.mkdir(parents=True, exist_ok=True)
+    env.compile_templates(
+        str(target),
+        zip=None,
+        filter_func=lambda name: name.endswith('.j2'),
+        ignore_errors=False,
+        log_function=print
+    )
+    print(f"Compiled templates written to {target}")
+
+
+def main():
+    """Main function to run the compilation."""
+    try:
+        compile_templates()
+    except Exception as e:
+        print(f"Error compiling templates: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
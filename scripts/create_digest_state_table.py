@@ -18,30 +18,19 @@ def create_digest_state_table(db_path: str):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Create digest_state table
+    # Create digest_state table, clustered on (digest_date, topic) - the primary
+    # key serves lookups by date and topic and by date alone, so no extra indexes
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS digest_state (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
             digest_date TEXT NOT NULL,
             topic TEXT NOT NULL,
-            processed_article_ids TEXT NOT NULL, -- JSON array of article IDs
+            processed_article_ids BLOB NOT NULL, -- sorted little-endian int64 article IDs
             digest_content TEXT NOT NULL,        -- JSON digest content
             article_count INTEGER NOT NULL DEFAULT 0,
             created_at TEXT NOT NULL,
             updated_at TEXT NOT NULL,
-            UNIQUE(digest_date, topic)
-        )
-    """)
-    
-    # Create index for efficient queries
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_digest_state_date_topic 
-        ON digest_state(digest_date, topic)
-    """)
-    
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_digest_state_date 
-        ON digest_state(digest_date)
+            PRIMARY KEY (digest_date, topic)
+        ) WITHOUT ROWID
     """)
     
     # Create digest_generation_log table for tracking generation history
@@ -59,6 +48,20 @@ def create_digest_state_table(db_path: str):
         )
     """)
     
+    # Create digest_merge_cache table so repeated merges skip the API call
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS digest_merge_cache (
+            key TEXT PRIMARY KEY,      -- blake2b hash of the merge inputs
+            result TEXT NOT NULL,      -- JSON merged digest
+            created_at TEXT NOT NULL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_digest_merge_cache_created 
+        ON digest_merge_cache(created_at)
+    """)
+    
     conn.commit()
     conn.close()
     
@@ -8,6 +8,7 @@ are composed with dynamic runtime data using Python's .format().
 import pytest
 import sys
 import os
+from types import SimpleNamespace
 
 # Add parent directory to path to import news_pipeline
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -210,6 +211,11 @@ pipeline:
         # Should return the same cached instance
         assert frag1 is frag2
     
+    def test_only_fragments_preloaded(self, filter_instance):
+        """Test that the filter loads its fragments up front but no stage prompt files."""
+        assert hasattr(filter_instance.prompt_lib, '_fragments')
+        assert filter_instance.prompt_lib._cache == {}
+    
     def test_composed_prompts_are_strings(self, filter_instance):
         """Test that all composed prompts are strings."""
         # Classification prompt
@@ -241,6 +247,33 @@ pipeline:
         assert 'area2' in result
         # Each on its own line
         assert '\n' in result
+    
+    def test_classification_prompt_built_once_per_topic(self, filter_instance, monkeypatch):
+        """Test that classify_article composes each topic's prompt only once."""
+        builds = []
+        build = filter_instance._build_classification_prompt
+        
+        def counting_build(topic, keywords):
+            builds.append(topic)
+            return build(topic, keywords)
+        
+        monkeypatch.setattr(filter_instance, '_build_classification_prompt', counting_build)
+        system_prompts = []
+        
+        def fake_create(model, messages, response_format):
+            system_prompts.append(messages[0]['content'])
+            content = '{"is_match": true, "confidence": 0.9, "topic": "test_topic", "reason": "ok"}'
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        
+        filter_instance.client = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+        
+        for title in ['First', 'Second', 'Third']:
+            filter_instance.classify_article(title, 'https://example.com', 'test_topic')
+        
+        assert builds == ['test_topic']
+        assert len(system_prompts) == 3
+        assert 'keyword1' in system_prompts[-1]
 
 
 class TestFragmentIntegration:
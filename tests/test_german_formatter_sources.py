@@ -0,0 +1,573 @@
+"""
+Tests for source metadata resolution in german_rating_formatter.py.
+
+Validates that:
+1. Source URLs are resolved against items/summaries in batched queries
+2. Input order is preserved and unknown URLs are skipped
+3. Articles without summaries are excluded from the report
+4. Resolved metadata is cached across calls
+5. The report template is compiled once and renders resolved sources
+6. GPT key point output is parsed into clean bullet lines
+"""
+
+import os
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from jinja2 import ChoiceLoader, FileSystemLoader
+from news_pipeline import german_rating_formatter
+from news_pipeline.german_rating_formatter import (
+    GermanRatingFormatter, _compact_for_llm, _domain_name, _parse_bullet_lines, _write_atomic
+)
+from news_pipeline.utils import load_json_file
+
+
+def _create_db(db_path):
+    """Create a minimal items/summaries/articles schema with sample rows."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE items(
+            id INTEGER PRIMARY KEY,
+            source TEXT NOT NULL,
+            url TEXT NOT NULL UNIQUE,
+            normalized_url TEXT NOT NULL,
+            title TEXT
+        );
+        CREATE TABLE summaries(
+            item_id INTEGER PRIMARY KEY,
+            summary TEXT,
+            created_at TEXT DEFAULT (datetime('now'))
+        );
+        CREATE TABLE articles(
+            item_id INTEGER PRIMARY KEY,
+            extracted_text TEXT
+        );
+    """)
+    conn.executemany(
+        "INSERT INTO items(id, source, url, normalized_url, title) VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, "nzz.ch", "https://www.nzz.ch/a?utm_source=rss", "https://www.nzz.ch/a", " Artikel A "),
+            (2, "srf.ch", "https://www.srf.ch/b", "https://www.srf.ch/b", "Artikel B"),
+            (3, "fuw.ch", "https://www.fuw.ch/c", "https://www.fuw.ch/c", "Artikel C"),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO summaries(item_id, summary) VALUES (?, ?)",
+        [(1, "Zusammenfassung A"), (2, "Zusammenfassung B")],
+    )
+    conn.execute("INSERT INTO articles(item_id, extracted_text) VALUES (2, 'Volltext B')")
+    conn.commit()
+    conn.close()
+
+
+class TestResolveSourceMetadata:
+    """Test batched URL -> title/summary resolution"""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self, tmp_path, monkeypatch):
+        """Point the formatter at a temporary database"""
+        db_path = tmp_path / "news.db"
+        _create_db(db_path)
+        monkeypatch.setenv("DB_PATH", str(db_path))
+
+        self.formatter = GermanRatingFormatter()
+        self.key_point_calls = []
+
+        def fake_key_points(summary):
+            self.key_point_calls.append(summary)
+            return [f"Punkt zu {summary}"]
+
+        self.formatter._generate_article_key_points = fake_key_points
+        self.formatter._request_key_points_batch = lambda summaries: {}
+
+    def test_resolves_in_input_order(self):
+        """Verify results follow the order of the input URLs"""
+        meta = self.formatter._resolve_source_metadata([
+            "https://www.srf.ch/b",
+            "https://www.nzz.ch/a",
+        ])
+
+        assert [m.url for m in meta] == ["https://www.srf.ch/b", "https://www.nzz.ch/a"]
+        assert meta[0].title == "Artikel B"
+        assert meta[1].title == "Artikel A"
+        assert meta[1].key_points == ["Punkt zu Zusammenfassung A"]
+
+    def test_resolves_by_normalized_url(self):
+        """Verify URLs match against the normalized_url column"""
+        meta = self.formatter._resolve_source_metadata(["https://www.nzz.ch/a"])
+
+        assert len(meta) == 1
+        assert meta[0].summary == "Zusammenfassung A"
+
+    def test_skips_unknown_and_unsummarized_urls(self):
+        """Verify URLs without DB entries or summaries are dropped"""
+        meta = self.formatter._resolve_source_metadata([
+            "https://unknown.example.com/x",
+            "https://www.fuw.ch/c",
+        ])
+
+        assert meta == []
+
+    def test_repeated_urls_hit_cache(self):
+        """Verify a URL resolved once is served from cache on the next call"""
+        first = self.formatter._resolve_source_metadata(["https://www.srf.ch/b"])
+        second = self.formatter._resolve_source_metadata(["https://www.srf.ch/b"])
+
+        assert first == second
+        assert self.key_point_calls == ["Zusammenfassung B"]
+
+    def test_clear_cache_forces_refresh(self):
+        """Verify clear_cache drops in-process metadata, key points come from the DB cache"""
+        self.formatter._resolve_source_metadata(["https://www.srf.ch/b"])
+        self.formatter.clear_cache()
+
+        assert self.formatter._source_meta_cache == {}
+
+        meta = self.formatter._resolve_source_metadata(["https://www.srf.ch/b"])
+
+        assert meta[0].key_points == ["Punkt zu Zusammenfassung B"]
+        assert len(self.key_point_calls) == 1
+
+    def test_key_points_persist_across_instances(self):
+        """Verify key points generated by one formatter are reused by the next"""
+        self.formatter._resolve_source_metadata(["https://www.srf.ch/b"])
+
+        formatter = GermanRatingFormatter()
+        formatter._generate_article_key_points = lambda summary: pytest.fail("GPT called")
+        formatter._request_key_points_batch = lambda summaries: pytest.fail("GPT called")
+        meta = formatter._resolve_source_metadata(["https://www.srf.ch/b"])
+
+        assert meta[0].key_points == ["Punkt zu Zusammenfassung B"]
+
+    def test_expired_key_points_are_pruned(self, monkeypatch):
+        """Verify entries older than the TTL are deleted when a formatter connects"""
+        self.formatter._resolve_source_metadata(["https://www.srf.ch/b"])
+        conn = self.formatter._connect_db()
+        conn.execute("UPDATE key_points_cache SET created_at = 0")
+        conn.commit()
+        conn.close()
+
+        conn = GermanRatingFormatter()._connect_db()
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM key_points_cache").fetchone()[0] == 0
+        finally:
+            conn.close()
+
+    def test_batched_key_points_are_spliced_by_index(self):
+        """Verify batch results map back to their summaries, gaps fall back per article"""
+        self.formatter._request_key_points_batch = lambda summaries: {1: [f"Batch {summaries[1]}"]}
+
+        points = self.formatter._generate_all_key_points(["Zusammenfassung A", "Zusammenfassung B"])
+
+        assert points == [["Punkt zu Zusammenfassung A"], ["Batch Zusammenfassung B"]]
+        assert self.key_point_calls == ["Zusammenfassung A"]
+
+    def test_reuses_passed_connection(self):
+        """Verify lookups run on a caller-provided connection without closing it"""
+        conn = self.formatter._connect_db()
+        try:
+            meta = self.formatter._resolve_source_metadata(["https://www.srf.ch/b"], conn)
+            fulltext = self.formatter._fetch_fulltext_by_url("https://www.srf.ch/b", conn)
+
+            assert meta[0].title == "Artikel B"
+            assert fulltext == "Volltext B"
+            assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 3
+        finally:
+            conn.close()
+
+    def test_empty_input(self):
+        """Verify empty input returns empty list"""
+        assert self.formatter._resolve_source_metadata([]) == []
+
+
+class TestParseBulletLines:
+    """Test parsing of GPT key point responses"""
+
+    def test_strips_bullet_markers_and_numbering(self):
+        """Verify dash, star, dot bullets and numbering are removed"""
+        content = "- Erster Punkt\n* Zweiter Punkt\n• Dritter Punkt\n4. Vierter Punkt"
+
+        assert _parse_bullet_lines(content) == [
+            "Erster Punkt", "Zweiter Punkt", "Dritter Punkt", "Vierter Punkt"
+        ]
+
+    def test_skips_blank_lines(self):
+        """Verify blank and marker-only lines are dropped"""
+        assert _parse_bullet_lines("\n-  \n  - Punkt\n\n") == ["Punkt"]
+
+    def test_keeps_plain_lines(self):
+        """Verify unmarked lines and inner hyphens are kept intact"""
+        assert _parse_bullet_lines("Umsatz-Plus von 5%") == ["Umsatz-Plus von 5%"]
+
+
+class TestReportRendering:
+    """Test markdown report rendering with resolved sources"""
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self, tmp_path, monkeypatch):
+        """Point the formatter at a temporary database"""
+        db_path = tmp_path / "news.db"
+        _create_db(db_path)
+        monkeypatch.setenv("DB_PATH", str(db_path))
+
+        self.tmp_path = tmp_path
+        self.formatter = GermanRatingFormatter()
+        self.formatter._generate_article_key_points = lambda summary: [f"Punkt zu {summary}"]
+        self.formatter._request_key_points_batch = lambda summaries: {}
+
+    def test_template_is_shared_across_instances(self):
+        """Verify the compiled template is cached on the class"""
+        assert GermanRatingFormatter._get_template() is GermanRatingFormatter()._get_template()
+
+    def test_report_lists_resolved_sources(self):
+        """Verify rendered report contains source titles and key points"""
+        digest_data = {
+            'date': '2025-10-05',
+            'generated_at': '2025-10-05T08:00:00',
+            'topic_digests': {
+                'creditreform_insights': {
+                    'headline': 'Test Headline',
+                    'why_it_matters': 'Test relevance',
+                    'article_count': 2,
+                    'sources': [
+                        "https://www.srf.ch/b",
+                        "https://www.nzz.ch/a",
+                        "https://www.srf.ch/b",
+                        "https://www.srf.ch/b?utm_source=newsletter#top",
+                    ],
+                }
+            }
+        }
+        analysis = self.formatter._generate_basic_analysis(digest_data)
+        output_path = self.tmp_path / "report.md"
+
+        self.formatter._write_german_markdown_report(str(output_path), digest_data, analysis)
+        report = output_path.read_text(encoding='utf-8')
+
+        assert "**[Artikel B](https://www.srf.ch/b)**" in report
+        assert "- Punkt zu Zusammenfassung A" in report
+        assert report.count("Artikel B") == 1
+        assert 'sources_meta' not in digest_data['topic_digests']['creditreform_insights']
+
+    def test_resolves_all_topics_in_one_pass(self):
+        """Verify sources of all topics are resolved with a single DB lookup"""
+        digest_data = {
+            'topic_digests': {
+                'topic_a': {'sources': ["https://www.srf.ch/b"]},
+                'topic_b': {'sources': ["https://www.nzz.ch/a", "https://www.srf.ch/b"]},
+                'topic_c': {'sources': []},
+            }
+        }
+        queried = []
+        query = self.formatter._query_source_metadata
+        self.formatter._query_source_metadata = lambda urls, conn: (queried.append(urls), query(urls, conn))
+
+        sources_meta = self.formatter._build_sources_meta(digest_data)
+
+        assert queried == [["https://www.srf.ch/b", "https://www.nzz.ch/a"]]
+        assert sources_meta['topic_a'].titles == ["Artikel B"]
+        assert sources_meta['topic_b'].titles == ["Artikel A", "Artikel B"]
+        assert 'topic_c' not in sources_meta
+
+    def test_failed_key_points_are_requested_once(self):
+        """Verify a shared URL whose key points fail is not retried for every topic"""
+        digest_data = {
+            'topic_digests': {
+                'topic_a': {'sources': ["https://www.srf.ch/b", "https://www.nzz.ch/a"]},
+                'topic_b': {'sources': ["https://www.nzz.ch/a"]},
+            }
+        }
+        batches = []
+        requested = []
+
+        def fake_batch(summaries):
+            batches.append(summaries)
+            return {}
+
+        def fake_key_points(summary):
+            requested.append(summary)
+            return None if summary == "Zusammenfassung A" else [f"Punkt zu {summary}"]
+
+        self.formatter._request_key_points_batch = fake_batch
+        self.formatter._generate_article_key_points = fake_key_points
+
+        sources_meta = self.formatter._build_sources_meta(digest_data)
+
+        assert len(batches) == 1
+        assert requested.count("Zusammenfassung A") == 1
+        assert sources_meta['topic_a'].titles == ["Artikel B"]
+        assert sources_meta['topic_b'].titles == []
+
+    def test_sources_beyond_limit_are_not_resolved(self, monkeypatch):
+        """Verify only the first max_sources sources are resolved, the rest are counted"""
+        monkeypatch.setenv("GERMAN_REPORT_MAX_SOURCES", "1")
+        digest_data = {
+            'date': '2025-10-05',
+            'topic_digests': {
+                'creditreform_insights': {
+                    'headline': 'Test Headline',
+                    'why_it_matters': 'Test relevance',
+                    'article_count': 3,
+                    'sources': ["https://www.srf.ch/b", "https://www.nzz.ch/a", "https://www.fuw.ch/c"],
+                }
+            }
+        }
+        output_path = self.tmp_path / "report.md"
+
+        self.formatter._write_german_markdown_report(
+            str(output_path), digest_data, self.formatter._generate_basic_analysis(digest_data)
+        )
+        report = output_path.read_text(encoding='utf-8')
+
+        assert "Artikel B" in report
+        assert "Artikel A" not in report
+        assert "*... and 2 more sources*" in report
+        assert "https://www.nzz.ch/a" not in self.formatter._source_meta_cache
+
+    def test_template_falls_back_to_plain_sources(self):
+        """Verify the shared template still renders without resolved metadata"""
+        digest_data = {
+            'date': '2025-10-05',
+            'topic_digests': {
+                'creditreform_insights': {
+                    'headline': 'Test Headline',
+                    'why_it_matters': 'Test relevance',
+                    'article_count': 1,
+                    'sources': ["https://www.srf.ch/b"],
+                }
+            }
+        }
+
+        report = GermanRatingFormatter._get_template().render(data=digest_data, max_sources=5)
+
+        assert "- www.srf.ch" in report
+
+
+class TestCompiledTemplates:
+    """Test selection of precompiled report templates"""
+
+    @pytest.fixture(autouse=True)
+    def compiled_dir(self, tmp_path, monkeypatch):
+        """Compile the templates into a temporary directory"""
+        monkeypatch.setattr(german_rating_formatter, 'COMPILED_TEMPLATES_DIR', tmp_path)
+        GermanRatingFormatter.create_template_environment().compile_templates(
+            str(tmp_path), zip=None, filter_func=lambda name: name.endswith('.j2')
+        )
+        self.compiled = next(tmp_path.glob('tmpl_*.py'))
+
+    def test_prefers_current_compiled_module(self):
+        """Verify a compiled module newer than its source is loaded first"""
+        loader = GermanRatingFormatter._template_loader()
+        env = GermanRatingFormatter.create_template_environment(loader)
+
+        assert isinstance(loader, ChoiceLoader)
+        assert env.get_template('daily_digest.md.j2').render(data={'date': '2025-10-05', 'topic_digests': {}})
+
+    def test_ignores_stale_compiled_module(self):
+        """Verify a compiled module older than its source falls back to the source template"""
+        os.utime(self.compiled, (0, 0))
+
+        assert isinstance(GermanRatingFormatter._template_loader(), FileSystemLoader)
+
+
+def _stream_chunk(content):
+    """Build a minimal chat completion stream chunk."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class TestStreamedAnalysis:
+    """Test assembly of the streamed rating analysis"""
+
+    def test_assembles_streamed_chunks(self):
+        """Verify content deltas are joined and empty chunks are skipped"""
+        chunks = [
+            _stream_chunk('{"market_overview": '),
+            SimpleNamespace(choices=[]),
+            _stream_chunk(None),
+            _stream_chunk('"Ruhig"}'),
+        ]
+        formatter = GermanRatingFormatter()
+        formatter.client = SimpleNamespace(chat=SimpleNamespace(
+            completions=SimpleNamespace(create=lambda **kwargs: iter(chunks))
+        ))
+
+        analysis = formatter._generate_rating_analysis({'date': '2025-10-05', 'topic_digests': {}})
+
+        assert analysis['analysis_text'] == '{"market_overview": "Ruhig"}'
+        assert analysis['method'] == "ai_sequential_thinking"
+
+
+class TestLoadJsonFile:
+    """Test loading of digest JSON files"""
+
+    def test_loads_utf8_digest(self, tmp_path):
+        """Verify non-ASCII content survives the memory-mapped load"""
+        path = tmp_path / "digest.json"
+        path.write_text('{"headline": "Konkurse in Zürich"}', encoding='utf-8')
+
+        assert load_json_file(str(path)) == {"headline": "Konkurse in Zürich"}
+
+    def test_empty_file_raises_decode_error(self, tmp_path):
+        """Verify an empty file falls back to json and fails with a decode error"""
+        path = tmp_path / "digest.json"
+        path.write_bytes(b"")
+
+        with pytest.raises(ValueError):
+            load_json_file(str(path))
+
+
+class TestDomainName:
+    """Test the domain_name template filter"""
+
+    @pytest.mark.parametrize("url, expected", [
+        ("https://www.srf.ch/news/artikel", "www.srf.ch"),
+        ("https://www.nzz.ch", "www.nzz.ch"),
+        ("https://fuw.ch?utm_source=rss", "fuw.ch"),
+        ("http://example.com:8080#top", "example.com:8080"),
+    ])
+    def test_extracts_host(self, url, expected):
+        """Verify the host is cut at the first path, query or fragment delimiter"""
+        assert _domain_name(url) == expected
+
+    def test_returns_value_without_scheme(self):
+        """Verify values that are not absolute URLs are returned unchanged"""
+        assert _domain_name("Unbekannte Quelle") == "Unbekannte Quelle"
+
+
+class TestWriteAtomic:
+    """Test atomic report writes"""
+
+    def test_replaces_existing_file(self, tmp_path):
+        """Verify the content is replaced and no temporary file is left behind"""
+        path = tmp_path / "report.md"
+        path.write_text("alt", encoding='utf-8')
+
+        _write_atomic(str(path), "Bericht für Zürich".encode('utf-8'))
+
+        assert path.read_text(encoding='utf-8') == "Bericht für Zürich"
+        assert [p.name for p in tmp_path.iterdir()] == ["report.md"]
+
+    def test_temporary_files_are_unique(self, tmp_path, monkeypatch):
+        """Verify each write uses its own temporary file, so concurrent exports don't collide"""
+        path = tmp_path / "report.md"
+        replaced = []
+        replace = os.replace
+
+        def recording_replace(src, dst):
+            replaced.append(src)
+            replace(src, dst)
+
+        monkeypatch.setattr(os, "replace", recording_replace)
+        _write_atomic(str(path), b"eins")
+        _write_atomic(str(path), b"zwei")
+
+        assert len(set(replaced)) == 2
+        assert all(os.path.dirname(src) == str(tmp_path) for src in replaced)
+        assert path.read_bytes() == b"zwei"
+
+    def test_failed_write_leaves_no_temporary_file(self, tmp_path, monkeypatch):
+        """Verify the temporary file is removed when moving it into place fails"""
+        path = tmp_path / "report.md"
+        path.write_text("alt", encoding='utf-8')
+
+        def failing_replace(src, dst):
+            raise PermissionError("locked")
+
+        monkeypatch.setattr(os, "replace", failing_replace)
+        with pytest.raises(PermissionError):
+            _write_atomic(str(path), b"neu")
+
+        assert [p.name for p in tmp_path.iterdir()] == ["report.md"]
+        assert path.read_text(encoding='utf-8') == "alt"
+
+
+class TestCompactForLlm:
+    """Test trimming of the digest before the analysis prompt"""
+
+    def test_trims_topics_and_trending(self):
+        """Verify verbose fields are dropped and lists are truncated"""
+        digest_data = {
+            'date': '2025-10-05',
+            'executive_summary': {
+                'headline': 'Schlagzeile',
+                'executive_summary': 'Text',
+                'key_themes': ['Zinsen'],
+                'top_priorities': ['Konkurse'],
+                'generated_at': '2025-10-05T08:00:00',
+            },
+            'trending_topics': [{'topic': f't{i}'} for i in range(15)],
+            'topic_digests': {
+                'creditreform_insights': {
+                    'headline': 'Test Headline',
+                    'why_it_matters': 'Test relevance',
+                    'bullets': ['a', 'b', 'c', 'd'],
+                    'sources': ['https://www.srf.ch/b'],
+                    'article_count': 4,
+                },
+                'empty_topic': {'headline': 'Leer', 'article_count': 0},
+            },
+        }
+
+        compact = _compact_for_llm(digest_data)
+
+        assert 'generated_at' not in compact['executive_summary']
+        assert len(compact['trending_topics']) == 10
+        assert list(compact['topic_digests']) == ['creditreform_insights']
+        assert compact['topic_digests']['creditreform_insights'] == {
+            'headline': 'Test Headline',
+            'why_it_matters': 'Test relevance',
+            'bullets': ['a', 'b', 'c'],
+            'article_count': 4,
+        }
+
+
+class _FakeResponseStream:
+    """Iterable stand-in for a streamed Responses API call."""
+
+    def __init__(self, deltas):
+        self.events = [SimpleNamespace(type="response.created")]
+        self.events += [SimpleNamespace(type="response.output_text.delta", delta=d) for d in deltas]
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for event in self.events:
+            self.consumed += 1
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+class TestStreamedKeyPoints:
+    """Test early termination of streamed key point responses"""
+
+    def setup_method(self):
+        self.formatter = GermanRatingFormatter()
+
+    def _use_stream(self, stream):
+        self.formatter.client = SimpleNamespace(responses=SimpleNamespace(create=lambda **kwargs: stream))
+
+    def test_stops_after_three_bullets(self):
+        """Verify the stream is closed once the third bullet line is complete"""
+        stream = _FakeResponseStream(["- Eins\n- Zw", "ei\n", "- Drei\n- Vi", "er\n", "- Fünf\n"])
+        self._use_stream(stream)
+
+        points = self.formatter._generate_article_key_points("Zusammenfassung")
+
+        assert points == ["Eins", "Zwei", "Drei"]
+        assert stream.closed
+        assert stream.consumed == 4
+
+    def test_keeps_unterminated_last_line(self):
+        """Verify a final bullet without trailing newline is kept when the stream ends"""
+        stream = _FakeResponseStream(["- Eins\n", "- Zwei\n- Drei"])
+        self._use_stream(stream)
+
+        assert self.formatter._generate_article_key_points("Andere Zusammenfassung") == ["Eins", "Zwei", "Drei"]
+        assert stream.closed
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
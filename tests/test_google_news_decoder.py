@@ -0,0 +1,379 @@
+"""
+Tests for google_news_decoder.py.
+
+Validates that:
+1. Legacy (base64) article IDs decode to the embedded article URL
+2. New-format article IDs are left to the HTML/API method
+3. The HTML method finds article URLs in meta refresh, scripts, anchors and page text
+4. Google, social and asset URLs are rejected as article URLs
+
+All HTTP traffic goes to a fake session - no network access needed.
+"""
+
+import asyncio
+import base64
+import json
+
+import pytest
+from news_pipeline.google_news_decoder import GoogleNewsDecoder, _article_id, _build_freq
+
+ARTICLE_URL = "https://www.nzz.ch/wirtschaft/konkurse-steigen-ld.1234567"
+
+
+def _legacy_article_url(target_url):
+    """Build a pre-July-2024 style Google News URL that embeds target_url."""
+    payload = b"\x08\x13\x22" + bytes([len(target_url)]) + target_url.encode() + b"\xd2\x01\x00"
+    article_id = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    return f"https://news.google.com/rss/articles/{article_id}?oc=5"
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, text, url="https://news.google.com/rss/articles/AU_yqLtest", status_code=200):
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.encoding = "utf-8"
+        self.url = url
+        self.status_code = status_code
+        self.chunks_read = 0
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for start in range(0, len(self.content), chunk_size):
+            self.chunks_read += 1
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Session that serves one canned page for every GET."""
+
+    def __init__(self, response):
+        self.response = response
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        return self.response
+
+
+@pytest.fixture
+def decoder():
+    decoder = GoogleNewsDecoder()
+    decoder.min_request_interval = 0
+    return decoder
+
+
+class TestBase64Decoding:
+    """Test decoding of legacy article IDs"""
+
+    def test_decodes_legacy_url(self, decoder):
+        """Verify the embedded URL is extracted from a legacy article ID"""
+        assert decoder.decode_base64_url(_article_id(_legacy_article_url(ARTICLE_URL))) == ARTICLE_URL
+
+    @pytest.mark.parametrize("extra", [b"", b"\x00", b"\x00\x01"], ids=["pad0", "pad1", "pad2"])
+    def test_decodes_any_padding(self, decoder, extra):
+        """Verify article IDs of every length decode with exact padding"""
+        payload = b"\x08\x13\x22" + bytes([len(ARTICLE_URL)]) + ARTICLE_URL.encode() + b"\xd2" + extra
+        article_id = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+        assert decoder.decode_base64_url(article_id) == ARTICLE_URL
+
+    def test_decodes_non_ascii_path(self, decoder):
+        """Verify UTF-8 characters in the path do not cut the URL short"""
+        url = "https://www.nzz.ch/wirtschaft/straße-Übernahme-ld.123"
+        payload = b"\x08\x13\x22" + bytes([len(url.encode())]) + url.encode() + b"\xd2\x01"
+        article_id = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+        assert decoder.decode_base64_url(article_id) == url
+
+    def test_prefers_non_amp_url(self, decoder):
+        """Verify the canonical URL wins over the AMP variant"""
+        amp_url = "https://www.nzz.ch/amp/wirtschaft/konkurse-steigen-ld.1234567"
+        payload = (b"\x08\x13\x22" + bytes([len(amp_url)]) + amp_url.encode()
+                   + b"\xd2\x01" + bytes([len(ARTICLE_URL)]) + ARTICLE_URL.encode())
+        article_id = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+        assert decoder.decode_base64_url(article_id) == ARTICLE_URL
+
+    def test_new_format_returns_none(self, decoder):
+        """Verify new-format article IDs are not decoded"""
+        article_id = base64.urlsafe_b64encode(b"AU_yqL" + b"x" * 40).decode()
+
+        assert decoder.decode_base64_url(article_id) is None
+
+    def test_new_format_is_detected_from_prefix(self, decoder, monkeypatch):
+        """Verify only the article ID prefix is decoded for new-format URLs"""
+        payload = b"\x08\x13\x22\xb4\x04AU_yqL" + b"x" * 400
+        article_id = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+        decoded_lengths = []
+        real_decode = base64.urlsafe_b64decode
+
+        def recording_decode(value):
+            decoded_lengths.append(len(value))
+            return real_decode(value)
+
+        monkeypatch.setattr("news_pipeline.google_news_decoder.base64.urlsafe_b64decode", recording_decode)
+
+        assert decoder.decode_base64_url(article_id) is None
+        assert decoded_lengths == [24]
+
+    def test_decode_url_skips_network_for_legacy(self, decoder):
+        """Verify decode_url resolves legacy URLs without fetching the page"""
+        decoder.session = FakeSession(FakeResponse(""))
+
+        assert decoder.decode_url(_legacy_article_url(ARTICLE_URL)) == ARTICLE_URL
+        assert decoder.session.requested == []
+
+    def test_non_google_url_passes_through(self, decoder):
+        """Verify URLs that are not Google News redirects are returned unchanged"""
+        assert decoder.decode_url(ARTICLE_URL) == ARTICLE_URL
+
+
+class TestDecodeCache:
+    """Test the persistent decode cache"""
+
+    GNEWS_URL = "https://news.google.com/rss/articles/AU_yqLcached?oc=5"
+
+    def test_decoded_url_survives_restart(self, tmp_path):
+        """Verify a URL decoded by one decoder is served from the DB to the next"""
+        db_path = str(tmp_path / "news.db")
+        first = GoogleNewsDecoder(cache_db_path=db_path)
+        first.min_request_interval = 0
+        first.session = FakeSession(FakeResponse(f'<html><body><a href="{ARTICLE_URL}">x</a></body></html>'))
+
+        assert first.decode_url(self.GNEWS_URL) == ARTICLE_URL
+
+        second = GoogleNewsDecoder(cache_db_path=db_path)
+        second.session = FakeSession(FakeResponse("<html></html>"))
+
+        assert second.decode_url(self.GNEWS_URL.replace("?oc=5", "?hl=de")) == ARTICLE_URL
+        assert second.session.requested == []
+
+    def test_failed_decodes_are_not_cached(self, tmp_path):
+        """Verify failures are retried on the next call"""
+        decoder = GoogleNewsDecoder(cache_db_path=str(tmp_path / "news.db"))
+        decoder.min_request_interval = 0
+        decoder.session = FakeSession(FakeResponse("<html></html>"))
+
+        assert decoder.decode_url(self.GNEWS_URL) is None
+        assert decoder.decode_url(self.GNEWS_URL) is None
+        assert len(decoder.session.requested) == 2
+
+    def test_browser_result_is_cached(self, tmp_path):
+        """Verify a browser decode is stored and not repeated"""
+        class FakeAgent:
+            def __init__(self):
+                self.prompts = []
+
+            async def run(self, prompt):
+                self.prompts.append(prompt)
+                return f"Final URL: {ARTICLE_URL}"
+
+        decoder = GoogleNewsDecoder(cache_db_path=str(tmp_path / "news.db"))
+        decoder.min_request_interval = 0
+        agent = FakeAgent()
+
+        assert asyncio.run(decoder.decode_with_browser(self.GNEWS_URL, agent)) == ARTICLE_URL
+        assert asyncio.run(decoder.decode_with_browser(self.GNEWS_URL, agent)) == ARTICLE_URL
+        assert len(agent.prompts) == 1
+        assert self.GNEWS_URL in agent.prompts[0]
+
+
+class TestDecodeMany:
+    """Test concurrent decoding of several URLs"""
+
+    def test_decodes_each_unique_url(self, decoder):
+        """Verify duplicates are decoded once and every input maps to its result"""
+        other_url = "https://www.srf.ch/news/wirtschaft/firmenpleiten-nehmen-zu"
+        legacy = _legacy_article_url(ARTICLE_URL)
+        urls = [legacy, _legacy_article_url(other_url), legacy, ARTICLE_URL]
+
+        results = decoder.decode_many(urls)
+
+        assert results == {
+            legacy: ARTICLE_URL,
+            _legacy_article_url(other_url): other_url,
+            ARTICLE_URL: ARTICLE_URL,
+        }
+
+    def test_empty_input(self, decoder):
+        assert decoder.decode_many([]) == {}
+
+    def test_workers_use_own_sessions(self, decoder, monkeypatch):
+        """Verify worker threads never share the caller's HTTP session"""
+        created = []
+
+        def new_session():
+            session = FakeSession(FakeResponse("<html></html>"))
+            created.append(session)
+            return session
+
+        monkeypatch.setattr(decoder, "_new_session", new_session)
+        decoder.session = FakeSession(FakeResponse("<html></html>"))
+        urls = [f"https://news.google.com/rss/articles/AU_yqLworker{i}?oc=5" for i in range(4)]
+
+        assert decoder.decode_many(urls, max_workers=2) == dict.fromkeys(urls)
+        assert decoder.session.requested == []
+        assert sorted(url for session in created for url in session.requested) == urls
+
+    def test_rate_limit_reserves_distinct_slots(self, decoder, monkeypatch):
+        """Verify consecutive callers are scheduled one interval apart"""
+        sleeps = []
+        monkeypatch.setattr("news_pipeline.google_news_decoder.time.sleep", sleeps.append)
+        decoder.min_request_interval = 10.0
+
+        decoder._rate_limit()
+        decoder._rate_limit()
+
+        assert len(sleeps) == 1
+        assert 9.0 < sleeps[0] <= 10.0
+
+    def test_rate_limit_is_per_host(self, decoder, monkeypatch):
+        """Verify requests to different hosts don't wait for each other"""
+        sleeps = []
+        monkeypatch.setattr("news_pipeline.google_news_decoder.time.sleep", sleeps.append)
+        decoder.min_request_interval = 10.0
+
+        decoder._rate_limit("news.google.com")
+        decoder._rate_limit("www.nzz.ch")
+
+        assert sleeps == []
+
+
+class TestHtmlExtraction:
+    """Test article URL extraction from the Google News redirect page"""
+
+    @pytest.mark.parametrize("html", [
+        f'<html><head><meta http-equiv="refresh" content="0;url={ARTICLE_URL}"></head></html>',
+        f'<html><body><script>window.location = "{ARTICLE_URL}";</script></body></html>',
+        f'<html><body><script>var data = ["x", "{ARTICLE_URL}"];</script></body></html>',
+        f'<html><body><a href="https://www.google.com/about">x</a><a href="{ARTICLE_URL}">Artikel</a></body></html>',
+        f'<html><body><div>Quelle: {ARTICLE_URL}</div></body></html>',
+    ], ids=["meta_refresh", "js_redirect", "script_data", "anchor", "page_text"])
+    def test_finds_article_url(self, decoder, html):
+        """Verify each extraction method finds the article URL"""
+        decoder.session = FakeSession(FakeResponse(html))
+
+        assert decoder.extract_from_html_api("https://news.google.com/rss/articles/AU_yqLtest") == ARTICLE_URL
+
+    def test_meta_refresh_stops_download(self, decoder):
+        """Verify a meta refresh in <head> ends the download before the body is read"""
+        head = f'<html><head><meta http-equiv="Refresh" content="0;url={ARTICLE_URL}"></head>'
+        response = FakeResponse(head.ljust(16384) + "<body>" + "x" * 100000 + "</body></html>")
+        decoder.session = FakeSession(response)
+
+        assert decoder.extract_from_html_api("https://news.google.com/rss/articles/AU_yqLtest") == ARTICLE_URL
+        assert response.chunks_read == 1
+        assert response.closed
+
+    def test_reused_parser_starts_clean(self, decoder):
+        """Verify metas left unread by an early exit do not leak into the next page"""
+        stale_url = "https://www.srf.ch/news/schweiz/veralteter-artikel-123456"
+        first = (f'<html><head><meta http-equiv="refresh" content="0;url={ARTICLE_URL}">'
+                 f'<meta http-equiv="refresh" content="0;url={stale_url}"></head></html>')
+        decoder.session = FakeSession(FakeResponse(first))
+        assert decoder.extract_from_html_api("https://news.google.com/rss/articles/AU_yqLone") == ARTICLE_URL
+
+        decoder.session = FakeSession(FakeResponse('<html><body><p>Keine Weiterleitung</p></body></html>'))
+        assert decoder.extract_from_html_api("https://news.google.com/rss/articles/AU_yqLtwo") is None
+
+    def test_validates_each_url_once(self, decoder, monkeypatch):
+        """Verify a URL repeated in scripts, anchors and page text is validated only once"""
+        import news_pipeline.google_news_decoder as gnd
+
+        checked = []
+
+        def counting_validator(url):
+            checked.append(url)
+            return url == ARTICLE_URL
+
+        google_url = "https://www.google.com/intl/de/about/products-and-services"
+        html = (f'<html><body><script>var data = ["{google_url}"];</script>'
+                f'<a href="{google_url}">Google</a><div>{google_url}</div>'
+                f'<div>Quelle: {ARTICLE_URL}</div></body></html>')
+        monkeypatch.setattr(gnd, "_is_valid_news_url", counting_validator)
+        decoder.session = FakeSession(FakeResponse(html))
+
+        assert decoder.extract_from_html_api("https://news.google.com/rss/articles/AU_yqLtest") == ARTICLE_URL
+        assert checked.count(google_url) == 1
+
+    def test_follows_http_redirect(self, decoder):
+        """Verify a redirect to the article host is returned directly"""
+        decoder.session = FakeSession(FakeResponse("<html></html>", url=ARTICLE_URL))
+
+        assert decoder.extract_from_html_api("https://news.google.com/rss/articles/AU_yqLtest") == ARTICLE_URL
+
+    def test_decodes_declared_charset(self, decoder):
+        """Verify the body is decoded with the response's charset"""
+        response = FakeResponse(f'<html><body><a href="{ARTICLE_URL}">Zürich</a></body></html>')
+        response.content = response.text.encode("latin-1")
+        response.encoding = "ISO-8859-1"
+        decoder.session = FakeSession(response)
+
+        assert decoder.extract_from_html_api("https://news.google.com/rss/articles/AU_yqLtest") == ARTICLE_URL
+
+    def test_returns_none_without_article_url(self, decoder):
+        """Verify pages with only Google links yield no URL"""
+        html = '<html><body><a href="https://news.google.com/home">Home</a></body></html>'
+        decoder.session = FakeSession(FakeResponse(html))
+
+        assert decoder.extract_from_html_api("https://news.google.com/rss/articles/AU_yqLtest") is None
+
+
+class TestBuildFreq:
+    """Test the batchexecute request payload"""
+
+    def test_matches_expected_envelope(self):
+        """Verify plain params produce the known f.req layout"""
+        freq = _build_freq({'param1': 'CBMiabc', 'param2': '1700000000', 'param3': 'sig'})
+
+        assert freq == '[[["HKKQWd","[\\"CBMiabc\\",\\"1700000000\\",null,\\"sig\\"]",null,"generic"]]]'
+
+    def test_escapes_quotes_in_params(self):
+        """Verify quotes in params survive both JSON layers"""
+        freq = _build_freq({'param1': 'a"b'})
+
+        inner = json.loads(json.loads(freq)[0][0][1])
+        assert inner == ['a"b', '', None, '']
+
+
+class TestIsValidNewsUrl:
+    """Test the article URL validator"""
+
+    @pytest.mark.parametrize("url", [
+        ARTICLE_URL,
+        "http://www.srf.ch/news/schweiz/artikel",
+        "HTTPS://www.handelszeitung.ch/unternehmen/artikel",
+        "https://www.finews.ch?article=konkurs-12345",
+    ])
+    def test_accepts_article_urls(self, decoder, url):
+        assert decoder._is_valid_news_url(url)
+
+    @pytest.mark.parametrize("url", [
+        "ftp://www.nzz.ch/wirtschaft/artikel",
+        "https://news.google.com/rss/articles/abc",
+        "https://fonts.gstatic.com/s/roboto/v30/font.woff2",
+        "https://www.facebook.com/sharer/sharer.php",
+        "https://www.nzz.ch/static/styles/main.css",
+        "https://www.nzz.ch/tags/konkurs",
+        "https://a.ch/x",
+        "https://localhost/news/artikel/123",
+        "https://www.nzz.ch/" + "a" * 500,
+        "not a url",
+        "https:///wirtschaft/artikel/konkurse",
+        "https://nzzch/wirtschaft/artikel-konkurs",
+        "https://news.google.com?next=https://www.nzz.ch/artikel",
+    ])
+    def test_rejects_non_article_urls(self, decoder, url):
+        assert not decoder._is_valid_news_url(url)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
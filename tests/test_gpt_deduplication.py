@@ -0,0 +1,879 @@
+"""
+Tests for gpt_deduplication.py.
+
+Validates that:
+1. Large title batches are clustered in concurrent chunks
+2. Duplicates split across chunks are merged by the second pass
+3. Clusters end up in article_clusters with one primary per cluster
+
+GPT is replaced by a fake client that groups titles by their first word -
+no network access needed.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+import news_pipeline.gpt_deduplication as gpt_dedup
+from news_pipeline.gpt_deduplication import GPTTitleDeduplicator
+
+SCHEMA = """
+CREATE TABLE items(
+  id INTEGER PRIMARY KEY,
+  source TEXT NOT NULL,
+  url TEXT NOT NULL UNIQUE,
+  normalized_url TEXT NOT NULL,
+  title TEXT,
+  published_at TEXT,
+  first_seen_at TEXT DEFAULT (datetime('now')),
+  triage_topic TEXT,
+  triage_confidence REAL,
+  is_match INTEGER DEFAULT 0
+);
+CREATE TABLE articles(
+  item_id INTEGER PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+  extracted_text TEXT,
+  extracted_at TEXT DEFAULT (datetime('now')),
+  method TEXT
+);
+CREATE TABLE article_clusters (
+    id INTEGER PRIMARY KEY,
+    cluster_id TEXT NOT NULL,
+    article_id INTEGER REFERENCES items(id) ON DELETE CASCADE,
+    is_primary INTEGER DEFAULT 0,
+    similarity_score REAL DEFAULT 0.0,
+    created_at TEXT DEFAULT (datetime('now')),
+    clustering_method TEXT DEFAULT 'title_similarity'
+);
+"""
+
+_TITLE_LINE_RE = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+
+
+def _fake_assignments(prompt):
+    """Answer a clustering prompt by grouping its numbered titles by their first word."""
+    groups = {}
+    assignments = [[int(index), groups.setdefault(title.split()[0], len(groups) + 1)]
+                   for index, title in _TITLE_LINE_RE.findall(prompt)]
+    return json.dumps({"assignments": assignments})
+
+
+class FakeClusteringClient:
+    """Async OpenAI stand-in that groups the numbered titles by their first word."""
+
+    def __init__(self):
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        message = SimpleNamespace(content=_fake_assignments(prompt))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def close(self):
+        pass
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    """Local Chat Completions endpoint answering clustering prompts over a keep-alive connection."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        body = json.dumps({
+            "id": "c", "object": "chat.completion", "created": 0, "model": request["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                "role": "assistant", "content": _fake_assignments(request["messages"][-1]["content"])}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _add_article(conn, item_id, title):
+    """Insert a matched, scraped article from today with item_id * 100 chars of text."""
+    today = date.today().isoformat()
+    url = f"https://example.ch/{item_id}"
+    conn.execute(
+        "INSERT INTO items (id, source, url, normalized_url, title, first_seen_at, triage_confidence, is_match) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+        (item_id, f"source{item_id}", url, url, title, f"{today} 08:00:00", 0.9)
+    )
+    conn.execute("INSERT INTO articles (item_id, extracted_text) VALUES (?, ?)", (item_id, "x" * (item_id * 100)))
+
+
+class FakeBatchClient:
+    """Sync OpenAI stand-in for the Batch API; answers each request like FakeClusteringClient."""
+
+    def __init__(self):
+        self.status = "in_progress"
+        self.output_files = {}
+        self.uploads = []
+        self.files = SimpleNamespace(create=self._upload, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    def _upload(self, file, purpose):
+        self.uploads.append(file[1].decode("utf-8"))
+        return SimpleNamespace(id="file-in")
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id=f"batch_{len(self.uploads)}")
+
+    def _retrieve(self, batch_id):
+        return SimpleNamespace(status=self.status, output_file_id=self.output_files.get(batch_id, "file-out"))
+
+    def _content(self, file_id):
+        if file_id == "file-broken":
+            return SimpleNamespace(text="not json")
+        lines = []
+        for request in map(json.loads, self.uploads[-1].splitlines()):
+            prompt = request["body"]["messages"][-1]["content"]
+            content = _fake_assignments(prompt)
+            lines.append(json.dumps({
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+                "error": None
+            }))
+        return SimpleNamespace(text="\n".join(lines))
+
+
+def _create_db(path, titles):
+    """Create a news DB holding one article per title (ids start at 1)."""
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    for i, title in enumerate(titles, 1):
+        _add_article(conn, i, title)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def make_deduplicator(tmp_path, monkeypatch):
+    """Build a deduplicator over a fresh DB holding the given titles."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    def make(titles=None, chunk_size=50, local_threshold=0):
+        db_path = str(tmp_path / "news.db")
+        if titles is not None:
+            _create_db(db_path, titles)
+        dedup = GPTTitleDeduplicator(db_path)
+        dedup.chunk_size = chunk_size
+        dedup.local_threshold = local_threshold
+        dedup.async_client = FakeClusteringClient()
+        return dedup
+
+    return make
+
+
+def _stored_clusters(db_path):
+    """Map cluster_id -> sorted [(article_id, is_primary)] from article_clusters."""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT cluster_id, article_id, is_primary FROM article_clusters").fetchall()
+    conn.close()
+    clusters = {}
+    for cluster_id, article_id, is_primary in rows:
+        clusters.setdefault(cluster_id, []).append((article_id, is_primary))
+    return sorted(sorted(members) for members in clusters.values())
+
+
+class TestChunkedClustering:
+    """Test concurrent clustering of title chunks"""
+
+    def test_single_chunk_uses_one_call(self, make_deduplicator):
+        """Verify small batches are clustered with a single GPT call"""
+        dedup = make_deduplicator(["Konkurse steigen", "Konkurse nehmen zu", "SNB senkt Zins"])
+
+        results = dedup.deduplicate_articles()
+
+        assert len(dedup.async_client.prompts) == 1
+        assert results["clusters_found"] == 1
+        assert _stored_clusters(dedup.db_path) == [[(1, 0), (2, 1)]]
+
+    def test_chunks_are_clustered_separately(self, make_deduplicator):
+        """Verify each chunk gets its own call and equal labels from different chunks stay apart"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b", "SNB a", "UBS a", "UBS b", "UBS c"], chunk_size=3)
+
+        results = dedup.deduplicate_articles()
+
+        # Two chunk calls plus the cross-chunk pass over the representatives
+        assert len(dedup.async_client.prompts) == 3
+        assert results["clusters_found"] == 2
+        assert _stored_clusters(dedup.db_path) == [[(1, 0), (2, 1)], [(4, 0), (5, 0), (6, 1)]]
+
+    def test_cross_chunk_duplicates_are_merged(self, make_deduplicator):
+        """Verify the second pass merges a story that was split across chunks"""
+        # Articles arrive longest first, so the Konkurse story straddles the two chunks
+        titles = ["SNB a", "SNB b", "SNB c", "Konkurse a", "Konkurse b", "UBS a", "UBS b", "UBS c"]
+        dedup = make_deduplicator(titles, chunk_size=4)
+
+        results = dedup.deduplicate_articles()
+
+        assert results["clusters_found"] == 3
+        assert _stored_clusters(dedup.db_path) == [
+            [(1, 0), (2, 0), (3, 1)], [(4, 0), (5, 1)], [(6, 0), (7, 0), (8, 1)]
+        ]
+
+    def test_verbatim_duplicates_are_grouped_locally(self, make_deduplicator):
+        """Verify identical titles are sent once and always end up in one cluster"""
+        dedup = make_deduplicator(["Zoll steigt", "zoll  steigt ", "SNB a", "SNB b", "UBS a"])
+
+        results = dedup.deduplicate_articles()
+
+        assert len(_TITLE_LINE_RE.findall(dedup.async_client.prompts[0])) == 4
+        assert results["clusters_found"] == 2
+        assert _stored_clusters(dedup.db_path) == [[(1, 0), (2, 1)], [(3, 0), (4, 1)]]
+
+    def test_identical_titles_skip_gpt(self, make_deduplicator):
+        """Verify a batch of copies of one title is clustered without a one-title prompt"""
+        dedup = make_deduplicator(["Same headline"] * 12)
+
+        results = dedup.deduplicate_articles()
+
+        assert dedup.async_client.prompts == []
+        assert results["clusters_found"] == 1
+        assert len(_stored_clusters(dedup.db_path)[0]) == 12
+
+    def test_cluster_ids_follow_members(self, make_deduplicator):
+        """Verify cluster IDs are 12 characters, stable across runs and distinct per member set"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b", "Konkurse c"])
+        articles = dedup.gather_scraped_articles_for_today()
+
+        first = dedup.store_clusters_in_database(articles, {"group1": [0, 1]})
+        second = make_deduplicator().store_clusters_in_database(articles, {"group7": [1, 0]})
+        third = dedup.store_clusters_in_database(articles, {"group1": [0, 2]})
+
+        ids = [result["cluster_details"][0]["cluster_id"] for result in (first, second, third)]
+        assert len(ids[0]) == 12
+        assert ids[0] == ids[1] != ids[2]
+
+    def test_rerun_replaces_earlier_clusters(self, make_deduplicator):
+        """Verify a rerun leaves only its own clusters, so a former primary can become a duplicate"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b", "Konkurse c"])
+        articles = dedup.gather_scraped_articles_for_today()
+        by_id = {article["id"]: i for i, article in enumerate(articles)}
+
+        # Longest content wins: article 2 is primary first, then a duplicate of article 3
+        dedup.store_clusters_in_database(articles, {"group1": [by_id[1], by_id[2]]})
+        dedup.store_clusters_in_database(articles, {"group1": [by_id[2], by_id[3]]})
+
+        assert _stored_clusters(dedup.db_path) == [[(2, 0), (3, 1)]]
+
+    def test_rerun_without_clusters_clears_earlier_ones(self, make_deduplicator):
+        """Verify articles no longer clustered lose their stale duplicate rows"""
+        dedup = make_deduplicator(["Konkurse a", "SNB b"])
+        articles = dedup.gather_scraped_articles_for_today()
+        dedup.store_clusters_in_database(articles, {"group1": [0, 1]})
+
+        results = dedup.deduplicate_articles()
+
+        assert results["clusters_found"] == 0
+        assert _stored_clusters(dedup.db_path) == []
+
+    def test_gpt_failure_is_reported(self, make_deduplicator):
+        """Verify an API error yields an error result instead of raising"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b"])
+
+        async def failing_create(**kwargs):
+            raise RuntimeError("rate limited")
+
+        dedup.async_client.chat.completions.create = failing_create
+
+        results = dedup.deduplicate_articles()
+
+        assert results["clusters_found"] == 0
+        assert results["error"] == "rate limited"
+
+
+def _rate_limit_error(retry_after=None):
+    """Build the error the OpenAI client raises for a 429 response."""
+    headers = {"retry-after": retry_after} if retry_after else {}
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.RateLimitError("rate limited", response=httpx.Response(429, headers=headers, request=request),
+                                 body=None)
+
+
+class TestLocalClustering:
+    """Test fuzzy clustering of small batches without GPT"""
+
+    TITLES = [
+        "Firmenkonkurse in der Schweiz steigen stark an",
+        "Schweiz: Firmenkonkurse steigen stark an",
+        "SNB senkt den Leitzins",
+        "UBS streicht Stellen im Inland",
+        "Firmenkonkurse in der Schweiz steigen stark",
+    ]
+
+    def test_small_batches_skip_gpt(self, make_deduplicator):
+        """Verify batches below the threshold are clustered locally"""
+        dedup = make_deduplicator(self.TITLES, local_threshold=10)
+
+        results = dedup.deduplicate_articles()
+
+        assert dedup.async_client.prompts == []
+        assert results["clusters_found"] == 1
+        assert _stored_clusters(dedup.db_path) == [[(1, 0), (2, 0), (5, 1)]]
+
+    def test_threshold_routes_larger_batches_to_gpt(self, make_deduplicator):
+        """Verify batches at the threshold still go to GPT"""
+        dedup = make_deduplicator(self.TITLES, local_threshold=5)
+
+        dedup.deduplicate_articles()
+
+        assert len(dedup.async_client.prompts) == 1
+
+    def test_difflib_fallback_matches(self, make_deduplicator, monkeypatch):
+        """Verify the stdlib fallback finds the same clusters"""
+
+        dedup = make_deduplicator()
+        articles = [{"title": title} for title in self.TITLES]
+        expected = dedup._local_cluster(articles)
+        monkeypatch.setattr(gpt_dedup, "process", None)
+
+        assert dedup._local_cluster(articles) == expected == {"local1": [0, 1, 4]}
+
+
+class TestGptRetries:
+    """Test retrying of transient GPT API failures"""
+
+    @pytest.fixture
+    def sleeps(self, monkeypatch):
+        """Record backoff waits instead of sleeping."""
+        waits = []
+
+        async def fake_sleep(seconds):
+            waits.append(seconds)
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        return waits
+
+    def _failing_client(self, dedup, errors):
+        """Make the fake client raise the given errors before answering normally."""
+        answer = dedup.async_client.chat.completions.create
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return await answer(**kwargs)
+
+        dedup.async_client.chat.completions.create = create
+        return calls
+
+    def test_rate_limits_are_retried(self, make_deduplicator, sleeps):
+        """Verify a 429 is retried and Retry-After sets the minimum wait"""
+        dedup = make_deduplicator([])
+        calls = self._failing_client(dedup, [_rate_limit_error("3"), _rate_limit_error()])
+
+        output = dedup.call_gpt_for_clustering("system", "1. Konkurse a\n2. Konkurse b")
+
+        assert json.loads(output)["assignments"] == [[1, 1], [2, 1]]
+        assert len(calls) == 3
+        assert sleeps[0] >= 3
+        assert 1 <= sleeps[1] <= 4
+
+    def test_gives_up_after_max_attempts(self, make_deduplicator, sleeps):
+        """Verify persistent rate limiting surfaces the error"""
+        dedup = make_deduplicator([])
+        calls = self._failing_client(dedup, [_rate_limit_error()] * 5)
+
+        with pytest.raises(openai.RateLimitError):
+            dedup.call_gpt_for_clustering("system", "1. Konkurse a")
+
+        assert len(calls) == 5
+        assert len(sleeps) == 4
+
+    def test_other_errors_are_not_retried(self, make_deduplicator, sleeps):
+        """Verify non-transient errors fail immediately"""
+        dedup = make_deduplicator([])
+        calls = self._failing_client(dedup, [ValueError("bad request")])
+
+        with pytest.raises(ValueError):
+            dedup.call_gpt_for_clustering("system", "1. Konkurse a")
+
+        assert len(calls) == 1
+        assert sleeps == []
+
+
+class TestClusterCache:
+    """Test reuse of clustering results across runs"""
+
+    TITLES = [f"Story{n} Meldung {copy}" for n in range(10) for copy in "ab"]
+
+    def test_unchanged_titles_skip_gpt(self, make_deduplicator):
+        """Verify a rerun over the same titles is served from the cache"""
+        first = make_deduplicator(self.TITLES)
+        first_results = first.deduplicate_articles()
+
+        second = make_deduplicator()
+        second_results = second.deduplicate_articles()
+
+        assert second.async_client.prompts == []
+        assert second_results["clusters_found"] == first_results["clusters_found"] == 10
+
+    def test_only_new_titles_are_clustered(self, make_deduplicator):
+        """Verify GPT sees one title per known story plus the new title"""
+        make_deduplicator(self.TITLES).deduplicate_articles()
+        dedup = make_deduplicator()
+        with sqlite3.connect(dedup.db_path) as conn:
+            _add_article(conn, 21, "Story1 Meldung c")
+
+        results = dedup.deduplicate_articles()
+
+        assert len(dedup.async_client.prompts) == 1
+        assert len(_TITLE_LINE_RE.findall(dedup.async_client.prompts[0])) == 11
+        assert results["clusters_found"] == 10
+        with sqlite3.connect(dedup.db_path) as conn:
+            members = conn.execute("""
+                SELECT article_id, is_primary FROM article_clusters
+                WHERE cluster_id = (SELECT cluster_id FROM article_clusters WHERE article_id = 21)
+                ORDER BY article_id
+            """).fetchall()
+        assert members == [(3, 0), (4, 0), (21, 1)]
+
+    def test_low_overlap_reclusters_everything(self, make_deduplicator):
+        """Verify mostly new title sets are clustered in full"""
+        make_deduplicator(self.TITLES[:4]).deduplicate_articles()
+        dedup = make_deduplicator()
+        with sqlite3.connect(dedup.db_path) as conn:
+            for item_id, title in enumerate(self.TITLES[4:], 5):
+                _add_article(conn, item_id, title)
+
+        dedup.deduplicate_articles()
+
+        assert len(_TITLE_LINE_RE.findall(dedup.async_client.prompts[0])) == 20
+
+
+class TestConnection:
+    """Test the shared database connection"""
+
+    def test_connection_is_reused(self, make_deduplicator):
+        """Verify all queries of the calling thread go through one connection"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b"])
+        conn = dedup._connection()
+
+        dedup.deduplicate_articles()
+        dedup.get_primary_articles()
+
+        assert dedup._connection() is conn
+
+    def test_context_manager_closes_connection(self, make_deduplicator):
+        """Verify leaving the with block closes the connection and later calls reopen it"""
+        with make_deduplicator(["Konkurse a", "Konkurse b"]) as dedup:
+            conn = dedup._connection()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        assert len(dedup.gather_scraped_articles_for_today()) == 2
+
+
+    def test_client_survives_repeated_sync_calls(self, make_deduplicator, monkeypatch):
+        """Verify the real async client keeps working across sync calls and after close()"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+        dedup = GPTTitleDeduplicator(make_deduplicator([]).db_path)
+        try:
+            answers = [dedup.call_gpt_for_clustering("system", "1. Konkurse a") for _ in range(2)]
+            dedup.close()
+            answers.append(dedup.call_gpt_for_clustering("system", "1. Konkurse a"))
+        finally:
+            dedup.close()
+            server.shutdown()
+            server.server_close()
+
+        assert answers == [json.dumps({"assignments": [[1, 1]]})] * 3
+
+    def test_clusters_stored_on_calling_thread(self, make_deduplicator):
+        """Verify a regular run stores its clusters directly, without starting the storage thread"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b"])
+        original = dedup.store_clusters_in_database
+        writers = []
+
+        def store(articles, clusters):
+            writers.append(threading.current_thread())
+            return original(articles, clusters)
+
+        dedup.store_clusters_in_database = store
+        results = dedup.deduplicate_articles()
+
+        assert writers == [threading.current_thread()]
+        assert dedup._storage_pool is None
+        assert results["duplicates_marked"] == 1
+
+    def test_storage_errors_are_reported(self, make_deduplicator):
+        """Verify a failed write surfaces in the results"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b"])
+
+        def store(articles, clusters):
+            raise sqlite3.OperationalError("database is locked")
+
+        dedup.store_clusters_in_database = store
+        results = dedup.deduplicate_articles()
+
+        assert results["error"] == "database is locked"
+        assert results["duplicates_marked"] == 0
+
+class TestGatherArticles:
+    """Test loading of today's scraped articles"""
+
+    def test_returns_metadata_without_text(self, make_deduplicator):
+        """Verify articles carry their content length but not the content"""
+        dedup = make_deduplicator(["Konkurse steigen", "SNB senkt Zins"])
+
+        articles = dedup.gather_scraped_articles_for_today()
+
+        assert [a["id"] for a in articles] == [2, 1]
+        assert set(articles[0]) == {"id", "title", "url", "source", "published_at", "first_seen_at",
+                                    "content_length", "confidence"}
+        assert articles[0]["content_length"] == 200
+        assert articles[0]["confidence"] == 0.9
+
+    def test_keeps_highest_confidence_articles(self, make_deduplicator):
+        """Verify only max_dedup_articles articles are returned, best triage confidence first"""
+        dedup = make_deduplicator(["Konkurse a", "SNB a", "UBS a"])
+        dedup.max_dedup_articles = 2
+        with sqlite3.connect(dedup.db_path) as conn:
+            conn.execute("UPDATE items SET triage_confidence = 0.5 WHERE id = 3")
+
+        assert [a["id"] for a in dedup.gather_scraped_articles_for_today()] == [2, 1]
+
+    def test_date_filter_uses_indexes(self, make_deduplicator):
+        """Verify both date branches of the query are served by indexes"""
+        dedup = make_deduplicator([])
+        statements = []
+        conn = dedup._connection()
+        conn.set_trace_callback(statements.append)
+        dedup.gather_scraped_articles_for_today()
+        conn.set_trace_callback(None)
+
+        query = next(sql for sql in statements if "FROM items" in sql)
+        details = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query))
+        assert "idx_items_published_at" in details
+        assert "idx_items_first_seen_at" in details
+
+    def test_matches_both_timestamp_formats(self, make_deduplicator):
+        """Verify articles first seen or published today match, whatever the separator"""
+        dedup = make_deduplicator(["Konkurse a", "SNB a", "UBS a"])
+        today = date.today().isoformat()
+        with sqlite3.connect(dedup.db_path) as conn:
+            conn.execute("UPDATE items SET first_seen_at = ? WHERE id = 1", (f"{today}T23:59:59.123456",))
+            conn.execute("UPDATE items SET first_seen_at = '2000-01-01 08:00:00', published_at = ? WHERE id = 2",
+                         (today,))
+            conn.execute("UPDATE items SET first_seen_at = '2000-01-01T08:00:00' WHERE id = 3")
+
+        assert sorted(a["id"] for a in dedup.gather_scraped_articles_for_today()) == [1, 2]
+
+    def test_offset_timestamps_use_local_date(self, make_deduplicator):
+        """Verify offset timestamps near midnight count on their local date, not the UTC one"""
+        dedup = make_deduplicator(["Konkurse a", "SNB a"])
+        today = date.today()
+        with sqlite3.connect(dedup.db_path) as conn:
+            conn.execute("UPDATE items SET first_seen_at = '2000-01-01T08:00:00'")
+            # UTC date is yesterday, local date is today
+            conn.execute("UPDATE items SET published_at = ? WHERE id = 1", (f"{today.isoformat()}T00:38:08+02:00",))
+            # UTC date is today, local date is tomorrow
+            conn.execute("UPDATE items SET published_at = ? WHERE id = 2",
+                         (f"{(today + timedelta(days=1)).isoformat()}T01:30:00+02:00",))
+
+        assert [a["id"] for a in dedup.gather_scraped_articles_for_today()] == [1]
+
+
+class TestQueryPlanCheck:
+    """Test the debug-mode query plan self-check"""
+
+    @pytest.fixture
+    def debug_logging(self, caplog, monkeypatch):
+        monkeypatch.setattr(gpt_dedup, "_query_plans_checked", False)
+        caplog.set_level(logging.DEBUG, logger="news_pipeline.gpt_deduplication")
+        return caplog
+
+    def _scan_warnings(self, caplog):
+        return [r.getMessage() for r in caplog.records if r.getMessage().startswith("Unindexed scan")]
+
+    def test_warns_about_unindexed_queries(self, make_deduplicator, debug_logging):
+        """Verify only queries scanning a whole table are reported"""
+        make_deduplicator([])
+
+        # The test schema lacks the is_match index of the real database
+        assert self._scan_warnings(debug_logging) == ["Unindexed scan in primary"]
+
+    def test_indexed_queries_pass(self, make_deduplicator, debug_logging, tmp_path):
+        """Verify no warning once items is indexed on is_match"""
+        _create_db(str(tmp_path / "news.db"), [])
+        with sqlite3.connect(tmp_path / "news.db") as conn:
+            conn.execute("CREATE INDEX idx_items_match ON items(is_match, triage_topic)")
+
+        make_deduplicator()
+
+        assert self._scan_warnings(debug_logging) == []
+
+    def test_warns_about_article_clusters_scan(self, make_deduplicator, debug_logging, tmp_path, monkeypatch):
+        """Verify a scan of a table other than items is reported as well"""
+        _create_db(str(tmp_path / "news.db"), [])
+        with sqlite3.connect(tmp_path / "news.db") as conn:
+            conn.execute("CREATE INDEX idx_items_match ON items(is_match, triage_topic)")
+            conn.execute("CREATE INDEX idx_items_published_at ON items(published_at)")
+            conn.execute("CREATE INDEX idx_items_first_seen_at ON items(first_seen_at)")
+        # Leave article_clusters without idx_ac_article
+        monkeypatch.setattr(GPTTitleDeduplicator, "_ensure_indexes", lambda self: None)
+
+        make_deduplicator()
+
+        assert self._scan_warnings(debug_logging) == ["Unindexed scan in primary"]
+
+    def test_checks_once_per_process(self, make_deduplicator, debug_logging):
+        """Verify later deduplicators skip the check"""
+        make_deduplicator([])
+        make_deduplicator()
+
+        assert len(self._scan_warnings(debug_logging)) == 1
+
+    def test_skipped_without_debug_logging(self, make_deduplicator, caplog, monkeypatch):
+        """Verify the check costs nothing in production"""
+        monkeypatch.setattr(gpt_dedup, "_query_plans_checked", False)
+        caplog.set_level(logging.INFO, logger="news_pipeline.gpt_deduplication")
+
+        make_deduplicator([])
+
+        assert gpt_dedup._query_plans_checked is False
+
+
+class TestClusteringPrompt:
+    """Test the clustering prompt"""
+
+    def test_numbers_titles(self, make_deduplicator):
+        """Verify titles are listed one per line with 1-based indices"""
+        dedup = make_deduplicator([])
+
+        _, user_prompt = dedup.create_clustering_prompt([{"title": "Konkurse steigen"}, {"title": "SNB senkt Zins"}])
+
+        assert _TITLE_LINE_RE.findall(user_prompt) == [("1", "Konkurse steigen"), ("2", "SNB senkt Zins")]
+
+    def test_line_breaks_in_titles_are_flattened(self, make_deduplicator):
+        """Verify a title with line breaks cannot inject extra numbered lines"""
+        dedup = make_deduplicator([])
+
+        _, user_prompt = dedup.create_clustering_prompt([{"title": "Konkurse\n2. steigen"}, {"title": "SNB\r\nZins"}])
+
+        assert _TITLE_LINE_RE.findall(user_prompt) == [("1", "Konkurse 2. steigen"), ("2", "SNB Zins")]
+
+
+class TestParseClusteringOutput:
+    """Test parsing of the clustering output"""
+
+    def test_parses_json_pairs(self, make_deduplicator):
+        """Verify [index, group] pairs are grouped with 0-based indices"""
+        dedup = make_deduplicator([])
+        output = json.dumps({"assignments": [[1, 1], [2, 2], [3, 1], [7, 2], [2]]})
+
+        assert dedup.parse_clustering_output(output, 3) == {"1": [0, 2]}
+
+    def test_parses_json_objects(self, make_deduplicator):
+        """Verify idx/group objects are understood as well"""
+        dedup = make_deduplicator([])
+        output = json.dumps({"assignments": [{"idx": 1, "group": "G1"}, {"idx": "2", "group": "G1"}, {"group": "G1"}]})
+
+        assert dedup.parse_clustering_output(output, 3) == {"G1": [0, 1]}
+
+    def test_requests_structured_output(self, make_deduplicator):
+        """Verify the clustering request enforces the assignments schema"""
+        dedup = make_deduplicator([])
+        system_prompt, user_prompt = dedup.create_clustering_prompt([{"title": "Konkurse a"}])
+
+        request = dedup._clustering_request(system_prompt, user_prompt)
+
+        assert request["response_format"]["type"] == "json_schema"
+        assert request["response_format"]["json_schema"]["strict"] is True
+        assert request["response_format"]["json_schema"]["schema"]["required"] == ["assignments"]
+
+    def test_groups_duplicates(self, make_deduplicator):
+        """Verify the line format is still understood when the output is not JSON"""
+        dedup = make_deduplicator([])
+        output = "1, Group1\n2. , Group 2\n 3 ,Group1 \r\n4, Group3\n"
+
+        assert dedup.parse_clustering_output(output, 4) == {"Group1": [0, 2]}
+
+    def test_skips_noise_and_out_of_range_indices(self, make_deduplicator):
+        """Verify prose, code fences and unknown indices are ignored"""
+        dedup = make_deduplicator([])
+        output = "```\nHere are the groups:\n1, Group1\n2, Group1\n9, Group1\nfoo, Group1\n```"
+
+        assert dedup.parse_clustering_output(output, 3) == {"Group1": [0, 1]}
+
+
+class TestSelectPrimaryArticle:
+    """Test primary article selection"""
+
+    def test_longest_article_wins(self, make_deduplicator):
+        """Verify the article with the most content is primary"""
+        dedup = make_deduplicator([])
+        cluster = [{"content_length": 300, "source": "a"}, {"content_length": 900, "source": "b"},
+                   {"content_length": 500, "source": "c"}]
+
+        assert dedup.select_primary_article_by_length(cluster) == (1, "Longest content (900 chars) from b")
+
+    def test_ties_keep_first_article(self, make_deduplicator):
+        """Verify equal lengths keep the first (highest confidence) article"""
+        dedup = make_deduplicator([])
+        cluster = [{"content_length": 0, "source": "a"}, {"source": "b"}]
+
+        assert dedup.select_primary_article_by_length(cluster)[0] == 0
+
+
+class TestBatchApi:
+    """Test clustering through the OpenAI Batch API"""
+
+    TITLES = ["SNB a", "SNB b", "SNB c", "Konkurse a", "Konkurse b", "UBS a", "UBS b", "UBS c"]
+
+    @pytest.fixture
+    def batch_dedup(self, make_deduplicator):
+        dedup = make_deduplicator(self.TITLES, chunk_size=4)
+        dedup.use_batch_api = True
+        dedup.openai_client = FakeBatchClient()
+        return dedup
+
+    def _pending(self, dedup):
+        with sqlite3.connect(dedup.db_path) as conn:
+            return conn.execute("SELECT batch_id FROM pending_batches").fetchall()
+
+    def test_submission_defers_clustering(self, batch_dedup):
+        """Verify one batch request per chunk is submitted and nothing is clustered yet"""
+        results = batch_dedup.deduplicate_articles()
+
+        assert results["status"] == "pending"
+        assert results["batch_id"] == "batch_1"
+        assert len(batch_dedup.openai_client.uploads[0].splitlines()) == 2
+        assert batch_dedup.async_client.prompts == []
+        assert self._pending(batch_dedup) == [("batch_1",)]
+        assert _stored_clusters(batch_dedup.db_path) == []
+
+    def test_pending_articles_are_not_resubmitted(self, batch_dedup):
+        """Verify reruns while a batch is pending reuse it instead of paying for the same clustering again"""
+        batch_dedup.deduplicate_articles()
+
+        results = batch_dedup.deduplicate_articles()
+
+        assert results["batch_id"] == "batch_1"
+        assert len(batch_dedup.openai_client.uploads) == 1
+        assert self._pending(batch_dedup) == [("batch_1",)]
+
+    def test_only_uncovered_articles_are_submitted(self, batch_dedup):
+        """Verify articles arriving after a submission go into a batch of their own"""
+        batch_dedup.deduplicate_articles()
+        with sqlite3.connect(batch_dedup.db_path) as conn:
+            _add_article(conn, 9, "Inflation a")
+            _add_article(conn, 10, "Inflation b")
+
+        results = batch_dedup.deduplicate_articles()
+
+        assert results["batch_id"] == "batch_2"
+        with sqlite3.connect(batch_dedup.db_path) as conn:
+            article_ids = conn.execute("SELECT article_ids FROM pending_batches WHERE batch_id = 'batch_2'").fetchone()
+        assert sorted(json.loads(article_ids[0])) == [9, 10]
+
+    def test_unfinished_batches_stay_pending(self, batch_dedup):
+        """Verify polling leaves running batches alone"""
+        batch_dedup.deduplicate_articles()
+
+        assert batch_dedup.poll_pending_batches() == []
+        assert self._pending(batch_dedup) == [("batch_1",)]
+
+    def test_completed_batch_is_stored(self, batch_dedup):
+        """Verify a completed batch is merged across chunks and stored"""
+        batch_dedup.deduplicate_articles()
+        batch_dedup.openai_client.status = "completed"
+
+        results = batch_dedup.poll_pending_batches()
+
+        assert results[0]["clusters_found"] == 3
+        assert len(batch_dedup.async_client.prompts) == 1  # live cross-chunk pass
+        assert self._pending(batch_dedup) == []
+        assert _stored_clusters(batch_dedup.db_path) == [
+            [(1, 0), (2, 0), (3, 1)], [(4, 0), (5, 1)], [(6, 0), (7, 0), (8, 1)]
+        ]
+
+    def test_failed_batch_is_dropped(self, batch_dedup):
+        """Verify failed batches are removed without storing clusters"""
+        batch_dedup.deduplicate_articles()
+        batch_dedup.openai_client.status = "expired"
+
+        assert batch_dedup.poll_pending_batches() == []
+        assert self._pending(batch_dedup) == []
+        assert _stored_clusters(batch_dedup.db_path) == []
+
+
+    def test_completed_batch_without_output_is_dropped(self, batch_dedup):
+        """Verify a batch whose requests all failed is removed instead of raising"""
+        batch_dedup.deduplicate_articles()
+        batch_dedup.openai_client.status = "completed"
+        batch_dedup.openai_client.output_files["batch_1"] = None
+
+        assert batch_dedup.poll_pending_batches() == []
+        assert self._pending(batch_dedup) == []
+        assert _stored_clusters(batch_dedup.db_path) == []
+
+    def test_unparseable_batch_does_not_block_later_ones(self, batch_dedup):
+        """Verify a broken batch is dropped and the batches after it are still resolved"""
+        with sqlite3.connect(batch_dedup.db_path) as conn:
+            conn.execute("INSERT INTO pending_batches (batch_id, article_ids, chunk_size, created_at) "
+                         "VALUES ('batch_0', '[98, 99]', 4, '2000-01-01 00:00:00')")
+        batch_dedup.deduplicate_articles()
+        batch_dedup.openai_client.status = "completed"
+        batch_dedup.openai_client.output_files["batch_0"] = "file-broken"
+
+        results = batch_dedup.poll_pending_batches()
+
+        assert [result["batch_id"] for result in results] == ["batch_1"]
+        assert self._pending(batch_dedup) == []
+        assert len(_stored_clusters(batch_dedup.db_path)) == 3
+
+
+class TestGetPrimaryArticles:
+    """Test selection of the articles that proceed to summarization"""
+
+    def test_returns_primaries_and_unclustered(self, make_deduplicator):
+        """Verify duplicates are excluded while primaries and unclustered articles are kept"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b", "Konkurse c", "SNB a", "UBS a"])
+        dedup.deduplicate_articles()
+
+        articles = dedup.get_primary_articles()
+
+        assert sorted(a["id"] for a in articles) == [3, 4, 5]
+        clustered = {a["id"]: a["is_clustered"] for a in articles}
+        assert clustered == {3: True, 4: False, 5: False}
+
+    def test_respects_limit_and_order(self, make_deduplicator):
+        """Verify the limit applies across both branches in confidence order"""
+        dedup = make_deduplicator(["Konkurse a", "Konkurse b", "SNB a", "UBS a"])
+        with sqlite3.connect(dedup.db_path) as conn:
+            conn.execute("UPDATE items SET triage_confidence = 0.5 WHERE id = 4")
+            conn.execute("UPDATE items SET triage_confidence = 0.95 WHERE id = 2")
+        dedup.deduplicate_articles()
+
+        assert [a["id"] for a in dedup.get_primary_articles(limit=2)] == [2, 3]
+
+    def test_unclustered_probe_uses_index(self, make_deduplicator):
+        """Verify the never-clustered check looks articles up by index instead of scanning article_clusters"""
+        dedup = make_deduplicator([])
+        conn = dedup._connection()
+
+        plan = conn.execute("EXPLAIN QUERY PLAN " + gpt_dedup._Q_PRIMARY, (None,)).fetchall()
+        details = [row[-1] for row in plan]
+        assert "SEARCH ac USING INDEX idx_ac_article (article_id=?)" in details
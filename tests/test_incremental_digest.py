@@ -0,0 +1,843 @@
+"""
+Tests for incremental_digest.py.
+
+Validates that:
+1. Digest state round-trips through the database
+2. The state manager keeps one connection open across calls
+3. Only articles missing from the digest state are loaded for a topic
+4. Partial digests of several topics can be generated as one Batch API job
+
+OpenAI is replaced by fake clients - no network access needed.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+import news_pipeline.incremental_digest as incremental_digest
+import news_pipeline.utils as utils
+from news_pipeline.incremental_digest import DigestStateManager, IncrementalDigestGenerator
+
+SCHEMA = """
+CREATE TABLE digest_state (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    digest_date TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    processed_article_ids TEXT NOT NULL,
+    digest_content TEXT NOT NULL,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    UNIQUE(digest_date, topic)
+);
+CREATE TABLE digest_generation_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    digest_date TEXT NOT NULL,
+    generation_type TEXT NOT NULL,
+    topics_processed INTEGER NOT NULL,
+    total_articles INTEGER NOT NULL,
+    new_articles INTEGER DEFAULT 0,
+    api_calls_made INTEGER DEFAULT 0,
+    execution_time_seconds REAL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE items(
+  id INTEGER PRIMARY KEY,
+  source TEXT NOT NULL,
+  url TEXT NOT NULL UNIQUE,
+  title TEXT,
+  published_at TEXT,
+  triage_confidence REAL
+);
+CREATE TABLE summaries(
+  item_id INTEGER PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+  topic TEXT,
+  summary TEXT,
+  key_points_json TEXT,
+  entities_json TEXT,
+  created_at TEXT DEFAULT (datetime('now')),
+  topic_already_covered INTEGER DEFAULT 0
+);
+CREATE TABLE article_clusters (
+    id INTEGER PRIMARY KEY,
+    cluster_id TEXT NOT NULL,
+    article_id INTEGER REFERENCES items(id) ON DELETE CASCADE,
+    is_primary INTEGER DEFAULT 0
+);
+"""
+
+DATE = "2025-10-07"
+
+
+def _add_summary(conn, item_id, topic="banking", published_at=f"{DATE}T08:00:00", confidence=0.5):
+    """Insert a summarized article with four key points."""
+    url = f"https://example.ch/{item_id}"
+    conn.execute(
+        "INSERT INTO items (id, source, url, title, published_at, triage_confidence) VALUES (?, ?, ?, ?, ?, ?)",
+        (item_id, f"source{item_id}", url, f"Title {item_id}", published_at, confidence)
+    )
+    conn.execute(
+        "INSERT INTO summaries (item_id, topic, summary, key_points_json, entities_json) VALUES (?, ?, ?, ?, ?)",
+        (item_id, topic, f"Summary {item_id}", '["a", "b", "c", "d"]', '{"companies": ["UBS"]}')
+    )
+
+
+def _partial_digest_content(request):
+    """Answer a partial digest request with one insight naming its topic."""
+    input_data = json.loads(request["messages"][-1]["content"])
+    return json.dumps({
+        "key_insights": [f"{input_data['topic']}: {input_data['new_article_count']} articles"],
+        "important_developments": [],
+        "new_sources": [],
+        "entities_mentioned": []
+    })
+
+
+async def _stream_chunks(content, delay=0.0):
+    """Yield content as streamed completion chunks, two characters each."""
+    for start in range(0, len(content), 2):
+        await asyncio.sleep(delay)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[start:start + 2]))])
+    yield SimpleNamespace(choices=[])
+
+
+class FakeAsyncClient:
+    """Async OpenAI stand-in streaming answers to partial digest and merge requests; tracks concurrency."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **request):
+        self.requests.append(request)
+        if self.failures:
+            self.failures -= 1
+            raise openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        if request["response_format"]["json_schema"]["name"] == "merged_digest":
+            content = json.dumps({"headline": "merged", "why_it_matters": "", "sources": []})
+        else:
+            content = _partial_digest_content(request)
+        return _stream_chunks(content, self.delay)
+
+    async def close(self):
+        pass
+
+
+class _StreamingCompletionHandler(BaseHTTPRequestHandler):
+    """Local Chat Completions endpoint streaming a partial digest answer over a keep-alive connection."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        chunk = {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": request["model"],
+                 "choices": [{"index": 0, "delta": {"content": _partial_digest_content(request)},
+                              "finish_reason": None}]}
+        body = f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def completion_server():
+    """Base URL of a local streaming Chat Completions server."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamingCompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+class FakeBatchClient:
+    """Sync OpenAI stand-in for the Batch API; answers partial digest requests."""
+
+    def __init__(self, status="completed", failing=()):
+        self.status = status
+        self.failing = set(failing)
+        self.uploads = []
+        self.polls = 0
+        self.files = SimpleNamespace(create=self._upload, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    def _upload(self, file, purpose):
+        assert purpose == "batch"
+        self.uploads.append(file[1].decode("utf-8"))
+        return SimpleNamespace(id="file-in")
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch_1", status="validating")
+
+    def _retrieve(self, batch_id):
+        self.polls += 1
+        return SimpleNamespace(id=batch_id, status=self.status, output_file_id="file-out")
+
+    def _content(self, file_id):
+        lines = []
+        for request in map(json.loads, self.uploads[-1].splitlines()):
+            topic = json.loads(request["body"]["messages"][-1]["content"])["topic"]
+            if topic in self.failing:
+                lines.append(json.dumps({"custom_id": request["custom_id"], "response": None,
+                                         "error": {"code": "server_error"}}))
+                continue
+            content = _partial_digest_content(request["body"])
+            lines.append(json.dumps({
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+                "error": None
+            }))
+        return SimpleNamespace(text="\n".join(lines))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fresh database with the digest state tables."""
+    path = str(tmp_path / "news.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def generator(db_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    generator = IncrementalDigestGenerator(db_path)
+    yield generator
+    generator.close()
+
+
+@pytest.fixture
+def state_manager(db_path):
+    manager = DigestStateManager(db_path)
+    yield manager
+    manager.close()
+
+
+class TestDigestState:
+    """Test saving and loading digest state"""
+
+    def test_save_and_load(self, state_manager):
+        """Verify saved state is returned as written"""
+        state_manager.save_digest_state("2025-10-07", "banking", [3, 1], {"headline": "UBS"})
+
+        state = state_manager.get_digest_state("2025-10-07", "banking")
+
+        assert state["processed_article_ids"] == [1, 3]
+        assert state["digest_content"] == {"headline": "UBS"}
+        assert state["article_count"] == 2
+
+    def test_ids_stored_as_packed_int64(self, state_manager, db_path):
+        """Verify processed IDs are stored as a sorted little-endian int64 blob"""
+        state_manager.save_digest_state("2025-10-07", "banking", [300, 2], {})
+
+        conn = sqlite3.connect(db_path)
+        stored = conn.execute("SELECT processed_article_ids FROM digest_state").fetchone()[0]
+        conn.close()
+        assert stored == (2).to_bytes(8, "little") + (300).to_bytes(8, "little")
+
+    def test_json_ids_still_readable(self, state_manager, db_path):
+        """Verify states written with a JSON ID list load and are repacked on the next save"""
+        with state_manager._lock:
+            state_manager._connection().execute("""
+                INSERT INTO digest_state (digest_date, topic, processed_article_ids, digest_content,
+                                          article_count, created_at, updated_at)
+                VALUES ('2025-10-07', 'banking', '[5, 4]', '{}', 2, 'created', 'updated')
+            """)
+
+        state = state_manager.get_digest_state("2025-10-07", "banking")
+        assert state["processed_article_ids"] == [5, 4]
+        assert state_manager.get_all_digest_states("2025-10-07")["banking"]["processed_article_ids"] == [5, 4]
+
+        state_manager.save_digest_state("2025-10-07", "banking", state["processed_article_ids"] + [6], {})
+
+        conn = sqlite3.connect(db_path)
+        stored = conn.execute("SELECT processed_article_ids FROM digest_state").fetchone()[0]
+        conn.close()
+        assert isinstance(stored, bytes)
+        assert state_manager.get_digest_state("2025-10-07", "banking")["processed_article_ids"] == [4, 5, 6]
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_non_ascii_stored_as_is(self, state_manager, db_path, monkeypatch, use_orjson):
+        """Verify umlauts survive the round trip unescaped, with and without orjson"""
+        if not use_orjson:
+            monkeypatch.setattr(utils, "orjson", None)
+
+        state_manager.save_digest_state("2025-10-07", "banking", [1], {"headline": "Zürcher Kantonalbank"})
+
+        conn = sqlite3.connect(db_path)
+        stored = conn.execute("SELECT digest_content FROM digest_state").fetchone()[0]
+        conn.close()
+        assert "Zürcher" in stored
+        assert state_manager.get_digest_state("2025-10-07", "banking")["digest_content"] == \
+            {"headline": "Zürcher Kantonalbank"}
+
+    def test_save_updates_existing_state(self, state_manager):
+        """Verify a second save replaces the state but keeps its creation time"""
+        state_manager.save_digest_state("2025-10-07", "banking", [1], {"headline": "old"})
+        created_at = state_manager.get_digest_state("2025-10-07", "banking")["created_at"]
+
+        state_manager.save_digest_state("2025-10-07", "banking", [1, 2], {"headline": "new"})
+
+        states = state_manager.get_all_digest_states("2025-10-07")
+        assert list(states) == ["banking"]
+        assert states["banking"]["digest_content"] == {"headline": "new"}
+        assert states["banking"]["article_count"] == 2
+        assert states["banking"]["created_at"] == created_at
+
+    def test_save_is_one_statement(self, state_manager):
+        """Verify saving does not read the previous state first"""
+        state_manager.save_digest_state("2025-10-07", "banking", [1], {"headline": "old"})
+        statements = []
+        with state_manager._lock:
+            state_manager._connection().set_trace_callback(statements.append)
+
+        state_manager.save_digest_state("2025-10-07", "banking", [1, 2], {"headline": "new"})
+
+        assert len(statements) == 1
+        assert statements[0].lstrip().startswith("INSERT INTO digest_state")
+
+    def test_bulk_save(self, state_manager):
+        """Verify bulk saves insert new topics and update existing ones in one transaction"""
+        state_manager.save_digest_state("2025-10-07", "banking", [1], {"headline": "old"})
+        statements = []
+        with state_manager._lock:
+            state_manager._connection().set_trace_callback(statements.append)
+
+        state_manager.save_digest_states_bulk("2025-10-07", [
+            ("banking", [1, 2], {"headline": "new"}),
+            ("insurance", [3], {"headline": "AXA"}),
+        ])
+
+        states = state_manager.get_all_digest_states("2025-10-07")
+        assert {topic: state["digest_content"]["headline"] for topic, state in states.items()} == \
+            {"banking": "new", "insurance": "AXA"}
+        assert [sql.split()[0] for sql in statements[:4]] == ["BEGIN", "INSERT", "INSERT", "COMMIT"]
+
+    def test_bulk_save_is_atomic(self, state_manager):
+        """Verify a failing row leaves none of the batch saved"""
+        with pytest.raises(TypeError):
+            state_manager.save_digest_states_bulk("2025-10-07", [
+                ("banking", [1], {"headline": "UBS"}),
+                ("insurance", [2], {"unserializable": object()}),
+            ])
+        with pytest.raises(sqlite3.IntegrityError):
+            state_manager.save_digest_states_bulk("2025-10-07", [
+                ("banking", [1], {"headline": "UBS"}),
+                (None, [2], {"headline": "AXA"}),
+            ])
+
+        assert state_manager.get_all_digest_states("2025-10-07") == {}
+
+    def test_missing_state(self, state_manager):
+        """Verify unknown date/topic pairs return None"""
+        assert state_manager.get_digest_state("2025-10-07", "banking") is None
+
+    def test_clear_old_states(self, state_manager, db_path):
+        """Verify states and log entries before the cutoff are deleted"""
+        state_manager.save_digest_state("2000-01-01", "banking", [1], {})
+        state_manager.log_generation("2000-01-01", "incremental", 1, 1)
+        state_manager.save_digest_state("2999-01-01", "banking", [1], {})
+
+        state_manager.clear_old_states(days_to_keep=7)
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT digest_date FROM digest_state").fetchall() == [("2999-01-01",)]
+        assert conn.execute("SELECT COUNT(*) FROM digest_generation_log").fetchone()[0] == 0
+        conn.close()
+
+
+    def test_clear_old_states_uses_date_indexes(self, state_manager):
+        """Verify both deletes search by digest_date instead of scanning"""
+        with state_manager._lock:
+            conn = state_manager._connection()
+            plans = [
+                conn.execute(f"EXPLAIN QUERY PLAN DELETE FROM {table} WHERE digest_date < ?", ("2025-10-01",)).fetchall()
+                for table in ("digest_state", "digest_generation_log")
+            ]
+
+        assert "USING PRIMARY KEY (digest_date<?)" in plans[0][0][-1]
+        assert "idx_digest_log_date" in plans[1][0][-1]
+
+    def test_state_table_migrated_without_rowid(self, db_path):
+        """Verify an existing rowid table is rebuilt WITHOUT ROWID with its rows kept"""
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            INSERT INTO digest_state (digest_date, topic, processed_article_ids, digest_content,
+                                      article_count, created_at, updated_at)
+            VALUES ('2025-10-07', 'banking', '[1, 2]', '{"headline": "UBS"}', 2, 'created', 'updated')
+        """)
+        conn.commit()
+        conn.close()
+
+        manager = DigestStateManager(db_path)
+        state = manager.get_digest_state("2025-10-07", "banking")
+        manager.close()
+
+        conn = sqlite3.connect(db_path)
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'digest_state'").fetchone()[0]
+        conn.close()
+        assert "WITHOUT ROWID" in sql
+        assert state["processed_article_ids"] == [1, 2]
+        assert state["digest_content"] == {"headline": "UBS"}
+        assert state["created_at"] == "created"
+
+    def test_migration_runs_once(self, state_manager, db_path, caplog):
+        """Verify an already migrated table is left alone"""
+        state_manager.save_digest_state("2025-10-07", "banking", [1], {})
+
+        with caplog.at_level("INFO", logger=incremental_digest.__name__):
+            DigestStateManager(db_path).close()
+
+        assert "Migrated digest_state" not in caplog.text
+        assert state_manager.get_digest_state("2025-10-07", "banking") is not None
+
+class TestConnection:
+    """Test the long-lived database connection"""
+
+    def test_connection_is_reused(self, state_manager):
+        """Verify all calls go through one connection"""
+        with state_manager._lock:
+            conn = state_manager._connection()
+
+        state_manager.save_digest_state("2025-10-07", "banking", [1], {})
+        state_manager.get_all_digest_states("2025-10-07")
+        state_manager.log_generation("2025-10-07", "incremental", 1, 1)
+
+        assert state_manager._conn is conn
+
+    def test_writes_are_visible_to_other_connections(self, state_manager, db_path):
+        """Verify writes are committed without an explicit close"""
+        state_manager.log_generation("2025-10-07", "incremental", 1, 1)
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM digest_generation_log").fetchone()[0] == 1
+        conn.close()
+
+    def test_close_reopens_on_next_use(self, state_manager):
+        """Verify close() closes the connection and later calls reopen it"""
+        state_manager.save_digest_state("2025-10-07", "banking", [1], {})
+        conn = state_manager._conn
+
+        state_manager.close()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        assert state_manager.get_digest_state("2025-10-07", "banking") is not None
+
+
+class TestNewArticlesForTopic:
+    """Test loading the articles a topic digest has not seen yet"""
+
+    @pytest.fixture
+    def articles(self, db_path):
+        conn = sqlite3.connect(db_path)
+        for item_id in range(1, 6):
+            _add_summary(conn, item_id, confidence=item_id / 10)
+        _add_summary(conn, 6, topic="insurance")
+        _add_summary(conn, 7, published_at="2025-10-06T23:00:00")
+        conn.execute("INSERT INTO article_clusters (cluster_id, article_id, is_primary) VALUES ('c', 5, 0)")
+        conn.commit()
+        conn.close()
+
+    def test_returns_unprocessed_articles(self, generator, articles):
+        """Verify processed, off-topic, other-day and duplicate articles are left out"""
+        new_articles = generator.get_new_articles_for_topic("banking", DATE, {2, 3})
+
+        assert [a["id"] for a in new_articles] == [4, 1]
+
+    def test_key_points_cut_to_three(self, generator, articles, db_path):
+        """Verify only the first three key points are loaded, and missing ones load as empty"""
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE summaries SET key_points_json = NULL WHERE item_id = 3")
+        conn.execute("UPDATE summaries SET key_points_json = '' WHERE item_id = 2")
+        conn.commit()
+        conn.close()
+
+        new_articles = generator.get_new_articles_for_topic("banking", DATE, set())
+
+        assert [a["key_points"] for a in new_articles] == [["a", "b", "c"], [], [], ["a", "b", "c"]]
+
+    def test_entities_not_loaded(self, generator, articles):
+        """Verify entities are left out of the article dicts used for digests"""
+        new_articles = generator.get_new_articles_for_topic("banking", DATE, set())
+
+        assert all("entities" not in a for a in new_articles)
+
+    def test_without_processed_articles(self, generator, articles):
+        """Verify an empty processed set returns every article of the day"""
+        new_articles = generator.get_new_articles_for_topic("banking", DATE, set())
+
+        assert [a["id"] for a in new_articles] == [4, 3, 2, 1]
+
+    def test_large_processed_sets(self, generator, articles, monkeypatch):
+        """Verify processed sets above the inline limit are excluded through a temp table"""
+        monkeypatch.setattr(incremental_digest, "_MAX_INLINE_IDS", 1)
+
+        new_articles = generator.get_new_articles_for_topic("banking", DATE, {2, 3})
+
+        assert [a["id"] for a in new_articles] == [4, 1]
+
+    def test_connection_reused_across_topics(self, generator, articles, monkeypatch):
+        """Verify repeated calls, including temp table ones, share one connection"""
+        monkeypatch.setattr(incremental_digest, "_MAX_INLINE_IDS", 1)
+        generator.get_new_articles_for_topic("banking", DATE, set())
+        conn = generator._conn
+
+        assert [a["id"] for a in generator.get_new_articles_for_topic("banking", DATE, {2, 3})] == [4, 1]
+        assert [a["id"] for a in generator.get_new_articles_for_topic("banking", DATE, {1, 4})] == [3, 2]
+        assert [a["id"] for a in generator.get_new_articles_for_topic("insurance", DATE, set())] == [6]
+        assert generator._conn is conn
+
+    def test_day_boundaries(self, generator, db_path):
+        """Verify date-only and timestamped published_at values match only on their own day"""
+        conn = sqlite3.connect(db_path)
+        _add_summary(conn, 1, published_at=DATE)
+        _add_summary(conn, 2, published_at=f"{DATE}T23:59:59")
+        _add_summary(conn, 3, published_at="2025-10-08T00:00:00")
+        conn.commit()
+        conn.close()
+
+        new_articles = generator.get_new_articles_for_topic("banking", DATE, set())
+
+        assert sorted(a["id"] for a in new_articles) == [1, 2]
+
+    def test_offset_timestamps_use_local_date(self, generator, db_path):
+        """Verify offset timestamps near midnight belong to their local date, not the UTC one"""
+        conn = sqlite3.connect(db_path)
+        # UTC date is the previous day, local date is DATE
+        _add_summary(conn, 1, published_at=f"{DATE}T00:38:08+02:00")
+        # UTC date is DATE, local date is the next day
+        _add_summary(conn, 2, published_at="2025-10-08T01:30:00+02:00")
+        conn.commit()
+        conn.close()
+
+        new_articles = generator.get_new_articles_for_topic("banking", DATE, set())
+
+        assert [a["id"] for a in new_articles] == [1]
+
+    def test_query_uses_indexes(self, generator, db_path, monkeypatch):
+        """Verify neither items, summaries nor article_clusters is scanned"""
+        statements = []
+        connect = sqlite3.connect
+
+        def traced_connect(*args, **kwargs):
+            conn = connect(*args, **kwargs)
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        monkeypatch.setattr(sqlite3, "connect", traced_connect)
+        generator.get_new_articles_for_topic("banking", DATE, {1})
+        monkeypatch.undo()
+
+        query = next(sql for sql in statements if "FROM items" in sql)
+        conn = sqlite3.connect(db_path)
+        plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query)]
+        conn.close()
+        assert not [step for step in plan if step.startswith("SCAN") and "VIRTUAL TABLE" not in step]
+
+
+class TestBatchPartialDigests:
+    """Test generating partial digests through the Batch API"""
+
+    ARTICLES = [{"id": 1, "title": "UBS", "url": "https://example.ch/1", "source": "nzz",
+                 "summary": "Summary", "key_points": ["a", "b", "c", "d"]}]
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        monkeypatch.setattr(incremental_digest.time, "sleep", lambda seconds: None)
+
+    def test_one_request_per_topic(self, generator):
+        """Verify topics with articles share one batch and get their own results"""
+        generator.client = FakeBatchClient()
+
+        results = generator.generate_all_partial_digests(
+            {"banking": self.ARTICLES, "insurance": self.ARTICLES * 2, "fintech": []}
+        )
+
+        assert len(generator.client.uploads) == 1
+        requests = [json.loads(line) for line in generator.client.uploads[0].splitlines()]
+        assert [r["url"] for r in requests] == ["/v1/chat/completions"] * 2
+        assert requests[0]["body"]["response_format"]["json_schema"]["name"] == "partial_digest"
+        assert set(results) == {"banking", "insurance"}
+        assert results["insurance"]["key_insights"] == ["insurance: 2 articles"]
+        assert results["insurance"]["article_count"] == 2
+
+    def test_waits_for_completion(self, generator):
+        """Verify the batch is polled until it finishes"""
+        client = FakeBatchClient(status="in_progress")
+        generator.client = client
+        retrieve = client.batches.retrieve
+
+        def finish_after_three_polls(batch_id):
+            if client.polls == 2:
+                client.status = "completed"
+            return retrieve(batch_id)
+
+        client.batches.retrieve = finish_after_three_polls
+
+        results = generator.generate_all_partial_digests({"banking": self.ARTICLES})
+
+        assert client.polls == 3
+        assert results["banking"] is not None
+
+    def test_failed_requests(self, generator):
+        """Verify failed requests leave only their topic without a partial digest"""
+        generator.client = FakeBatchClient(failing={"banking"})
+
+        results = generator.generate_all_partial_digests({"banking": self.ARTICLES, "insurance": self.ARTICLES})
+
+        assert results["banking"] is None
+        assert results["insurance"]["article_count"] == 1
+
+    def test_failed_batch(self, generator):
+        """Verify an expired batch returns no partial digests"""
+        generator.client = FakeBatchClient(status="expired")
+
+        assert generator.generate_all_partial_digests({"banking": self.ARTICLES}) == {"banking": None}
+
+    def test_incremental_digests_use_batch(self, generator, db_path):
+        """Verify multi-topic generation merges batch results into the existing digests"""
+        conn = sqlite3.connect(db_path)
+        _add_summary(conn, 1)
+        conn.commit()
+        conn.close()
+        generator.state_manager.save_digest_state(DATE, "banking", [], {"headline": "old", "article_count": 0})
+        generator.use_batch_api = True
+        generator.client = FakeBatchClient()
+        merged = []
+
+        async def merge_digests_async(existing_digest, partial_digest, topic):
+            merged.append(partial_digest["key_insights"])
+            return {"headline": "new", "article_count": 1}
+
+        generator.merge_digests_async = merge_digests_async
+
+        results = generator.generate_incremental_topic_digests(["banking", "insurance"], DATE)
+
+        assert merged == [["banking: 1 articles"]]
+        assert results["banking"][0]["headline"] == "new" and results["banking"][1] is True
+        assert results["insurance"][1] is False
+        assert generator.state_manager.get_digest_state(DATE, "banking")["processed_article_ids"] == [1]
+
+
+class TestConcurrentGeneration:
+    """Test generating the digests of several topics concurrently"""
+
+    @pytest.fixture
+    def topics(self, db_path, generator):
+        conn = sqlite3.connect(db_path)
+        for item_id, topic in enumerate(["banking", "insurance", "fintech"], 1):
+            _add_summary(conn, item_id, topic=topic)
+        conn.commit()
+        conn.close()
+        for topic in ["banking", "insurance", "fintech"]:
+            generator.state_manager.save_digest_state(DATE, topic, [], {"headline": "old", "article_count": 0})
+
+    def test_topics_overlap(self, generator, topics):
+        """Verify partial digests and merges of all topics are in flight together"""
+        generator.async_client = FakeAsyncClient()
+
+        results = generator.generate_incremental_topic_digests(["banking", "insurance", "fintech"], DATE)
+
+        assert generator.async_client.max_in_flight == 3
+        assert len(generator.async_client.requests) == 6
+        assert all(digest["headline"] == "merged" and was_updated for digest, was_updated in results.values())
+
+    def test_transient_errors_are_retried(self, generator, monkeypatch):
+        """Verify connection errors are retried with backoff"""
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        generator.async_client = FakeAsyncClient(failures=2)
+
+        partial_digest = generator.generate_partial_digest("banking", TestBatchPartialDigests.ARTICLES)
+
+        assert partial_digest["key_insights"] == ["banking: 1 articles"]
+        assert len([seconds for seconds in sleeps if seconds >= 1]) == 2
+
+    def test_responses_are_streamed(self, generator):
+        """Verify requests ask for a stream and the chunks are joined into the digest"""
+        generator.async_client = FakeAsyncClient()
+
+        partial_digest = generator.generate_partial_digest("banking", TestBatchPartialDigests.ARTICLES)
+
+        assert generator.async_client.requests[0]["stream"] is True
+        assert partial_digest["key_insights"] == ["banking: 1 articles"]
+
+    def test_repeated_sync_calls_reuse_client(self, db_path, monkeypatch, completion_server):
+        """Verify the real async client keeps working across sync calls (its pool is bound to one loop)"""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        monkeypatch.setenv("OPENAI_BASE_URL", completion_server)
+        generator = IncrementalDigestGenerator(db_path)
+        try:
+            first = generator.generate_partial_digest("banking", TestBatchPartialDigests.ARTICLES)
+            second = generator.generate_partial_digest("insurance", TestBatchPartialDigests.ARTICLES)
+        finally:
+            generator.close()
+
+        assert first["key_insights"] == ["banking: 1 articles"]
+        assert second["key_insights"] == ["insurance: 1 articles"]
+
+    def test_system_prompts_resolved_once(self, generator, topics, monkeypatch):
+        """Verify the prompt library is asked for each system prompt only once per generator"""
+        lookups = []
+        get_fragment = generator.prompt_lib.get_fragment
+
+        def counting_get_fragment(category, name):
+            lookups.append(name)
+            return get_fragment(category, name)
+
+        monkeypatch.setattr(generator.prompt_lib, "get_fragment", counting_get_fragment)
+        generator.async_client = FakeAsyncClient()
+
+        generator.generate_incremental_topic_digests(["banking", "insurance", "fintech"], DATE)
+
+        assert sorted(lookups) == ["merge_digests", "partial_digest_generation"]
+
+    def test_slow_responses_time_out(self, generator):
+        """Verify a response slower than request_timeout gives up the topic"""
+        generator.async_client = FakeAsyncClient(delay=0.01)
+        generator.request_timeout = 0.05
+
+        assert generator.generate_partial_digest("banking", TestBatchPartialDigests.ARTICLES) is None
+
+
+class TestMergeCache:
+    """Test reusing merged digests for repeated merge inputs"""
+
+    EXISTING = {"headline": "old", "article_count": 2, "last_updated": "2025-10-07T08:00:00"}
+    PARTIAL = {"key_insights": ["new"], "article_count": 1, "generated_at": "2025-10-07T09:00:00"}
+
+    def test_repeated_merge_uses_cache(self, generator):
+        """Verify the same merge inputs call the model once, even with newer timestamps"""
+        generator.async_client = FakeAsyncClient()
+
+        first = generator.merge_digests(dict(self.EXISTING), dict(self.PARTIAL), "banking")
+        second = generator.merge_digests(dict(self.EXISTING, last_updated="2025-10-07T10:00:00"),
+                                         dict(self.PARTIAL, generated_at="2025-10-07T10:00:00"), "banking")
+
+        assert len(generator.async_client.requests) == 1
+        timestamps = ("generated_at", "last_updated")
+        assert {k: v for k, v in second.items() if k not in timestamps} == \
+            {k: v for k, v in first.items() if k not in timestamps}
+
+    def test_cache_hit_reports_current_time(self, generator):
+        """Verify a cached merge carries this run's timestamps, not those of the run that stored it"""
+        generator.async_client = FakeAsyncClient()
+        key = generator._merge_cache_key(dict(self.EXISTING), dict(self.PARTIAL), "banking")
+        generator.state_manager.cache_merge(key, {"headline": "merged", "generated_at": "2000-01-01T00:00:00",
+                                                  "last_updated": "2000-01-01T00:00:00"})
+
+        merged = generator.merge_digests(dict(self.EXISTING), dict(self.PARTIAL), "banking")
+
+        assert generator.async_client.requests == []
+        assert merged["headline"] == "merged"
+        assert merged["generated_at"] > "2025"
+        assert merged["last_updated"] == merged["generated_at"]
+
+    def test_different_inputs_miss_cache(self, generator):
+        """Verify another topic or partial digest is merged by the model"""
+        generator.async_client = FakeAsyncClient()
+
+        generator.merge_digests(dict(self.EXISTING), dict(self.PARTIAL), "banking")
+        generator.merge_digests(dict(self.EXISTING), dict(self.PARTIAL), "insurance")
+        generator.merge_digests(dict(self.EXISTING), dict(self.PARTIAL, key_insights=["other"]), "banking")
+
+        assert len(generator.async_client.requests) == 3
+
+    def test_failed_merge_not_cached(self, generator, monkeypatch):
+        """Verify the fallback digest of a failed merge is not reused"""
+        async def no_sleep(seconds):
+            pass
+
+        monkeypatch.setattr(asyncio, "sleep", no_sleep)
+        generator.async_client = FakeAsyncClient(failures=incremental_digest.MAX_GPT_ATTEMPTS)
+
+        fallback = generator.merge_digests(dict(self.EXISTING), dict(self.PARTIAL), "banking")
+        merged = generator.merge_digests(dict(self.EXISTING), dict(self.PARTIAL), "banking")
+
+        assert fallback["headline"] == "old"
+        assert merged["headline"] == "merged"
+
+    def test_old_entries_cleared(self, state_manager, db_path):
+        """Verify clear_old_states drops cache entries past the retention window"""
+        state_manager.cache_merge("fresh", {"headline": "fresh"})
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO digest_merge_cache VALUES ('stale', '{}', '2000-01-01T00:00:00')")
+        conn.commit()
+        conn.close()
+
+        state_manager.clear_old_states(days_to_keep=7)
+
+        assert state_manager.get_cached_merge("stale") is None
+        assert state_manager.get_cached_merge("fresh") == {"headline": "fresh"}
+
+
+class TestResponseValidation:
+    """Test schema validation of parsed model responses"""
+
+    @staticmethod
+    def _require(*keys):
+        def validate(data):
+            missing = [key for key in keys if key not in data]
+            if missing:
+                raise ValueError(f"missing {missing}")
+            return data
+        return validate
+
+    def test_invalid_partial_digest_dropped(self, generator, monkeypatch):
+        """Verify a partial digest failing validation is logged and returned as None"""
+        monkeypatch.setattr(incremental_digest, "_validate_partial_digest", self._require("summary"))
+        generator.async_client = FakeAsyncClient()
+
+        assert generator.generate_partial_digest("banking", TestBatchPartialDigests.ARTICLES) is None
+
+    def test_valid_partial_digest_kept(self, generator, monkeypatch):
+        """Verify a partial digest passing validation is returned"""
+        monkeypatch.setattr(incremental_digest, "_validate_partial_digest", self._require("key_insights"))
+        generator.async_client = FakeAsyncClient()
+
+        partial_digest = generator.generate_partial_digest("banking", TestBatchPartialDigests.ARTICLES)
+
+        assert partial_digest["key_insights"] == ["banking: 1 articles"]
+
+    def test_invalid_merge_falls_back(self, generator, monkeypatch):
+        """Verify a merged digest failing validation falls back to the existing digest"""
+        monkeypatch.setattr(incremental_digest, "_validate_merged_digest", self._require("bullets"))
+        generator.async_client = FakeAsyncClient()
+
+        merged = generator.merge_digests({"headline": "old", "article_count": 2}, {"article_count": 1}, "banking")
+
+        assert merged["headline"] == "old"
+        assert merged["article_count"] == 3
+
+    def test_compiled_schemas_accept_fake_responses(self):
+        """Verify the compiled validators accept well-formed responses"""
+        pytest.importorskip("fastjsonschema")
+        request = {"messages": [{"content": json.dumps({"topic": "banking", "new_article_count": 1})}]}
+
+        incremental_digest._validate_partial_digest(json.loads(_partial_digest_content(request)))
+        incremental_digest._validate_merged_digest({"headline": "h", "why_it_matters": "w", "sources": []})
@@ -0,0 +1,73 @@
+"""
+Tests for language selection and the global LanguageConfig instance.
+"""
+
+import threading
+import time
+
+import pytest
+
+from news_pipeline import language_config
+from news_pipeline.language_config import LanguageConfig, get_language_config, set_language
+
+
+@pytest.fixture(autouse=True)
+def no_global_config(monkeypatch):
+    """Run each test without a global configuration."""
+    monkeypatch.setattr(language_config, "_global_language_config", None)
+
+
+class TestLanguageConfig:
+    """Test per-language values."""
+
+    @pytest.mark.parametrize("language, name", [("de", "Deutsch"), ("EN", "English")])
+    def test_language_name(self, language, name):
+        """Test that language codes are normalized and named."""
+        assert LanguageConfig(language).get_language_name() == name
+
+    def test_unsupported_language(self):
+        """Test that unknown languages are rejected."""
+        with pytest.raises(ValueError, match="Unsupported language"):
+            LanguageConfig("fr")
+
+    def test_output_format_instructions_shared_and_read_only(self):
+        """Test that instances share one read-only mapping per language."""
+        instructions = LanguageConfig("de").get_output_format_instructions()
+
+        assert instructions is LanguageConfig("de").get_output_format_instructions()
+        with pytest.raises(TypeError):
+            instructions["emphasis"] = "changed"
+
+
+class TestGlobalLanguageConfig:
+    """Test the process-wide configuration instance."""
+
+    def test_created_once_across_threads(self, monkeypatch):
+        """Test that concurrent first calls construct a single instance."""
+        monkeypatch.setenv("PIPELINE_LANGUAGE", "de")
+        created = []
+        init = LanguageConfig.__init__
+
+        def slow_init(self, language=None):
+            created.append(self)
+            time.sleep(0.01)
+            init(self, language)
+
+        monkeypatch.setattr(LanguageConfig, "__init__", slow_init)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_language_config())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(created) == 1
+        assert all(config is created[0] for config in results)
+
+    def test_set_language_replaces_instance(self):
+        """Test that set_language swaps the global configuration."""
+        set_language("en")
+        assert get_language_config().get_language_code() == "en"
+
+        set_language("de")
+        assert get_language_config().get_language_code() == "de"
@@ -0,0 +1,113 @@
+"""
+Tests for project-root based path resolution.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from news_pipeline import paths
+
+
+@pytest.fixture(autouse=True)
+def fresh_project_root():
+    """Run each test with an empty project_root cache."""
+    paths.project_root.cache_clear()
+    yield
+    paths.project_root.cache_clear()
+
+
+class TestProjectRoot:
+    """Test locating the project root."""
+
+    def test_finds_repository_root(self):
+        """Test that the root is the directory containing news_pipeline."""
+        root = paths.project_root()
+
+        assert root == Path(paths.__file__).resolve().parent.parent
+        assert (root / "news_pipeline").is_dir()
+
+    def test_marker_search_runs_once(self, monkeypatch):
+        """Test that repeated path lookups reuse the first marker search."""
+        checks = []
+        exists = Path.exists
+
+        def counting_exists(path):
+            checks.append(path)
+            return exists(path)
+
+        monkeypatch.setattr(Path, "exists", counting_exists)
+
+        paths.config_path("feeds.yaml")
+        searched = len(checks)
+        paths.resource_path("templates")
+        paths.data_path("news.db")
+
+        assert len(checks) == searched
+
+    def test_resource_paths_are_absolute(self, tmp_path, monkeypatch):
+        """Test that resource paths do not depend on the working directory."""
+        monkeypatch.chdir(tmp_path)
+
+        assert paths.config_path("feeds.yaml") == paths.project_root() / "config" / "feeds.yaml"
+        assert paths.config_path("feeds.yaml").is_absolute()
+
+    def test_top_level_markers_need_no_stat(self, monkeypatch):
+        """Test that a top-level marker is found from the directory listing alone."""
+        checks = []
+        monkeypatch.setattr(Path, "exists", lambda path: checks.append(path) or False)
+
+        assert paths.project_root() == Path(paths.__file__).resolve().parent.parent
+        assert checks == []
+
+    def test_nested_marker_fallback(self, tmp_path, monkeypatch):
+        """Test that nested markers are still checked when no top-level marker is listed."""
+        package = tmp_path / "news_pipeline"
+        package.mkdir()
+        (package / "__init__.py").write_text("", encoding="utf-8")
+        monkeypatch.setattr(paths, "__file__", str(package / "paths.py"))
+
+        assert paths.project_root() == tmp_path.resolve()
+
+    def test_missing_root_raises(self, tmp_path, monkeypatch):
+        """Test that a directory without any marker raises RuntimeError."""
+        monkeypatch.setattr(paths, "__file__", str(tmp_path / "pkg" / "paths.py"))
+
+        with pytest.raises(RuntimeError, match="Cannot determine project root"):
+            paths.project_root()
+
+
+class TestSafeOpen:
+    """Test opening files with helpful errors."""
+
+    def test_reads_existing_file(self, tmp_path):
+        """Test that existing files open normally."""
+        path = tmp_path / "config.yaml"
+        path.write_text("key: value", encoding="utf-8")
+
+        with paths.safe_open(str(path), encoding="utf-8") as f:
+            assert f.read() == "key: value"
+
+    def test_missing_file_error_has_context(self, tmp_path):
+        """Test that a missing file raises FileNotFoundError naming the project root."""
+        with pytest.raises(FileNotFoundError, match="Project root") as excinfo:
+            paths.safe_open(tmp_path / "missing.yaml")
+
+        assert isinstance(excinfo.value.__cause__, FileNotFoundError)
+
+    def test_read_does_not_stat_first(self, tmp_path, monkeypatch):
+        """Test that reading skips the separate existence check."""
+        path = tmp_path / "config.yaml"
+        path.write_text("", encoding="utf-8")
+        monkeypatch.setattr(Path, "exists", lambda p: pytest.fail("exists() called"))
+
+        paths.safe_open(path).close()
+
+    def test_write_creates_parent_dirs(self, tmp_path):
+        """Test that writing creates missing parent directories."""
+        path = tmp_path / "out" / "digests" / "report.md"
+
+        with paths.safe_open(path, "w", encoding="utf-8") as f:
+            f.write("report")
+
+        assert path.read_text(encoding="utf-8") == "report"
@@ -0,0 +1,231 @@
+"""
+Tests for PromptLibrary stage prompt loading and formatting.
+
+Uses a temporary prompts directory so the tests do not depend on the
+contents of config/prompts.
+"""
+
+import os
+
+import pytest
+from news_pipeline.prompt_library import COMPILED_PROMPTS_FILE, PromptLibrary, write_compiled_prompts
+from news_pipeline.language_config import LanguageConfig
+
+
+FRAGMENTS_YAML = """
+common:
+  analyst_role: "You are an analyst."
+"""
+
+STAGE_YAML = """
+classification_prompt:
+  description: "Classify by topic"
+  template: "Classify for {topic}."
+plain_prompt: "Plain text without parameters."
+"""
+
+
+@pytest.fixture
+def prompts_dir(tmp_path):
+    """Prompts directory with one filtering stage file."""
+    (tmp_path / "filtering.yaml").write_text(STAGE_YAML, encoding="utf-8")
+    (tmp_path / "fragments.yaml").write_text(FRAGMENTS_YAML, encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def prompt_lib(prompts_dir):
+    """PromptLibrary reading from the temporary prompts directory."""
+    return PromptLibrary(LanguageConfig("de"), prompts_dir=prompts_dir)
+
+
+class TestStagePrompts:
+    """Test template retrieval and formatting."""
+
+    def test_dict_and_plain_templates(self, prompt_lib):
+        """Test that dict configs are unwrapped and plain strings returned as-is."""
+        assert prompt_lib.get_prompt("filtering", "classification_prompt") == "Classify for {topic}."
+        assert prompt_lib.get_prompt("filtering", "plain_prompt") == "Plain text without parameters."
+
+    def test_format_prompt(self, prompt_lib):
+        """Test that format_prompt fills in template parameters."""
+        prompt = prompt_lib.format_prompt("filtering", "classification_prompt", topic="creditreform")
+
+        assert prompt == "Classify for creditreform."
+        assert prompt_lib.filtering.classification_prompt(topic="creditreform") == prompt
+
+    def test_topic_prompts_formatted_once(self, prompt_lib, monkeypatch):
+        """Test that each topic's prompt is formatted once and then reused."""
+        formatted = []
+        format_prompt = prompt_lib.format_prompt
+
+        def counting_format(stage, prompt_name, **params):
+            formatted.append(params["topic"])
+            return format_prompt(stage, prompt_name, **params)
+
+        monkeypatch.setattr(prompt_lib, "format_prompt", counting_format)
+
+        first = prompt_lib.filtering.classification_prompt(topic="creditreform")
+        assert prompt_lib.filtering.classification_prompt(topic="creditreform") is first
+        assert prompt_lib.filtering.classification_prompt(topic="business") == "Classify for business."
+        assert formatted == ["creditreform", "business"]
+
+        prompt_lib.clear_cache()
+        prompt_lib.filtering.classification_prompt(topic="creditreform")
+        assert formatted == ["creditreform", "business", "creditreform"]
+
+    def test_stage_accessors_cover_pipeline_stages(self, prompt_lib):
+        """Test that each stage accessor reads its own stage file."""
+        from news_pipeline.prompt_library import PIPELINE_STAGES
+
+        assert [getattr(prompt_lib, stage).stage for stage in PIPELINE_STAGES] == list(PIPELINE_STAGES)
+
+    def test_metadata_still_available(self, prompt_lib):
+        """Test that prompt metadata is kept alongside the templates."""
+        metadata = prompt_lib.get_prompt_metadata("filtering", "classification_prompt")
+
+        assert metadata["description"] == "Classify by topic"
+
+    def test_unknown_prompt_lists_available(self, prompt_lib):
+        """Test that unknown prompt names raise KeyError naming the available prompts."""
+        for lookup in (prompt_lib.get_prompt, prompt_lib.format_prompt):
+            with pytest.raises(KeyError, match="classification_prompt, plain_prompt"):
+                lookup("filtering", "missing_prompt")
+
+    def test_stage_file_read_once(self, prompt_lib, prompts_dir):
+        """Test that templates are served from memory after the first load."""
+        prompt_lib.format_prompt("filtering", "classification_prompt", topic="a")
+        (prompts_dir / "filtering.yaml").write_text('classification_prompt: "Changed {topic}"', encoding="utf-8")
+
+        assert prompt_lib.format_prompt("filtering", "classification_prompt", topic="b") == "Classify for b."
+
+    def test_clear_cache_reloads(self, prompt_lib, prompts_dir):
+        """Test that clear_cache drops the loaded templates."""
+        prompt_lib.get_prompt("filtering", "classification_prompt")
+        (prompts_dir / "filtering.yaml").write_text('classification_prompt: "Changed {topic}"', encoding="utf-8")
+
+        prompt_lib.clear_cache()
+
+        assert prompt_lib.format_prompt("filtering", "classification_prompt", topic="b") == "Changed b"
+
+
+class TestPromptsDirectory:
+    """Test locating the prompt files."""
+
+    def test_loads_from_any_working_directory(self, tmp_path, monkeypatch):
+        """Test that the default prompts directory does not depend on the CWD."""
+        monkeypatch.chdir(tmp_path)
+        lib = PromptLibrary(LanguageConfig("de"))
+
+        assert lib._prompts_dir.is_absolute()
+        assert lib.get_fragment("common", "analyst_role")
+
+    def test_missing_stage_file(self, prompt_lib):
+        """Test that a stage without a YAML file raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError, match="analysis.yaml"):
+            prompt_lib.get_prompt("analysis", "summarization_prompt")
+
+    def test_stage_files_precomputed(self, prompt_lib, prompts_dir):
+        """Test that pipeline stage paths are built once and other stages still resolve."""
+        assert prompt_lib._stage_files["filtering"] == prompts_dir / "filtering.yaml"
+        (prompts_dir / "custom.yaml").write_text('custom_prompt: "Custom"', encoding="utf-8")
+
+        assert prompt_lib.get_prompt("custom", "custom_prompt") == "Custom"
+
+    def test_existence_checked_once(self, prompt_lib, prompts_dir, monkeypatch):
+        """Test that existence checks are remembered until clear_cache."""
+        checks = []
+        path_type = type(prompts_dir)
+        exists = path_type.exists
+
+        def counting_exists(path):
+            checks.append(path.name)
+            return exists(path)
+
+        monkeypatch.setattr(path_type, "exists", counting_exists)
+
+        prompt_lib.get_prompt("filtering", "plain_prompt")
+        del prompt_lib._cache["filtering"], prompt_lib._templates["filtering"]
+        prompt_lib.get_prompt("filtering", "plain_prompt")
+        assert checks == ["filtering.yaml"]
+
+        prompt_lib.clear_cache()
+        prompt_lib.get_prompt("filtering", "plain_prompt")
+        assert checks == ["filtering.yaml", "filtering.yaml"]
+
+
+class TestPrecompiledPrompts:
+    """Test loading prompts from the merged JSON file."""
+
+    def test_compiled_file_matches_yaml(self, prompt_lib, prompts_dir):
+        """Test that compiled prompts are served without reading the YAML files."""
+        write_compiled_prompts(prompts_dir)
+        for yaml_file in prompts_dir.glob("*.yaml"):
+            yaml_file.write_text("broken: [", encoding="utf-8")
+            os.utime(yaml_file, (0, 0))
+
+        assert prompt_lib.format_prompt("filtering", "classification_prompt", topic="a") == "Classify for a."
+        assert prompt_lib.get_prompt_metadata("filtering", "classification_prompt")["description"] == "Classify by topic"
+        assert prompt_lib.get_fragment("common", "analyst_role") == "You are an analyst."
+
+    def test_stale_compiled_file_ignored(self, prompt_lib, prompts_dir):
+        """Test that a YAML file edited after compiling wins over the compiled copy."""
+        compiled = write_compiled_prompts(prompts_dir)
+        os.utime(compiled, (0, 0))
+        (prompts_dir / "filtering.yaml").write_text('plain_prompt: "Edited"', encoding="utf-8")
+
+        assert prompt_lib.get_prompt("filtering", "plain_prompt") == "Edited"
+
+    def test_missing_compiled_file(self, prompt_lib, prompts_dir):
+        """Test that the YAML files are used when nothing was compiled."""
+        assert not (prompts_dir / COMPILED_PROMPTS_FILE).exists()
+        assert prompt_lib.get_prompt("filtering", "plain_prompt") == "Plain text without parameters."
+
+
+class TestYamlLoader:
+    """Test the YAML loader selection."""
+
+    def test_c_loader_used_when_available(self):
+        """Test that the libyaml loader is picked when PyYAML provides it."""
+        import yaml
+        from news_pipeline import prompt_library
+
+        expected = yaml.CSafeLoader if yaml.__with_libyaml__ else yaml.SafeLoader
+        assert prompt_library._YamlLoader is expected
+
+
+class TestEagerLoading:
+    """Test loading prompts at construction."""
+
+    def test_lazy_by_default(self, prompt_lib):
+        """Test that nothing is loaded until first use."""
+        assert prompt_lib._cache == {}
+        assert not hasattr(prompt_lib, "_fragments")
+
+    def test_preload_loads_existing_files(self, prompt_lib):
+        """Test that preload reads fragments and every existing stage file."""
+        prompt_lib.preload()
+
+        assert list(prompt_lib._cache) == ["filtering"]
+        assert prompt_lib._fragments["common"]["analyst_role"] == "You are an analyst."
+
+    def test_preload_fragments_only(self, prompt_lib):
+        """Test that an empty stage list loads just the fragments."""
+        prompt_lib.preload(stages=())
+
+        assert prompt_lib._cache == {}
+        assert prompt_lib._fragments["common"]["analyst_role"] == "You are an analyst."
+
+    def test_preload_skips_missing_stages(self, prompt_lib):
+        """Test that stages without a file still raise when used after preload."""
+        prompt_lib.preload()
+
+        with pytest.raises(FileNotFoundError):
+            prompt_lib.get_prompt("digest", "partial_digest_prompt")
+
+    def test_eager_constructor(self):
+        """Test that eager=True loads all stages of the shipped prompt files."""
+        lib = PromptLibrary(LanguageConfig("de"), eager=True)
+
+        assert set(lib._cache) == {"filtering", "deduplication", "analysis", "formatting", "digest"}
+        assert hasattr(lib, "_fragments")